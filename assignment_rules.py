@@ -0,0 +1,217 @@
+import json
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+# Rules file name. The file is kept in the projects folder, so the same rules
+# sync to every machine; top_assignments.json is per machine and lives elsewhere.
+RULES_FILE = "assignment_rules.json"
+
+# Fields a rule can test. Exact fields are compared case-insensitively;
+# title is a regex and workspace a substring, both searched case-insensitively.
+EXACT_FIELDS = ("url_host", "exe_path", "process_name")
+TEXT_FIELDS = ("title", "workspace")
+
+# Length of the literal fragments used to index text rules
+GRAM = 3
+
+
+# Longest run of literal characters every match of pattern must contain,
+# lower-cased, or "" if there isn't one (or the pattern can't be parsed)
+def required_literal(pattern):
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return ""
+    best, run = "", []
+    for op, value in list(parsed) + [(None, None)]:
+        if op == sre_parse.LITERAL:
+            run.append(chr(value))
+            continue
+        if len("".join(run)) > len(best):
+            best = "".join(run)
+        run = []
+    return best.lower()
+
+
+def grams(text):
+    return {text[position:position + GRAM] for position in range(len(text) - GRAM + 1)}
+
+
+# Host of a URL and each of its parent domains, so a rule for
+# "github.com" also matches "gist.github.com"
+def host_suffixes(url):
+    try:
+        host = (urlsplit(url).hostname or "").lower()
+    except ValueError:
+        return []
+    parts = host.split(".")
+    return [".".join(parts[position:]) for position in range(len(parts)) if host]
+
+
+# The values a window offers for each rule field
+def window_fields(window):
+    workspace = window.get("vscode_workspace")
+    if isinstance(workspace, (list, tuple)):
+        workspace = " ".join(str(part) for part in workspace)
+    return {
+        "process_name": (window.get("process_name") or "").lower(),
+        "exe_path": (window.get("exe_path") or "").lower(),
+        "url_host": host_suffixes(window.get("chrome_url") or ""),
+        "title": window.get("title") or "",
+        "workspace": (workspace or "").lower(),
+    }
+
+
+class Rule:
+    def __init__(self, position, spec):
+        self.position = position
+        self.project = spec["project"]
+        if not isinstance(self.project, str) or not self.project:
+            raise ValueError("rule has no project name")
+        self.exact = {field: str(spec[field]).lower() for field in EXACT_FIELDS if spec.get(field)}
+        self.title = re.compile(spec["title"], re.IGNORECASE) if spec.get("title") else None
+        self.workspace = str(spec["workspace"]).lower() if spec.get("workspace") else None
+        if not (self.exact or self.title or self.workspace):
+            raise ValueError("rule has no conditions")
+
+    def matches(self, fields):
+        for field, value in self.exact.items():
+            if field == "url_host":
+                if value not in fields["url_host"]:
+                    return False
+            elif fields[field] != value:
+                return False
+        if self.title is not None and not self.title.search(fields["title"]):
+            return False
+        if self.workspace is not None and self.workspace not in fields["workspace"]:
+            return False
+        return True
+
+
+# Ordered list of rules compiled into hash indexes. Each rule is filed under
+# one key: its URL host if it has one, otherwise whichever is shared by the
+# fewest rules of an exact field value or a trigram of the literal text its
+# title or workspace condition requires. A window only
+# evaluates the rules whose key it has, plus the few that can't be indexed,
+# and the earliest matching rule wins.
+class RuleSet:
+    def __init__(self, specs=()):
+        self.rules = []
+        self.exact = {field: {} for field in EXACT_FIELDS}
+        self.text = {field: {} for field in TEXT_FIELDS}
+        self.unindexed = []
+        for spec in specs:
+            try:
+                self.rules.append(Rule(len(self.rules), spec))
+            except (KeyError, TypeError, ValueError, re.error) as e:
+                print(f"Error in assignment rule {spec}: {e}")
+
+        # File each rule under its least shared key, so rules with a common
+        # prefix or the same executable don't all land in one bucket
+        literals = [self._literals(rule) for rule in self.rules]
+        counts = {}
+        for rule, rule_literals in zip(self.rules, literals):
+            keys = [(field, gram) for field, literal in rule_literals.items() for gram in grams(literal)]
+            keys += [(field, value) for field, value in rule.exact.items()]
+            for key in keys:
+                counts[key] = counts.get(key, 0) + 1
+        for rule, rule_literals in zip(self.rules, literals):
+            self._file(rule, rule_literals, counts)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def _literals(self, rule):
+        literals = {}
+        if rule.title is not None:
+            literals["title"] = required_literal(rule.title.pattern)
+        if rule.workspace is not None:
+            literals["workspace"] = rule.workspace
+        return {field: literal for field, literal in literals.items() if len(literal) >= GRAM}
+
+    def _file(self, rule, literals, counts):
+        if "url_host" in rule.exact:
+            self.exact["url_host"].setdefault(rule.exact["url_host"], []).append(rule.position)
+            return
+        keys = [(field, gram) for field, literal in literals.items() for gram in grams(literal)]
+        keys += [(field, rule.exact[field]) for field in ("exe_path", "process_name") if field in rule.exact]
+        if not keys:
+            self.unindexed.append(rule.position)
+            return
+        field, key = min(keys, key=lambda key: (counts[key], key))
+        index = self.text[field] if field in TEXT_FIELDS else self.exact[field]
+        index.setdefault(key, []).append(rule.position)
+
+    def candidates(self, fields):
+        found = set(self.unindexed)
+        for host in fields["url_host"]:
+            found.update(self.exact["url_host"].get(host, ()))
+        for field in ("exe_path", "process_name"):
+            found.update(self.exact[field].get(fields[field], ()))
+        for field in TEXT_FIELDS:
+            index = self.text[field]
+            if index:
+                for gram in grams(fields[field].lower()):
+                    found.update(index.get(gram, ()))
+        return sorted(found)
+
+    # Project for a window's metadata, or None if no rule matches
+    def match(self, window):
+        fields = window_fields(window)
+        for position in self.candidates(fields):
+            rule = self.rules[position]
+            if rule.matches(fields):
+                return rule.project
+        return None
+
+
+# Rules loaded from a JSON file, reloaded when the file changes
+class AutoAssigner:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.rules = RuleSet()
+
+    # Pick up edits to the rules file; cheap when it hasn't changed
+    def reload(self):
+        with self.lock:
+            self._reload()
+
+    # A file that can't be read or isn't a list of rule objects keeps the
+    # previous rules, and is tried again on the next reload
+    def _reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self.mtime:
+            return
+        specs = []
+        if mtime is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    specs = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error reading assignment rules: {e}")
+                return
+            if not isinstance(specs, list) or not all(isinstance(spec, dict) for spec in specs):
+                print("Error reading assignment rules: expected a list of rule objects")
+                return
+        try:
+            rules = RuleSet(specs)
+        except Exception as e:
+            print(f"Error loading assignment rules: {e}")
+            return
+        self.rules = rules
+        self.mtime = mtime
+
+    def match(self, window):
+        return self.rules.match(window)
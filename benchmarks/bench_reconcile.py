@@ -0,0 +1,79 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reconcile import WindowIndex, TrackedAssignments, TreeReconciler, window_id
+
+# Window counts to benchmark, and how many windows change per tick
+WINDOW_COUNTS = [1000, 2000, 5000, 10000]
+CHANGES_PER_TICK = 10
+PROJECTS = 50
+TICKS = 200
+
+
+# Function to build synthetic window metadata, keyed by window id like scans
+def make_windows(count):
+    return [
+        {
+            "id": window_id(hwnd, 1000 + hwnd % 300, 1700000000.0 + hwnd % 300),
+            "title": f"Window {hwnd} - App {hwnd % 37}",
+            "hwnd": hwnd,
+            "pid": 1000 + hwnd % 300,
+            "process_name": f"app{hwnd % 37}.exe",
+        }
+        for hwnd in range(1, count + 1)
+    ]
+
+
+# Original approach: linear metadata lookup for every assignment
+def full_rescan(windows, assignments):
+    metadata_by_project = {}
+    for key, project in assignments.items():
+        metadata_by_project.setdefault(project, {})[key] = next(
+            (w for w in windows if w["id"] == key), {}
+        )
+    return metadata_by_project
+
+
+def bench_indexed(count, rng):
+    windows = make_windows(count)
+    index = WindowIndex(windows)
+    assignments = TrackedAssignments({w["id"]: f"Project{rng.randrange(PROJECTS)}" for w in windows})
+    reconciler = TreeReconciler()
+    reconciler.reconcile(assignments)
+    keys = list(assignments)
+
+    reconcile_time = 0.0
+    start = time.perf_counter()
+    for tick in range(TICKS):
+        for key in rng.sample(keys, CHANGES_PER_TICK):
+            assignments[key] = f"Project{rng.randrange(PROJECTS)}"
+        tick_start = time.perf_counter()
+        changes = reconciler.reconcile(assignments)
+        reconcile_time += time.perf_counter() - tick_start
+
+        # Rebuild metadata only for the projects that changed
+        for project in changes.projects():
+            {key: index.get_by_id(key) for key in reconciler.members.get(project, ())}
+    return reconcile_time / TICKS, (time.perf_counter() - start) / TICKS
+
+
+def bench_rescan(count, rng, ticks=3):
+    windows = make_windows(count)
+    assignments = {w["id"]: f"Project{rng.randrange(PROJECTS)}" for w in windows[: count // 10]}
+    start = time.perf_counter()
+    for tick in range(ticks):
+        full_rescan(windows, assignments)
+    return (time.perf_counter() - start) / ticks
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    print(f"{'windows':>8} {'reconcile ms':>13} {'indexed ms/tick':>16} {'rescan ms/tick':>15}")
+    for count in WINDOW_COUNTS:
+        reconcile, indexed = bench_indexed(count, rng)
+        rescan = bench_rescan(count, rng)
+        print(f"{count:>8} {reconcile * 1000:>13.3f} {indexed * 1000:>16.3f} {rescan * 1000:>15.1f}")
@@ -0,0 +1,540 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Run against the in-memory backend; must be set before organizer is initialized
+os.environ.setdefault("ORGANIZER_BACKEND", "synthetic")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import organizer
+from assignment_rules import RuleSet
+from chrome_session import ChromeSession
+from fake_devtools import FakeDevToolsServer
+from lazy_tree import LazyTree
+from reconcile import WindowIndex, TrackedAssignments, TreeReconciler
+from search_index import WindowSearch, HistorySearch, recency_orders
+from state_history import StateHistory
+from time_tracking import ActivityLog, ActivitySampler
+from ui_queue import UIQueue
+from window_backends import SyntheticBackend
+from window_events import WindowEvent, CREATED, RETITLED
+
+organizer.init()
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+WINDOW_COUNTS = [10, 100, 1000, 10000]
+TAB_COUNTS = [10, 100, 1000]
+PROJECT_COUNTS = [10, 100, 500]
+
+# A result is flagged when its p50 is this much slower than the baseline
+REGRESSION_THRESHOLD = 1.25
+
+
+# Minimal stand-in for ttk.Treeview so the views can run without a display
+class FakeTreeview:
+    def __init__(self):
+        self.items = {"": None}
+        self.counter = 0
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def focus(self):
+        return ""
+
+    def exists(self, iid):
+        return iid in self.items
+
+    def parent(self, iid):
+        return self.items[iid]
+
+    def insert(self, parent, index, iid=None, **options):
+        if iid is None:
+            self.counter += 1
+            iid = f"I{self.counter:06d}"
+        self.items[iid] = parent
+        return iid
+
+    def delete(self, iid):
+        for child in [child for child, parent in self.items.items() if parent == iid]:
+            self.delete(child)
+        self.items.pop(iid, None)
+
+    def move(self, iid, parent, index):
+        self.items[iid] = parent
+
+    def item(self, iid, **options):
+        pass
+
+
+# Point the organizer at a fresh synthetic desktop and a scratch projects folder
+def reset_environment(window_count, projects_path):
+    organizer.backend = SyntheticBackend(count=window_count)
+    organizer.metadata_cache.clear()
+    organizer.PROJECTS_PATH = projects_path
+    organizer.TOP_ASSIGNMENTS_FILE = os.path.join(projects_path, "top_assignments.json")
+    organizer.LEGACY_TOP_ASSIGNMENTS_FILE = organizer.TOP_ASSIGNMENTS_FILE
+    organizer.json_store = organizer.JsonStore(delay=0, compact=organizer.COMPACT_JSON)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+# Time function() repeat times (after setup(), if given), then run it once
+# more under tracemalloc for allocation figures
+def measure(function, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    function()
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": statistics.median(samples) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "runs": repeat,
+        "alloc_peak_kb": peak / 1024,
+    }
+
+
+def bench_scan(window_count, repeat, scratch):
+    reset_environment(window_count, scratch)
+    # Cold: nothing cached yet
+    cold = measure(lambda: organizer.get_open_windows(), 1, setup=organizer.metadata_cache.clear)
+    # Warm: steady state with process info cached
+    warm = measure(lambda: organizer.get_open_windows(), repeat)
+    return {"cold": cold, "warm": warm}
+
+
+# Startup with a third of the windows saved as assigned and nothing cached:
+# until both trees are filled in, and until the slow probes have been applied
+def bench_startup(window_count, repeat, scratch):
+    reset_environment(window_count, scratch)
+    saved = {window["id"]: f"Project{position % 20}" for position, window in enumerate(organizer.get_open_windows(probe=False)) if position % 3 == 0}
+    with open(organizer.TOP_ASSIGNMENTS_FILE, "w", encoding="utf-8") as f:
+        json.dump(saved, f)
+
+    def start():
+        ui = UIQueue()
+        views = (LazyTree(FakeTreeview(), ui), LazyTree(FakeTreeview(), ui, max_rows=organizer.MAX_NEW_WINDOW_ROWS))
+        state = (TrackedAssignments(), {}, {}, WindowIndex(), TreeReconciler())
+        windows = organizer.initial_sync(*views, *state)
+        ui.drain()
+        return views, state, windows
+
+    def start_and_probe():
+        views, state, windows = start()
+        probed = organizer.probe_expensive_fields([dict(window) for window in windows])
+        for window in probed:
+            state[3].add(window)
+        organizer.sync_window_changes(*views, *state, [], [], probed)
+
+    first_view = measure(lambda: start(), repeat, setup=organizer.metadata_cache.clear)
+    full = measure(start_and_probe, repeat, setup=organizer.metadata_cache.clear)
+    return {"first_view": first_view, "full": full}
+
+
+def bench_update_tick(window_count, repeat, scratch, changes=10, metrics=True):
+    reset_environment(window_count, scratch)
+    organizer.metrics.enabled = metrics
+    ui = UIQueue()
+    assigned_view = LazyTree(FakeTreeview(), ui)
+    new_windows_view = LazyTree(FakeTreeview(), ui, max_rows=organizer.MAX_NEW_WINDOW_ROWS)
+    index = WindowIndex(organizer.get_open_windows())
+    assignments = TrackedAssignments()
+    last_assignments, new_assignments = {}, {}
+    reconciler = TreeReconciler()
+    for position, window in enumerate(list(index.values())):
+        if position % 3 == 0:
+            assignments[window["id"]] = f"Project{position % 20}"
+    organizer.sync_window_changes(assigned_view, new_windows_view, assignments, last_assignments, new_assignments,
+                            index, reconciler, list(index.values()), [], [])
+    ui.drain()
+
+    backend = organizer.backend
+    handles = list(backend.windows)
+    state = {"position": 0, "ui_ops": 0}
+
+    # One tick: a few windows retitled and one new window, as events would report
+    def tick():
+        deltas = []
+        for offset in range(changes):
+            handle = handles[(state["position"] + offset) % len(handles)]
+            backend.retitle_window(handle, f"Edited {state['position']} {offset}")
+            deltas.append(WindowEvent(RETITLED, handle))
+        handle = backend.create_window()
+        handles.append(handle)
+        deltas.append(WindowEvent(CREATED, handle))
+        state["position"] += changes
+
+        added, removed, updated = organizer.apply_window_deltas(index, deltas)
+        organizer.sync_window_changes(assigned_view, new_windows_view, assignments, last_assignments, new_assignments,
+                                index, reconciler, added, removed, updated)
+        state["ui_ops"] += ui.pending()
+        ui.drain()
+
+    state["ui_ops"] = 0
+    try:
+        result = measure(tick, repeat)
+    finally:
+        organizer.metrics.enabled = True
+    # Treeview operations queued per tick, i.e. how much the tree churns
+    result["ui_ops"] = state["ui_ops"] / (repeat + 1)
+    return result
+
+
+def bench_persistence(project_count, repeat, scratch, windows_per_project=10):
+    reset_environment(10, scratch)
+    programs = {
+        f"Project{project}": {
+            f"Window {project}-{window}": {"title": f"Window {project}-{window}", "pid": window, "rect": [0, 0, 800, 600]}
+            for window in range(windows_per_project)
+        }
+        for project in range(project_count)
+    }
+    assignments = {title: project for project, windows in programs.items() for title in windows}
+    state = {"round": 0}
+
+    def save_all(change):
+        if change:
+            state["round"] += 1
+            first = next(iter(programs))
+            programs[first]["Window 0-0"]["rect"] = [state["round"], 0, 800, 600]
+        organizer.save_top_assignments(assignments)
+        for project, metadata in programs.items():
+            organizer.save_project_programs(project, metadata)
+        organizer.json_store.flush()
+
+    save_all(False)
+    before = organizer.json_store.stats()["bytes_written"]
+    changed = measure(lambda: save_all(True), repeat)
+    changed["bytes_written"] = (organizer.json_store.stats()["bytes_written"] - before) // (repeat + 1)
+    before = organizer.json_store.stats()["bytes_written"]
+    idle = measure(lambda: save_all(False), repeat)
+    idle["bytes_written"] = (organizer.json_store.stats()["bytes_written"] - before) // (repeat + 1)
+    return {"one_change": changed, "idle": idle}
+
+
+def bench_chrome_lookup(tab_count, repeat):
+    with FakeDevToolsServer() as server:
+        titles = [f"Tab {number}" for number in range(tab_count)]
+        for number, title in enumerate(titles):
+            server.add_target(title, f"https://example.com/{number}")
+        session = ChromeSession(url=server.url)
+        connect = measure(lambda: (session.close(), session.connect()), max(1, repeat // 10))
+        window_titles = [f"{title} - Google Chrome" for title in titles[:: max(1, tab_count // 100)]]
+        lookup = measure(lambda: [session.url_for_window(title) for title in window_titles], repeat)
+        lookup["lookups"] = len(window_titles)
+        session.close()
+    return {"connect": connect, "lookup": lookup}
+
+
+# Make a project folder that is a git repo with a local bare repo as origin
+def make_git_project(scratch, name, remote):
+    project_path = os.path.join(scratch, name)
+    os.makedirs(os.path.join(project_path, "Savedstates", "LastState"), exist_ok=True)
+    run = lambda *args: subprocess.run(["git", "-C", project_path, *args], check=True, capture_output=True)
+    run("init", "-q", "-b", "master")
+    run("config", "user.email", "bench@example.com")
+    run("config", "user.name", "bench")
+    run("remote", "add", "origin", remote)
+    with open(os.path.join(project_path, "notes.txt"), "w") as f:
+        f.write("start\n")
+    run("add", ".")
+    run("commit", "-q", "-m", "init")
+    run("push", "-q", "--set-upstream", "origin", "master")
+    return project_path
+
+
+def bench_close_project(repeat, scratch, windows_per_project=20, project_count=1):
+    reset_environment(200, scratch)
+    names = [f"BenchProject{number}" for number in range(project_count)]
+    project_paths = []
+    for name in names:
+        # Each project pushes to its own local bare repo
+        remote = os.path.join(scratch, f"{name}.git")
+        subprocess.run(["git", "init", "-q", "--bare", remote], check=True)
+        project_paths.append(make_git_project(scratch, name, remote))
+    ui = UIQueue()
+    view = LazyTree(FakeTreeview(), ui)
+    state = {"assignments": {}}
+
+    def setup():
+        # Open a fresh set of windows for each project and touch a file
+        state["assignments"] = {}
+        for name, project_path in zip(names, project_paths):
+            handles = [organizer.backend.create_window() for _ in range(windows_per_project)]
+            windows = [organizer.get_window_metadata(handle, organizer.backend.get_title(handle)) for handle in handles]
+            state["assignments"].update({window["id"]: name for window in windows})
+            organizer.save_project_programs(name, {window["id"]: window for window in windows})
+            with open(os.path.join(project_path, "notes.txt"), "a") as f:
+                f.write(f"{time.time()}\n")
+            view.insert("", name, text=name)
+        ui.drain()
+
+    # Close every project and wait for the background pipeline to finish
+    def close_all():
+        futures = [organizer.close_active_project(name, state["assignments"], view) for name in names]
+        for future in futures:
+            future.result()
+        ui.drain()
+
+    return measure(close_all, repeat, setup=setup)
+
+
+def bench_git_sync(repeat, scratch, files=2000):
+    remote = os.path.join(scratch, "remote.git")
+    subprocess.run(["git", "init", "-q", "--bare", remote], check=True)
+    project_path = make_git_project(scratch, "SyncProject", remote)
+    # A folder with a realistic number of tracked files
+    for number in range(files):
+        with open(os.path.join(project_path, f"file{number}.txt"), "w") as f:
+            f.write(f"{number}\n")
+    sync = organizer.GitSync()
+    sync.sync(project_path)
+
+    def touch():
+        with open(os.path.join(project_path, "notes.txt"), "a") as f:
+            f.write(f"{time.time()}\n")
+
+    clean = measure(lambda: sync.sync(project_path), repeat)
+    changed = measure(lambda: sync.sync(project_path), max(3, repeat // 4), setup=touch)
+    return {"clean": clean, "one_change": changed}
+
+
+def bench_state_history(history_length, repeat, scratch, windows=50):
+    history = StateHistory(os.path.join(scratch, "Savedstates"), max_states=None)
+    state = {f"Window {number}": {"title": f"Window {number}", "rect": [0, 0, 800, 600]} for number in range(windows)}
+    for number in range(history_length):
+        state[f"Window {number % windows}"]["rect"] = [number, 0, 800, 600]
+        history.snapshot(state)
+    counter = {"round": 0}
+
+    def snapshot():
+        counter["round"] += 1
+        state["Window 0"]["rect"] = [-counter["round"], 0, 800, 600]
+        history.snapshot(state)
+
+    result = measure(snapshot, repeat)
+    result["bytes_written"] = history.disk_usage() // max(1, len(history))
+    restore = measure(lambda: history.restore_latest(), repeat)
+    return {"snapshot": result, "restore": restore}
+
+
+def bench_restore(repeat, scratch, window_count=30):
+    reset_environment(0, scratch)
+    apps = SyntheticBackend.APPS
+    programs = {}
+    for number in range(window_count):
+        process_name, exe_path, _, title_format = apps[number % len(apps)]
+        title = title_format.format(f"Saved {number}")
+        programs[title] = {
+            "title": title,
+            "process_name": process_name,
+            "exe_path": exe_path,
+            "rect": [number * 10, number * 10, 800, 600],
+            "chrome_url": f"https://example.com/{number}" if process_name == "chrome.exe" else None,
+        }
+    organizer.save_project_programs("RestoreProject", programs)
+    organizer.json_store.flush()
+    organizer.chrome_session = ChromeSession(url="http://127.0.0.1:9")
+
+    def setup():
+        organizer.backend = SyntheticBackend(count=0, launch_delay=0.05)
+
+    results = []
+
+    def restore():
+        results.append(organizer.restore_project("RestoreProject", {}))
+
+    result = measure(restore, repeat, setup=setup)
+    result["placed"] = len(results[-1]["placed"])
+    return result
+
+
+# A log of days of sampled activity (one sample a second over an 8 hour
+# day, switching window every couple of minutes), then queries over it
+def bench_activity(day_count, repeat, scratch, switch_every=120):
+    log = ActivityLog(scratch)
+    backend = SyntheticBackend(count=200)
+    handles = [handle for handle, _ in backend.list_windows()]
+    state = {"position": 0}
+    sampler = ActivitySampler(log, backend, lambda handle: (f"Project{handle % 20}", f"app{handle % 7}.exe"))
+    day_start = time.time() - day_count * 86400
+    for day in range(day_count):
+        start = day_start + day * 86400
+        for second in range(8 * 3600):
+            if second % switch_every == 0:
+                backend.focus_window(handles[state["position"] % len(handles)])
+                state["position"] += 1
+            sampler.sample(start + second)
+        sampler.flush()
+
+    cold = measure(lambda: ActivityLog(scratch).totals("project"), repeat)
+    cold["disk_kb"] = log.disk_usage() / 1024
+    warm = measure(lambda: log.totals(("project", "app")), repeat)
+    return {"cold": cold, "warm": warm}
+
+
+# Filter-box latency: one search per keystroke of a typed query, over live
+# windows and over a history of saved windows spread across projects
+def bench_search(window_count, history_count, repeat, scratch, projects=150):
+    reset_environment(window_count, scratch)
+    windows = organizer.get_open_windows()
+    live = WindowSearch()
+    live.apply(windows, [], [])
+
+    history = HistorySearch(scratch, os.path.join(scratch, "history_search.json"))
+    for number in range(history_count):
+        window = windows[number % len(windows)]
+        history.add_entry(f"Project{number % projects}", dict(window, title=f"{window['title']} rev {number}"), 1.7e9 + number)
+    history.recent, history.by_project, history.project_docs = recency_orders(history.entries)
+
+    query = "document 6553"
+    keystrokes = [query[:length] for length in range(1, len(query) + 1)]
+
+    def type_query():
+        for text in keystrokes:
+            live.search(text)
+            history.search(text)
+            if len(text) >= organizer.HISTORY_MIN_QUERY:
+                history.projects_for(text)
+
+    result = measure(type_query, repeat)
+    # Per keystroke rather than per query
+    for key in ("p50_ms", "p99_ms"):
+        result[key] /= len(keystrokes)
+    return result
+
+
+def bench_rules(rule_count, repeat, window_count=500):
+    backend = SyntheticBackend(count=window_count)
+    windows = []
+    for handle, title in backend.list_windows():
+        process_name, exe_path = backend.get_process_info(backend.get_pid(handle))
+        windows.append({"title": title, "process_name": process_name, "exe_path": exe_path,
+                        "chrome_url": f"https://site{handle % 97}.example.com/" if process_name == "chrome.exe" else None,
+                        "vscode_workspace": None})
+    kinds = [
+        lambda number: {"project": f"P{number}", "title": rf"Document {number}\b"},
+        lambda number: {"project": f"P{number}", "url_host": f"site{number}.example.com"},
+        lambda number: {"project": f"P{number}", "process_name": "Code.exe", "workspace": f"repo{number}"},
+        lambda number: {"project": f"P{number}", "exe_path": f"C:\\apps\\app{number}.exe", "title": "Report"},
+    ]
+    rules = RuleSet([kinds[number % len(kinds)](number) for number in range(rule_count)])
+    result = measure(lambda: [rules.match(window) for window in windows], repeat)
+    result["windows"] = len(windows)
+    return result
+
+
+def run_all(quick):
+    windows = WINDOW_COUNTS[:3] if quick else WINDOW_COUNTS
+    tabs = TAB_COUNTS[:2] if quick else TAB_COUNTS
+    projects = PROJECT_COUNTS[:2] if quick else PROJECT_COUNTS
+    repeat = 5 if quick else 20
+    results = {}
+    scratch_root = tempfile.mkdtemp(prefix="organizer-bench-")
+    try:
+        def scratch(name):
+            path = os.path.join(scratch_root, name)
+            os.makedirs(path, exist_ok=True)
+            return path
+
+        for count in windows:
+            scan = bench_scan(count, repeat, scratch(f"scan{count}"))
+            results[f"scan/cold/{count}"] = scan["cold"]
+            results[f"scan/warm/{count}"] = scan["warm"]
+            startup = bench_startup(count, repeat, scratch(f"startup{count}"))
+            results[f"startup/first_view/{count}"] = startup["first_view"]
+            results[f"startup/full/{count}"] = startup["full"]
+            results[f"update_tick/{count}"] = bench_update_tick(count, repeat, scratch(f"tick{count}"))
+            results[f"update_tick/no_metrics/{count}"] = bench_update_tick(count, repeat, scratch(f"tick_off{count}"), metrics=False)
+            results[f"rules/{count * 10}x500"] = bench_rules(count * 10, repeat)
+        for count in tabs:
+            chrome = bench_chrome_lookup(count, repeat)
+            results[f"chrome/connect/{count}"] = chrome["connect"]
+            results[f"chrome/lookup/{count}"] = chrome["lookup"]
+        for count in projects:
+            persistence = bench_persistence(count, repeat, scratch(f"save{count}"))
+            results[f"save/one_change/{count}"] = persistence["one_change"]
+            results[f"save/idle/{count}"] = persistence["idle"]
+        for count in projects:
+            history = bench_state_history(count * 10, repeat, scratch(f"history{count}"))
+            results[f"history/snapshot/{count * 10}"] = history["snapshot"]
+            results[f"history/restore/{count * 10}"] = history["restore"]
+        activity_days = 7 if quick else 90
+        activity = bench_activity(activity_days, repeat, scratch("activity"))
+        results[f"activity/query_cold/{activity_days}d"] = activity["cold"]
+        results[f"activity/query_warm/{activity_days}d"] = activity["warm"]
+        search_windows, search_history = (1000, 10000) if quick else (10000, 100000)
+        results[f"search/keystroke/{search_windows}+{search_history}"] = bench_search(search_windows, search_history, repeat, scratch("search"))
+        git = bench_git_sync(repeat, scratch("git"))
+        results["git/sync_clean"] = git["clean"]
+        results["git/sync_one_change"] = git["one_change"]
+        results["restore/30"] = bench_restore(3, scratch("restore"))
+        results["close_project"] = bench_close_project(max(3, repeat // 4), scratch("close"))
+        results["close_project/x4"] = bench_close_project(max(3, repeat // 4), scratch("close4"), project_count=4)
+    finally:
+        shutil.rmtree(scratch_root, ignore_errors=True)
+    return results
+
+
+def print_results(results, baseline=None):
+    print(f"{'benchmark':<28} {'p50 ms':>10} {'p99 ms':>10} {'peak KB':>10} {'bytes':>10} {'ui ops':>7} {'vs base':>9}")
+    regressions = []
+    for name, result in results.items():
+        ratio = ""
+        if baseline and name in baseline and baseline[name]["p50_ms"] > 0:
+            change = result["p50_ms"] / baseline[name]["p50_ms"]
+            ratio = f"{change:.2f}x"
+            if change > REGRESSION_THRESHOLD:
+                regressions.append(name)
+                ratio += " !"
+        print(f"{name:<28} {result['p50_ms']:>10.3f} {result['p99_ms']:>10.3f} "
+              f"{result['alloc_peak_kb']:>10.1f} {result.get('bytes_written', ''):>10} {result.get('ui_ops', ''):>7} {ratio:>9}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the organizer's scan, update, save and close paths")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer runs")
+    parser.add_argument("--save-baseline", action="store_true", help=f"write results to {BASELINE_FILE}")
+    parser.add_argument("--compare", action="store_true", help="compare against the saved baseline")
+    args = parser.parse_args()
+
+    results = run_all(args.quick)
+    baseline = None
+    if args.compare:
+        try:
+            with open(BASELINE_FILE) as f:
+                baseline = json.load(f)
+        except OSError as e:
+            print(f"Error reading baseline: {e}")
+    regressions = print_results(results, baseline)
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"Baseline saved to {BASELINE_FILE}")
+    if regressions:
+        print(f"Regressions over {REGRESSION_THRESHOLD:.2f}x: {', '.join(regressions)}")
+        sys.exit(1)
@@ -0,0 +1,148 @@
+import threading
+import time
+
+from pychrome import Browser, Tab
+
+# Chrome remote debugging endpoint
+DEVTOOLS_URL = "http://127.0.0.1:9222"
+
+# Chrome appends this to the active tab's title to form the window title
+CHROME_TITLE_SUFFIX = " - Google Chrome"
+
+# Minimum time between reconnect attempts when Chrome isn't reachable
+RECONNECT_INTERVAL = 5.0
+
+
+# Long-lived DevTools session that keeps an in-memory index of page targets,
+# updated from Target.* events instead of polling /json on every scan
+class ChromeSession:
+    def __init__(self, url=DEVTOOLS_URL, reconnect_interval=RECONNECT_INTERVAL, timeout=2):
+        self.url = url
+        self.reconnect_interval = reconnect_interval
+        self.timeout = timeout
+        self.tab = None
+        self.last_attempt = None
+        self.last_error = None
+        self.lock = threading.RLock()
+        self.targets = {}
+        self.ids_by_title = {}
+
+    # Whether the browser-level websocket is up
+    def connected(self):
+        tab = self.tab
+        return tab is not None and tab.status == Tab.status_started and not tab._stopped.is_set()
+
+    # Connect if needed, at most once per reconnect interval
+    def ensure_connected(self):
+        if self.connected():
+            return True
+        now = time.monotonic()
+        if self.last_attempt is not None and now - self.last_attempt < self.reconnect_interval:
+            return False
+        self.last_attempt = now
+        try:
+            self.connect()
+            self.last_error = None
+            return True
+        except Exception as e:
+            # Chrome usually just isn't running with remote debugging, so
+            # only report when the reason changes
+            if str(e) != self.last_error:
+                print(f"Error connecting to Chrome DevTools at {self.url}: {e}")
+                self.last_error = str(e)
+            self.close()
+            return False
+
+    def connect(self):
+        self.close()
+        version = Browser(url=self.url).version(timeout=self.timeout)
+        tab = Tab(id="browser", type="browser", webSocketDebuggerUrl=version["webSocketDebuggerUrl"])
+        tab.start()
+        tab.Target.targetCreated = self._on_target_created
+        tab.Target.targetInfoChanged = self._on_target_info_changed
+        tab.Target.targetDestroyed = self._on_target_destroyed
+        self.tab = tab
+
+        # Seed the index, then let discovery events keep it current
+        result = tab.Target.getTargets(_timeout=self.timeout)
+        with self.lock:
+            self.targets.clear()
+            self.ids_by_title.clear()
+            for info in result.get("targetInfos", []):
+                self._index(info)
+        tab.Target.setDiscoverTargets(discover=True, _timeout=self.timeout)
+
+    def close(self):
+        tab, self.tab = self.tab, None
+        if tab is not None:
+            try:
+                tab.stop()
+            except Exception:
+                pass
+
+    def _index(self, info):
+        if info.get("type") != "page":
+            return
+        target_id = info["targetId"]
+        self._unindex(target_id)
+        target = {"id": target_id, "title": info.get("title", ""), "url": info.get("url", "")}
+        self.targets[target_id] = target
+        self.ids_by_title.setdefault(target["title"], {})[target_id] = None
+
+    def _unindex(self, target_id):
+        old = self.targets.pop(target_id, None)
+        if old is not None:
+            ids = self.ids_by_title.get(old["title"])
+            if ids is not None:
+                ids.pop(target_id, None)
+                if not ids:
+                    del self.ids_by_title[old["title"]]
+
+    def _on_target_created(self, targetInfo, **kwargs):
+        with self.lock:
+            self._index(targetInfo)
+
+    def _on_target_info_changed(self, targetInfo, **kwargs):
+        with self.lock:
+            self._index(targetInfo)
+
+    def _on_target_destroyed(self, targetId, **kwargs):
+        with self.lock:
+            self._unindex(targetId)
+
+    # Snapshot of the page targets as {id: {"id", "title", "url"}}
+    def tabs(self):
+        self.ensure_connected()
+        with self.lock:
+            return {target_id: dict(target) for target_id, target in self.targets.items()}
+
+    # Open URLs as tabs of one new window over the existing session.
+    # Returns the new target ids, or None if Chrome isn't reachable.
+    def open_urls(self, urls):
+        if not self.ensure_connected():
+            return None
+        target_ids = []
+        for number, url in enumerate(urls):
+            result = self.tab.Target.createTarget(url=url, newWindow=number == 0, _timeout=self.timeout)
+            target_ids.append(result.get("targetId"))
+        return target_ids
+
+    # URL of the most recently seen tab with exactly this title
+    def url_for_title(self, title):
+        with self.lock:
+            ids = self.ids_by_title.get(title)
+            if not ids:
+                return None
+            return self.targets[next(reversed(ids))]["url"]
+
+    # URL of the active tab of a Chrome window, given the window title
+    def url_for_window(self, window_title):
+        self.ensure_connected()
+        title = window_title
+        index = title.rfind(CHROME_TITLE_SUFFIX)
+        if index != -1:
+            title = title[:index]
+        url = self.url_for_title(title)
+        if url is None and title != window_title:
+            url = self.url_for_title(window_title)
+        return url
@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Projects that can be closing at once; further closes queue behind them
+MAX_CONCURRENT_CLOSES = 2
+
+# Statuses passed to the progress callback for each stage
+STARTED = "started"
+DONE = "done"
+FAILED = "failed"
+
+# Name of the stage reported once the whole close has finished
+FINISHED = "finished"
+
+
+# Runs project closes in the background as a sequence of stages, with one
+# side stage (typically closing windows) running alongside the sequence.
+# Every stage runs even if an earlier one failed, as the old blocking close
+# did; failures are reported and collected rather than raised.
+class ClosePipeline:
+    def __init__(self, max_concurrent=MAX_CONCURRENT_CLOSES, on_progress=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="close")
+        self.side_executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="close-side")
+        self.on_progress = on_progress
+        self.lock = threading.Lock()
+        self.jobs = {}
+
+    # Whether a close for this project is queued or running
+    def running(self, project):
+        with self.lock:
+            return project in self.jobs
+
+    # Queue a close. stages is a list of (name, function) run in order,
+    # side is an optional (name, function) run concurrently with them, and
+    # final is an optional function run last, after both. Returns a future
+    # whose result is {stage name: exception or None}. A project already
+    # being closed isn't queued twice; its existing future is returned.
+    def submit(self, project, stages, side=None, final=None):
+        with self.lock:
+            future = self.jobs.get(project)
+            if future is not None:
+                return future
+            future = self.executor.submit(self._run, project, stages, side, final)
+            self.jobs[project] = future
+        future.add_done_callback(lambda done: self._finished(project, done))
+        return future
+
+    def _finished(self, project, future):
+        with self.lock:
+            if self.jobs.get(project) is future:
+                del self.jobs[project]
+
+    def _report(self, project, stage, status, error=None):
+        if self.on_progress is None:
+            return
+        try:
+            self.on_progress(project, stage, status, error)
+        except Exception as e:
+            print(f"Error reporting close progress for {project}: {e}")
+
+    def _stage(self, project, name, function):
+        self._report(project, name, STARTED)
+        try:
+            function()
+        except Exception as e:
+            print(f"Error in {name} while closing {project}: {e}")
+            self._report(project, name, FAILED, e)
+            return e
+        self._report(project, name, DONE)
+        return None
+
+    def _run(self, project, stages, side, final):
+        results = {}
+        side_future = None
+        if side is not None:
+            side_future = self.side_executor.submit(self._stage, project, *side)
+
+        for name, function in stages:
+            results[name] = self._stage(project, name, function)
+
+        if side_future is not None:
+            wait([side_future])
+            results[side[0]] = side_future.result()
+
+        if final is not None:
+            results[FINISHED] = self._stage(project, FINISHED, final)
+        return results
+
+    # Block until every queued close has finished
+    def join(self):
+        with self.lock:
+            futures = list(self.jobs.values())
+        wait(futures)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+        self.side_executor.shutdown(wait=wait)
@@ -0,0 +1,226 @@
+import base64
+import hashlib
+import itertools
+import json
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Magic value from RFC 6455 used to compute Sec-WebSocket-Accept
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+# Minimal server-side websocket connection (text frames, ping and close only)
+class WebSocketConnection:
+    def __init__(self, rfile, wfile):
+        self.rfile = rfile
+        self.wfile = wfile
+        self.lock = threading.Lock()
+        self.discovering = False
+
+    def _read_exact(self, size):
+        data = self.rfile.read(size)
+        if len(data) < size:
+            raise ConnectionError("websocket closed")
+        return data
+
+    # Return the next text message, or None once the client closes
+    def receive(self):
+        while True:
+            first, second = self._read_exact(2)
+            opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", self._read_exact(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", self._read_exact(8))[0]
+            mask = self._read_exact(4) if second & 0x80 else None
+            payload = self._read_exact(length)
+            if mask:
+                payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                self._send_frame(0xA, payload)
+                continue
+            if opcode == 0x1:
+                return payload.decode("utf-8")
+
+    def _send_frame(self, opcode, payload):
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 1 << 16:
+            header += bytes([126]) + struct.pack("!H", len(payload))
+        else:
+            header += bytes([127]) + struct.pack("!Q", len(payload))
+        with self.lock:
+            self.wfile.write(header + payload)
+            self.wfile.flush()
+
+    def send(self, message):
+        self._send_frame(0x1, json.dumps(message).encode("utf-8"))
+
+
+# Offline stand-in for Chrome's remote debugging endpoint. Serves /json,
+# /json/version and a browser websocket that understands the Target domain
+# methods the organizer uses, and emits Target.* events as targets change.
+class FakeDevToolsServer:
+    def __init__(self, host="127.0.0.1", port=0):
+        self.lock = threading.Lock()
+        self.targets = {}
+        self.connections = []
+        self.ids = itertools.count(1)
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _broadcast(self, method, params):
+        with self.lock:
+            connections = [connection for connection in self.connections if connection.discovering]
+        for connection in connections:
+            try:
+                connection.send({"method": method, "params": params})
+            except Exception:
+                pass
+
+    def add_target(self, title, url, target_type="page"):
+        target_id = f"TARGET{next(self.ids)}"
+        info = {"targetId": target_id, "type": target_type, "title": title, "url": url, "attached": False}
+        with self.lock:
+            self.targets[target_id] = info
+        self._broadcast("Target.targetCreated", {"targetInfo": dict(info)})
+        return target_id
+
+    def update_target(self, target_id, title=None, url=None):
+        with self.lock:
+            info = self.targets[target_id]
+            if title is not None:
+                info["title"] = title
+            if url is not None:
+                info["url"] = url
+            info = dict(info)
+        self._broadcast("Target.targetInfoChanged", {"targetInfo": info})
+
+    def remove_target(self, target_id):
+        with self.lock:
+            self.targets.pop(target_id, None)
+        self._broadcast("Target.targetDestroyed", {"targetId": target_id})
+
+    # Handle one DevTools protocol call, returning (result, error)
+    def _call(self, connection, method, params):
+        if method == "Target.getTargets":
+            with self.lock:
+                return {"targetInfos": [dict(info) for info in self.targets.values()]}, None
+        if method == "Target.setDiscoverTargets":
+            connection.discovering = bool(params.get("discover"))
+            return {}, None
+        if method == "Target.createTarget":
+            return {"targetId": self.add_target("", params.get("url", "about:blank"))}, None
+        if method == "Target.closeTarget":
+            self.remove_target(params.get("targetId"))
+            return {"success": True}, None
+        return None, {"code": -32601, "message": f"'{method}' wasn't found"}
+
+    def _serve_websocket(self, connection):
+        with self.lock:
+            self.connections.append(connection)
+        try:
+            while True:
+                message = connection.receive()
+                if message is None:
+                    break
+                request = json.loads(message)
+                discovering = connection.discovering
+                result, error = self._call(connection, request.get("method"), request.get("params") or {})
+                reply = {"id": request.get("id")}
+                if error is not None:
+                    reply["error"] = error
+                else:
+                    reply["result"] = result
+                connection.send(reply)
+
+                # Like Chrome, announce existing targets once discovery is enabled
+                if connection.discovering and not discovering:
+                    with self.lock:
+                        infos = [dict(info) for info in self.targets.values()]
+                    for info in infos:
+                        connection.send({"method": "Target.targetCreated", "params": {"targetInfo": info}})
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            with self.lock:
+                self.connections.remove(connection)
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                host, port = fake.server.server_address[:2]
+                if self.path.startswith("/devtools/") and self.headers.get("Upgrade", "").lower() == "websocket":
+                    key = self.headers["Sec-WebSocket-Key"]
+                    accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+                    self.send_response(101, "Switching Protocols")
+                    self.send_header("Upgrade", "websocket")
+                    self.send_header("Connection", "Upgrade")
+                    self.send_header("Sec-WebSocket-Accept", accept)
+                    self.end_headers()
+                    self.close_connection = True
+                    fake._serve_websocket(WebSocketConnection(self.rfile, self.wfile))
+                elif self.path == "/json/version":
+                    self._send_json({
+                        "Browser": "FakeChrome/1.0",
+                        "Protocol-Version": "1.3",
+                        "webSocketDebuggerUrl": f"ws://{host}:{port}/devtools/browser/fake",
+                    })
+                elif self.path in ("/json", "/json/list"):
+                    with fake.lock:
+                        infos = [dict(info) for info in fake.targets.values()]
+                    self._send_json([
+                        {
+                            "id": info["targetId"],
+                            "type": info["type"],
+                            "title": info["title"],
+                            "url": info["url"],
+                            "webSocketDebuggerUrl": f"ws://{host}:{port}/devtools/page/{info['targetId']}",
+                        }
+                        for info in infos
+                    ])
+                else:
+                    self.send_error(404)
+
+        return Handler
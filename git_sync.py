@@ -0,0 +1,169 @@
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Repositories synced at once within a batch
+MAX_CONCURRENT_SYNCS = 4
+
+# Remote and branch used when a repository has no upstream configured yet
+DEFAULT_REMOTE = "origin"
+DEFAULT_BRANCH = "master"
+
+# Commit message used for changes picked up on close
+COMMIT_MESSAGE = "Project closed"
+
+# Options passed to every git call: treat paths literally, and let status
+# reuse its untracked-file cache instead of rescanning the whole folder
+GIT_OPTIONS = ["--literal-pathspecs", "-c", "core.untrackedCache=true"]
+
+
+class GitError(Exception):
+    pass
+
+
+def run_git(path, *args, input=None):
+    result = subprocess.run(["git", *GIT_OPTIONS, "-C", path, *args], input=input, capture_output=True)
+    if result.returncode != 0:
+        message = result.stderr.decode("utf-8", "replace").strip() or result.stdout.decode("utf-8", "replace").strip()
+        raise GitError(f"git {args[0]} failed in {path}: {message}")
+    return result.stdout
+
+
+# State of a working tree from one `git status --porcelain=v2 --branch` call
+class RepoStatus:
+    def __init__(self):
+        self.branch = None
+        self.upstream = None
+        self.ahead = 0
+        self.changed = []
+
+    @property
+    def clean(self):
+        return not self.changed
+
+
+def parse_status(output):
+    status = RepoStatus()
+    fields = output.decode("utf-8", "surrogateescape").split("\0")
+    position = 0
+    while position < len(fields):
+        entry = fields[position]
+        position += 1
+        if not entry:
+            continue
+        if entry.startswith("# branch.head "):
+            head = entry[len("# branch.head "):]
+            status.branch = None if head == "(detached)" else head
+        elif entry.startswith("# branch.upstream "):
+            status.upstream = entry[len("# branch.upstream "):]
+        elif entry.startswith("# branch.ab "):
+            ahead = entry.split()[2]
+            status.ahead = int(ahead.lstrip("+"))
+        elif entry.startswith("1 "):
+            status.changed.append(entry.split(" ", 8)[8])
+        elif entry.startswith("2 "):
+            # Renames carry the original path as the next field
+            status.changed.append(entry.split(" ", 9)[9])
+            status.changed.append(fields[position])
+            position += 1
+        elif entry.startswith("u "):
+            status.changed.append(entry.split(" ", 10)[10])
+        elif entry.startswith("? "):
+            status.changed.append(entry[2:])
+    return status
+
+
+# Commits and pushes project folders, doing only the work that's needed: a
+# clean, up-to-date repository costs one `git status`, only changed paths
+# are staged, and each repository is pushed at most once per sync.
+# Upstream configuration is remembered so later pushes don't probe for it.
+class GitSync:
+    def __init__(self, max_concurrent=MAX_CONCURRENT_SYNCS, message=COMMIT_MESSAGE):
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="git-sync")
+        self.message = message
+        self.lock = threading.Lock()
+        self.upstreams = {}
+        self.queued = {}
+        self.batch_thread = None
+        self.syncs = 0
+        self.skipped = 0
+        self.pushes = 0
+
+    def status(self, path):
+        return parse_status(run_git(path, "status", "--porcelain=v2", "--branch", "-z"))
+
+    # Sync one repository. Returns {"changed": n, "committed": bool, "pushed": bool}.
+    def sync(self, path):
+        status = self.status(path)
+        with self.lock:
+            self.syncs += 1
+            if status.upstream is not None:
+                self.upstreams[path] = status.upstream
+            upstream = self.upstreams.get(path)
+        result = {"changed": len(status.changed), "committed": False, "pushed": False}
+
+        if not status.clean:
+            # Stage exactly what status reported instead of walking the tree
+            paths = "\0".join(status.changed).encode("utf-8", "surrogateescape")
+            run_git(path, "add", "-A", "--pathspec-from-file=-", "--pathspec-file-nul", input=paths)
+            run_git(path, "commit", "-q", "-m", self.message)
+            result["committed"] = True
+
+        if result["committed"] or status.ahead or upstream is None:
+            if upstream is None:
+                branch = status.branch or DEFAULT_BRANCH
+                run_git(path, "push", "-q", "--set-upstream", DEFAULT_REMOTE, branch)
+                with self.lock:
+                    self.upstreams[path] = f"{DEFAULT_REMOTE}/{branch}"
+            else:
+                run_git(path, "push", "-q")
+            result["pushed"] = True
+            with self.lock:
+                self.pushes += 1
+        else:
+            with self.lock:
+                self.skipped += 1
+        return result
+
+    # Sync several repositories concurrently; returns {path: result or exception}
+    def sync_many(self, paths):
+        futures = {path: self.executor.submit(self.sync, path) for path in dict.fromkeys(paths)}
+        results = {}
+        for path, future in futures.items():
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                results[path] = e
+        return results
+
+    # Queue a repository for the next batch and return a future for its
+    # result. Requests that arrive while a batch is running are collected
+    # into the following one, and a path queued twice is synced once.
+    def request(self, path):
+        with self.lock:
+            future = self.queued.get(path)
+            if future is None:
+                future = Future()
+                self.queued[path] = future
+            if self.batch_thread is None:
+                self.batch_thread = threading.Thread(target=self._run_batches, name="git-sync-batch", daemon=True)
+                self.batch_thread.start()
+        return future
+
+    def _run_batches(self):
+        while True:
+            with self.lock:
+                batch, self.queued = self.queued, {}
+                if not batch:
+                    self.batch_thread = None
+                    return
+            for path, result in self.sync_many(batch).items():
+                if isinstance(result, Exception):
+                    batch[path].set_exception(result)
+                else:
+                    batch[path].set_result(result)
+
+    def stats(self):
+        with self.lock:
+            return {"syncs": self.syncs, "skipped": self.skipped, "pushes": self.pushes, "upstreams": len(self.upstreams)}
+
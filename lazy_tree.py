@@ -0,0 +1,206 @@
+import threading
+from collections import OrderedDict
+
+# Suffix for the dummy child that makes a collapsed row show an expand arrow
+PLACEHOLDER_SUFFIX = "::placeholder"
+
+# iid of the summary row shown when top-level rows are capped
+OVERFLOW_IID = "::overflow"
+
+
+# Treeview model that only creates rows for windows up front. Metadata lives
+# in a side table and its child rows are created the first time a row is
+# expanded, so the widget holds one item per window instead of ten.
+class LazyTree:
+    def __init__(self, tree, ui, max_rows=None):
+        self.tree = tree
+        self.ui = ui
+        self.max_rows = max_rows
+        self.lock = threading.RLock()
+        self.metadata = {}
+        self.parents = {}
+        self.expanded = set()
+        self.child_counts = {}
+        self.visible = OrderedDict()
+        self.overflow = OrderedDict()
+        tree.bind("<<TreeviewOpen>>", self._on_open, add="+")
+
+    def __contains__(self, iid):
+        with self.lock:
+            return iid in self.parents
+
+    # Parent iid of a row, or None if the view doesn't know it
+    def parent(self, iid):
+        with self.lock:
+            return self.parents.get(iid)
+
+    def get_metadata(self, iid):
+        with self.lock:
+            return self.metadata.get(iid)
+
+    # Add a row (or move/update an existing one). Metadata children are
+    # created on first expand; options go straight to Treeview.insert.
+    def insert(self, parent, iid, metadata=None, **options):
+        with self.lock:
+            if parent == "" and iid not in self.visible and self.max_rows is not None and len(self.visible) >= self.max_rows:
+                # Metadata stays in the side table, so set_metadata keeps
+                # a hidden row current until it's promoted
+                self.overflow[iid] = options
+                self.parents[iid] = parent
+                if metadata is not None:
+                    self.metadata[iid] = metadata
+                self._update_overflow_row()
+                return
+            # A row updated in place already has its placeholder
+            had_placeholder = self.parents.get(iid) == parent and iid not in self.overflow and bool(self.metadata.get(iid))
+            self.parents[iid] = parent
+            if parent == "":
+                self.visible[iid] = None
+            if metadata is not None:
+                self.metadata[iid] = metadata
+            self.ui.insert(self.tree, parent, iid=iid, **options)
+            if iid in self.expanded:
+                self._render_children(iid)
+            elif self.metadata.get(iid) and not had_placeholder:
+                self.ui.insert(self.tree, iid, iid=iid + PLACEHOLDER_SUFFIX, text="...")
+
+    # Replace a row's metadata, refreshing its children if they're showing
+    def set_metadata(self, iid, metadata):
+        with self.lock:
+            if iid not in self.parents:
+                return
+            self.metadata[iid] = metadata
+            if iid in self.expanded:
+                self._render_children(iid)
+            elif iid not in self.overflow and metadata:
+                self.ui.insert(self.tree, iid, iid=iid + PLACEHOLDER_SUFFIX, text="...")
+
+    def delete(self, iid):
+        with self.lock:
+            self.parents.pop(iid, None)
+            self.metadata.pop(iid, None)
+            self.expanded.discard(iid)
+            self.child_counts.pop(iid, None)
+            if iid in self.overflow:
+                del self.overflow[iid]
+                self._update_overflow_row()
+                return
+            self.ui.delete(self.tree, iid)
+            was_visible = iid in self.visible
+            self.visible.pop(iid, None)
+            if was_visible and self.overflow:
+                # Promote the oldest hidden row into the freed slot
+                next_iid, options = self.overflow.popitem(last=False)
+                del self.parents[next_iid]
+                self.insert("", next_iid, self.metadata.get(next_iid), **options)
+                self._update_overflow_row()
+
+    # Remove every row
+    def clear(self):
+        with self.lock:
+            for iid in self.visible:
+                self.ui.delete(self.tree, iid)
+            self.ui.delete(self.tree, OVERFLOW_IID)
+            self.metadata.clear()
+            self.parents.clear()
+            self.expanded.clear()
+            self.child_counts.clear()
+            self.visible.clear()
+            self.overflow.clear()
+
+    def _update_overflow_row(self):
+        if self.overflow:
+            self.ui.insert(self.tree, "", iid=OVERFLOW_IID, text=f"... {len(self.overflow)} more windows")
+        else:
+            self.ui.delete(self.tree, OVERFLOW_IID)
+
+    # Queue metadata rows for an expanded item, replacing any existing ones
+    def _render_children(self, iid):
+        self.ui.delete(self.tree, iid + PLACEHOLDER_SUFFIX)
+        metadata = self.metadata.get(iid) or {}
+        for index, (key, value) in enumerate(metadata.items()):
+            self.ui.insert(self.tree, iid, iid=f"{iid}::{index}", text=f"{key}: {value}")
+        for index in range(len(metadata), self.child_counts.get(iid, 0)):
+            self.ui.delete(self.tree, f"{iid}::{index}")
+        self.child_counts[iid] = len(metadata)
+
+    def _on_open(self, event):
+        iid = self.tree.focus()
+        with self.lock:
+            if iid not in self.metadata or iid in self.expanded:
+                return
+            self.expanded.add(iid)
+            self._render_children(iid)
+        self.ui.drain()
+
+
+# The rows of a tree without a widget: the same interface as LazyTree, with
+# every change reported to publish(event) instead of drawn. The organizer
+# service keeps its trees in these; clients replay the events with
+# apply_row_event. Changes and snapshots are serialized by lock, which the
+# service shares with its event log so a snapshot matches a sequence number.
+class TreeModel:
+    def __init__(self, name, publish, lock=None):
+        self.name = name
+        self.publish = publish
+        self.lock = lock or threading.RLock()
+        self.rows = OrderedDict()
+
+    def __contains__(self, iid):
+        with self.lock:
+            return iid in self.rows
+
+    def parent(self, iid):
+        with self.lock:
+            row = self.rows.get(iid)
+            return row["parent"] if row is not None else None
+
+    def get_metadata(self, iid):
+        with self.lock:
+            row = self.rows.get(iid)
+            return row["metadata"] if row is not None else None
+
+    def insert(self, parent, iid, metadata=None, **options):
+        with self.lock:
+            row = self.rows.get(iid)
+            if row is not None and row["parent"] != parent:
+                # Keep parents ahead of their children for snapshots
+                del self.rows[iid]
+                row = None
+            if row is None:
+                row = self.rows[iid] = {"parent": parent, "metadata": None, "options": {}}
+            if metadata is not None:
+                row["metadata"] = metadata
+            row["options"].update(options)
+            self.publish({"type": "row", "view": self.name, "op": "insert", "iid": iid, "parent": parent, "metadata": metadata, "options": options})
+
+    def set_metadata(self, iid, metadata):
+        with self.lock:
+            if iid not in self.rows:
+                return
+            self.rows[iid]["metadata"] = metadata
+            self.publish({"type": "row", "view": self.name, "op": "metadata", "iid": iid, "metadata": metadata})
+
+    # Deleting a row deletes its children, as in a Treeview
+    def delete(self, iid):
+        with self.lock:
+            if self.rows.pop(iid, None) is None:
+                return
+            for child in [child for child, row in self.rows.items() if row["parent"] == iid]:
+                del self.rows[child]
+            self.publish({"type": "row", "view": self.name, "op": "delete", "iid": iid})
+
+    # [(iid, parent, metadata, options)] in an order that can be replayed
+    def snapshot(self):
+        with self.lock:
+            return [(iid, row["parent"], row["metadata"], row["options"]) for iid, row in self.rows.items()]
+
+
+# Apply a TreeModel row event to a LazyTree
+def apply_row_event(view, event):
+    if event["op"] == "insert":
+        view.insert(event["parent"], event["iid"], event["metadata"], **event["options"])
+    elif event["op"] == "metadata":
+        view.set_metadata(event["iid"], event["metadata"])
+    elif event["op"] == "delete":
+        view.delete(event["iid"])
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Marker used as the hwnd for entries that belong to a process rather than a window
+PROCESS = None
+
+# Fields whose value depends on the window title and must be dropped on retitle
+TITLE_FIELDS = frozenset({"vscode_workspace"})
+
+# Default time-to-live per field in seconds. None means the value is kept for
+# the lifetime of the window (or process) and only goes away on invalidation.
+DEFAULT_TTLS = {
+    "process": None,
+    "started": None,
+    "uia_app": None,
+    "class_name": None,
+    "is_visible": 1.0,
+    "vscode_workspace": 30.0,
+}
+
+# Marker for "nothing cached" since None is a valid cached value
+MISSING = object()
+
+
+# LRU cache of window metadata keyed by (hwnd, pid) with per-field TTLs
+class MetadataCache:
+    def __init__(self, ttls=None, max_entries=2048, clock=time.monotonic):
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.titles = {}
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Return the cached value for a field, or MISSING
+    def get(self, hwnd, pid, field):
+        key = (hwnd, pid)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and field in entry:
+                value, expires_at = entry[field]
+                if expires_at is None or expires_at > self.clock():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del entry[field]
+            self.misses += 1
+            return MISSING
+
+    def put(self, hwnd, pid, field, value):
+        key = (hwnd, pid)
+        ttl = self.ttls.get(field)
+        expires_at = None if ttl is None else self.clock() + ttl
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = {}
+            else:
+                self.entries.move_to_end(key)
+            entry[field] = (value, expires_at)
+            while len(self.entries) > self.max_entries:
+                old_key, _ = self.entries.popitem(last=False)
+                self.titles.pop(old_key, None)
+                self.evictions += 1
+
+    # Return the cached value or compute, store and return it
+    def get_or_compute(self, hwnd, pid, field, compute):
+        value = self.get(hwnd, pid, field)
+        if value is MISSING:
+            value = compute()
+            self.put(hwnd, pid, field, value)
+        return value
+
+    # Record the current title of a window, dropping title-dependent fields
+    # if it changed since the last call
+    def observe_title(self, hwnd, pid, title):
+        key = (hwnd, pid)
+        with self.lock:
+            previous = self.titles.get(key)
+            self.titles[key] = title
+            if previous is not None and previous != title:
+                entry = self.entries.get(key)
+                if entry:
+                    for field in TITLE_FIELDS:
+                        entry.pop(field, None)
+
+    # Drop everything cached for a window
+    def invalidate_window(self, hwnd):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == hwnd]:
+                del self.entries[key]
+            for key in [key for key in self.titles if key[0] == hwnd]:
+                del self.titles[key]
+
+    # Drop everything cached for a process and its windows (e.g. on exit,
+    # so a recycled pid never sees stale exe/name data)
+    def invalidate_pid(self, pid):
+        with self.lock:
+            for key in [key for key in self.entries if key[1] == pid]:
+                del self.entries[key]
+            for key in [key for key in self.titles if key[1] == pid]:
+                del self.titles[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.titles.clear()
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
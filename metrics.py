@@ -0,0 +1,223 @@
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from collections import deque
+
+# Recent phase timings kept for the status panel and for inspection
+RING_SIZE = 4096
+
+# Histogram buckets are powers of two of microseconds, up to about 18 minutes
+BUCKETS = 31
+
+# Trace lines are flushed to disk at most this often, in seconds
+TRACE_FLUSH_INTERVAL = 1.0
+
+
+# Timing distribution for one phase, in log2 microsecond buckets
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        micros = int(seconds * 1_000_000)
+        self.buckets[min(micros.bit_length(), BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    # Upper bound of the bucket holding the given fraction of samples, in seconds
+    def percentile(self, fraction):
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return min((1 << bucket) / 1_000_000, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total * 1000 / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class _Phase:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NoPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_PHASE = _NoPhase()
+
+
+# Per-phase timings and counters for the organizer's hot paths. Phases are
+# timed with `with metrics.phase("scan.enumerate"):`; when metrics are
+# disabled that's a shared no-op, so instrumentation can stay in place.
+class Metrics:
+    def __init__(self, enabled=True, ring_size=RING_SIZE):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.recent = deque(maxlen=ring_size)
+        self.trace_file = None
+        self.trace_flushed = 0.0
+        self.profile_ticks = 0
+        self.profile_path = None
+        self.profiler = None
+
+    def phase(self, name):
+        if not self.enabled:
+            return NO_PHASE
+        return _Phase(self, name)
+
+    # Wrap a function so each call is timed as a phase
+    def timed(self, name, function):
+        def wrapper(*args, **kwargs):
+            with self.phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def record(self, name, seconds):
+        now = time.time()
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+            self.recent.append((now, name, seconds))
+            if self.trace_file is not None:
+                self._trace({"time": now, "phase": name, "ms": seconds * 1000})
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    # Register a function returning a dict of stats to include in snapshots
+    # (the JSON store's bytes written, the probe scheduler's skips, ...)
+    def add_gauge(self, name, function):
+        self.gauges[name] = function
+
+    def snapshot(self):
+        with self.lock:
+            result = {
+                "phases": {name: histogram.summary() for name, histogram in self.histograms.items()},
+                "counters": dict(self.counters),
+            }
+        for name, function in self.gauges.items():
+            try:
+                result[name] = function()
+            except Exception as e:
+                result[name] = {"error": str(e)}
+        return result
+
+    # [(timestamp, phase, seconds)] for the most recent samples, oldest first
+    def recent_samples(self, phase=None):
+        with self.lock:
+            return [sample for sample in self.recent if phase is None or sample[1] == phase]
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.recent.clear()
+
+    # Append every phase sample to a JSON-lines file
+    def open_trace(self, path):
+        with self.lock:
+            self.close_trace_locked()
+            self.trace_file = open(path, "a", encoding="utf-8")
+
+    def close_trace(self):
+        with self.lock:
+            self.close_trace_locked()
+
+    def close_trace_locked(self):
+        if self.trace_file is not None:
+            self.trace_file.close()
+            self.trace_file = None
+
+    def _trace(self, record):
+        self.trace_file.write(json.dumps(record) + "\n")
+        if record["time"] - self.trace_flushed >= TRACE_FLUSH_INTERVAL:
+            self.trace_file.flush()
+            self.trace_flushed = record["time"]
+
+    # Profile the next ticks update loop iterations with cProfile and write
+    # the stats to path (plus a readable summary to path + ".txt")
+    def request_profile(self, path, ticks=20):
+        with self.lock:
+            self.profile_path = path
+            self.profile_ticks = ticks
+
+    # Wrap one iteration of a loop; profiles it if a capture was requested
+    def tick(self):
+        if not self.profile_ticks:
+            return NO_PHASE
+        return _ProfiledTick(self)
+
+    def _profiled(self, profiler):
+        with self.lock:
+            self.profile_ticks -= 1
+            if self.profile_ticks > 0:
+                return
+            path = self.profile_path
+            self.profiler = None
+        profiler.dump_stats(path)
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(30)
+        with open(path + ".txt", "w", encoding="utf-8") as f:
+            f.write(text.getvalue())
+        print(f"Profile written to {path}")
+
+
+class _ProfiledTick:
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __enter__(self):
+        if self.metrics.profiler is None:
+            self.metrics.profiler = cProfile.Profile()
+        self.metrics.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        profiler = self.metrics.profiler
+        profiler.disable()
+        self.metrics._profiled(profiler)
+        return False
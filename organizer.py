@@ -0,0 +1,743 @@
+import atexit
+import json
+import os
+import shutil
+import threading
+from threading import Thread
+
+from assignment_rules import AutoAssigner, RULES_FILE
+from chrome_session import ChromeSession
+from close_pipeline import ClosePipeline, DONE, FAILED, FINISHED
+from git_sync import GitSync
+from metadata_cache import MetadataCache, PROCESS, MISSING
+from metrics import Metrics
+from persistence import JsonStore
+from probe_scheduler import ProbeScheduler
+from project_index import ProjectIndex
+from reconcile import WindowIndex, TreeReconciler, apply_tree_changes, window_id, parse_window_id
+from search_index import WindowSearch, HistorySearch
+from state_history import StateHistory
+from time_tracking import ActivityLog
+from window_backends import get_backend
+from window_events import WindowTracker, CREATED, DESTROYED, RETITLED, REFRESHED
+from workspace_restore import WorkspaceRestore
+
+# The window tracker without any UI: scanning, assignment, saving, closing
+# and restoring projects, and search. The Tk GUI and the organizer service
+# both drive it; neither importing it nor anything it imports touches Tk.
+
+# Path to the projects directory
+PROJECTS_PATH = r"C:\Users\ScottMason(Qrometric\OneDrive - Qrometric\Projects"
+
+# File for top-level assignments. Window ids only mean something on the
+# machine that saw them, and writing into the projects folder would make the
+# project index re-list it, so it's kept per machine.
+TOP_ASSIGNMENTS_FILE = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache"), "ProjectOrganizer", "top_assignments.json")
+
+# Where earlier versions kept it; read once if the file above doesn't exist yet
+LEGACY_TOP_ASSIGNMENTS_FILE = os.path.join(PROJECTS_PATH, "top_assignments.json")
+
+# Rules that assign new windows to projects automatically. They match on
+# titles, URLs and paths rather than window ids, so they're shared through
+# the synced projects folder.
+ASSIGNMENT_RULES_FILE = os.path.join(PROJECTS_PATH, RULES_FILE)
+
+# Per-probe timeouts for the expensive metadata probes, in seconds
+PROCESS_PROBE_TIMEOUT = 0.25
+APP_PROBE_TIMEOUT = 1.0
+
+# Write JSON compactly instead of indented (smaller files, less to sync)
+COMPACT_JSON = False
+
+# Shortest filter text that also asks which projects had a match open
+HISTORY_MIN_QUERY = 3
+
+# Most rows shown in the newly detected windows tree; the rest are summarized
+MAX_NEW_WINDOW_ROWS = 500
+
+# How long the update loop waits for a window event before checking again
+EVENT_TIMEOUT = 1.0
+
+# Shared state below is created by init(), not on import, so a client that
+# only talks to the service never connects to the window system, starts
+# thread pools or reads caches.
+
+# Window system backend (Win32, X11 or synthetic; see ORGANIZER_BACKEND)
+backend = None
+
+# Cache of per-window and per-process metadata shared by all scans
+metadata_cache = None
+
+# Matcher for the assignment rules, reloaded when the file changes
+auto_assigner = None
+
+# Bounded pool for expensive metadata probes, with per-probe timeouts
+probe_scheduler = None
+
+# Long-lived Chrome DevTools session used to map Chrome windows to tab URLs
+chrome_session = None
+
+# Debounced, change-detecting writer for the assignment and program files
+json_store = None
+
+# Change-detecting git sync; closes that overlap are synced as one batch
+git_sync = None
+
+# Cached list of project folders, refreshed in the background
+project_index = None
+
+# Background pipeline for closing projects, a few at a time
+close_pipeline = None
+
+# Search over open windows (kept current by the update loop) and over
+# every project's saved states (refreshed in the background)
+window_search = None
+history_search = None
+
+# Foreground time per project and app, sampled once a second
+activity_log = None
+
+# Per-phase timings and counters for the update loop, saves and closes.
+# ORGANIZER_METRICS=0 turns them off; ORGANIZER_TRACE=path also appends
+# every sample to a JSON-lines file.
+metrics = None
+
+init_lock = threading.Lock()
+
+
+# Function to create the shared state above. Only the first call does
+# anything, so every entry point can call it.
+def init():
+    global backend, metadata_cache, auto_assigner, probe_scheduler, chrome_session, json_store, git_sync
+    global project_index, close_pipeline, window_search, history_search, activity_log, metrics
+    with init_lock:
+        if metrics is not None:
+            return
+        backend = get_backend()
+        metadata_cache = MetadataCache()
+        auto_assigner = AutoAssigner(ASSIGNMENT_RULES_FILE)
+        probe_scheduler = ProbeScheduler(initializer=backend.init_worker_thread)
+        chrome_session = ChromeSession()
+        json_store = JsonStore(compact=COMPACT_JSON)
+        atexit.register(json_store.flush)
+        git_sync = GitSync()
+        project_index = ProjectIndex(PROJECTS_PATH, json_store)
+        close_pipeline = ClosePipeline()
+        window_search = WindowSearch()
+        history_search = HistorySearch(PROJECTS_PATH)
+        activity_log = ActivityLog()
+
+        new_metrics = Metrics(enabled=os.environ.get("ORGANIZER_METRICS", "1") != "0")
+        if new_metrics.enabled and os.environ.get("ORGANIZER_TRACE"):
+            new_metrics.open_trace(os.environ["ORGANIZER_TRACE"])
+            atexit.register(new_metrics.close_trace)
+        # Gauges read the module's current objects, which tests and
+        # benchmarks may swap out
+        new_metrics.add_gauge("json_store", lambda: json_store.stats())
+        new_metrics.add_gauge("probes", lambda: probe_scheduler.stats())
+        new_metrics.add_gauge("metadata_cache", lambda: metadata_cache.stats())
+        metrics = new_metrics
+
+
+# Function to get a list of projects (folders in the directory), from the
+# cached project index
+def get_project_list():
+    return project_index.names()
+
+
+# Function to save all assignments to the top-level JSON
+def save_top_assignments(assignments):
+    try:
+        with metrics.phase("save.top_assignments"):
+            os.makedirs(os.path.dirname(TOP_ASSIGNMENTS_FILE), exist_ok=True)
+            json_store.save(TOP_ASSIGNMENTS_FILE, assignments)
+    except Exception as e:
+        print(f"Error saving top assignments: {e}")
+
+
+# Function to read the saved assignments, {window id: project}. Files from
+# before windows had ids are keyed by title (or grouped as {project: {title:
+# metadata}}); those keys are returned as they are for restore_assignments.
+# A missing or unreadable file means starting with no assignments.
+def load_top_assignments():
+    path = TOP_ASSIGNMENTS_FILE if os.path.exists(TOP_ASSIGNMENTS_FILE) else LEGACY_TOP_ASSIGNMENTS_FILE
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Error reading top assignments: {e}")
+        return {}
+    if not isinstance(data, dict):
+        print("Error reading top assignments: not a JSON object")
+        return {}
+
+    saved = {}
+    for key, value in data.items():
+        if isinstance(value, str):
+            saved[key] = value
+        elif isinstance(value, dict):
+            for title in value:
+                saved.setdefault(title, key)
+    return saved
+
+
+# Function to carry saved assignments over to the windows open now. An id
+# (handle, pid and process start time) only ever matches the same window, so
+# entries for windows closed since are dropped; title keys go to the first
+# open window with that title that isn't assigned yet.
+def restore_assignments(saved, index, assignments):
+    restored = 0
+    for key, project in saved.items():
+        window = index.get_by_id(key) or index.get_by_title(key)
+        if window is not None and window["id"] not in assignments:
+            assignments[window["id"]] = project
+            restored += 1
+    return restored
+
+
+# Function to save programs assigned to a specific project to its folder
+def save_project_programs(project_name, programs_metadata):
+    project_path = os.path.join(PROJECTS_PATH, project_name)
+    project_file = os.path.join(project_path, "current_programs.json")
+
+    # Ensure the project folder exists
+    if not os.path.exists(project_path):
+        os.makedirs(project_path, exist_ok=True)
+
+    # Save the programs metadata to the project-specific JSON
+    try:
+        with metrics.phase("save.programs"):
+            json_store.save(project_file, programs_metadata)
+    except Exception as e:
+        print(f"Error saving project programs for {project_name}: {e}")
+
+
+# Function to close windows by id. A handle is only closed if it still
+# belongs to the same process, in case it was reused.
+def close_windows(window_ids):
+    for key in window_ids:
+        hwnd, pid = parse_window_id(key)
+        try:
+            if backend.get_pid(hwnd) == pid:
+                backend.close_window(hwnd)
+        except Exception as e:
+            print(f"Error closing window {key}: {e}")
+
+
+# Function to upload project to Git
+def upload_project_to_git(project_name):
+    project_path = os.path.join(PROJECTS_PATH, project_name)
+    result = git_sync.request(project_path).result()
+    if result["pushed"]:
+        print(f"Uploaded project {project_name} to Git.")
+    else:
+        print(f"Project {project_name} is already up to date in Git.")
+
+
+# Function to save project notes, committed with the project when it closes
+def save_closing_notes(project_name, notes):
+    notes_file_path = os.path.join(PROJECTS_PATH, project_name, "closing_notes.txt")
+    with open(notes_file_path, "w") as f:
+        f.write(notes)
+    print(f"Notes saved for project {project_name}.")
+
+
+# Function to record the project's current programs in its saved state
+# history and as LastState/state.json
+def snapshot_project_state(project_name):
+    # Make sure pending saves are on disk before snapshotting them
+    json_store.flush()
+
+    project_path = os.path.join(PROJECTS_PATH, project_name)
+    savestate_path = os.path.join(project_path, "Savedstates")
+    last_state_path = os.path.join(savestate_path, "LastState")
+    os.makedirs(last_state_path, exist_ok=True)
+
+    current_programs = os.path.join(project_path, "current_programs.json")
+    if not os.path.exists(current_programs):
+        return
+    with open(current_programs, "r", encoding="utf-8") as f:
+        programs = json.load(f)
+
+    # Only the windows that changed since the last close are stored
+    StateHistory(savestate_path).snapshot(programs)
+
+    # Copy current_programs.json to last_state/state.json
+    shutil.copy2(current_programs, os.path.join(last_state_path, "state.json"))
+
+
+# Function to read back a saved state (the latest if state_id is None)
+def load_project_state(project_name, state_id=None):
+    history = StateHistory(os.path.join(PROJECTS_PATH, project_name, "Savedstates"))
+    if state_id is None:
+        return history.restore_latest()
+    return history.restore(state_id)
+
+
+# Function to close the active project. Notes, if any, are saved first so
+# they're in the closing commit; the rest runs on close_pipeline: the
+# snapshot, then the git sync, with the project's windows closed alongside
+# them. view is the assigned windows view. Returns the pipeline's future.
+def close_active_project(active_project, assignments, view, notes=""):
+    if not active_project:
+        print("No active project set.")
+        return None
+    if close_pipeline.running(active_project):
+        print(f"Project {active_project} is already closing.")
+        return None
+
+    if notes:
+        save_closing_notes(active_project, notes)
+
+    # Get all windows associated with the active project
+    project_windows = [window for window, project in assignments.items() if project == active_project]
+
+    def finish():
+        # Remove project from the GUI
+        if active_project in view:
+            view.delete(active_project)
+
+        # Remove project from assignments
+        for window in project_windows:
+            assignments.pop(window, None)
+
+    return close_pipeline.submit(
+        active_project,
+        [
+            ("snapshot", metrics.timed("close.snapshot", lambda: snapshot_project_state(active_project))),
+            ("git", metrics.timed("close.git", lambda: upload_project_to_git(active_project))),
+        ],
+        side=("close_windows", metrics.timed("close.close_windows", lambda: close_windows(project_windows))),
+        final=finish,
+    )
+
+
+# Function to describe a close pipeline progress report for the status line
+def describe_close_progress(project, stage, state, error):
+    if stage == FINISHED and state == DONE:
+        return f"Closed {project}"
+    if state == FAILED:
+        return f"Closing {project}: {stage} failed ({error})"
+    return f"Closing {project}: {stage} {state}"
+
+
+# Function to reopen a project's saved windows and assign them back to it
+def restore_project(project_name, assignments, on_progress=None):
+    programs = load_project_state(project_name)
+    if programs is None:
+        # Never closed yet, so there's no history; use the live programs file
+        project_file = os.path.join(PROJECTS_PATH, project_name, "current_programs.json")
+        try:
+            with open(project_file, "r", encoding="utf-8") as f:
+                programs = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading saved programs for {project_name}: {e}")
+            return None
+
+    with metrics.phase("restore"):
+        result = WorkspaceRestore(backend, chrome_session).restore(programs, on_progress)
+
+    # Restored windows are new windows, so they get new ids
+    for handle in result["placed"].values():
+        try:
+            assignments[get_window_metadata(handle, backend.get_title(handle))["id"]] = project_name
+        except Exception:
+            pass
+    save_top_assignments(assignments)
+    return result
+
+
+# Helper function to find the open editor of a VS Code window
+def get_vscode_workspace(pid, title):
+    # Attaching UIA is the slow part, so keep one app per process
+    app = metadata_cache.get_or_compute(PROCESS, pid, "uia_app", lambda: backend.attach_app(pid))
+    return backend.get_vscode_workspace(app, title)
+
+
+# Helper to read a cached field, treating a miss as None
+def cached_field(hwnd, pid, field):
+    value = metadata_cache.get(hwnd, pid, field)
+    return None if value is MISSING else value
+
+
+# Function to collect the cheap metadata for a single window. Fields that
+# don't change for the life of a window or process come from the metadata
+# cache; the expensive ones are filled in by probe_expensive_fields.
+def get_window_metadata(hwnd, title):
+    metadata = {
+        "id": None,
+        "title": title,
+        "hwnd": hwnd,
+        "pid": None,
+        "process_name": None,
+        "exe_path": None,
+        "class_name": None,
+        "rect": None,
+        "is_visible": None,
+        "chrome_url": None,
+        "vscode_workspace": None,
+    }
+
+    # Get the owning process and window rectangle
+    pid = None
+    try:
+        pid = backend.get_pid(hwnd)
+        metadata["pid"] = pid
+        metadata["rect"] = backend.get_rect(hwnd)
+    except Exception:
+        pass
+
+    # Identify the window by handle, pid and process start time
+    started = None
+    if pid is not None:
+        started = metadata_cache.get_or_compute(PROCESS, pid, "started", lambda: backend.get_process_start(pid))
+    metadata["id"] = window_id(hwnd, pid, started)
+
+    metadata_cache.observe_title(hwnd, pid, title)
+
+    # Get window class name and visibility
+    try:
+        metadata["class_name"] = metadata_cache.get_or_compute(hwnd, pid, "class_name", lambda: backend.get_class_name(hwnd))
+        metadata["is_visible"] = metadata_cache.get_or_compute(hwnd, pid, "is_visible", lambda: backend.is_visible(hwnd))
+    except Exception:
+        pass
+
+    return metadata
+
+
+# Function to fill in process, Chrome and VS Code fields for a batch of
+# windows. Uncached probes run concurrently on the probe scheduler; any that
+# miss their timeout leave the field empty for now and trigger a refresh of
+# the affected windows when they finish.
+def probe_expensive_fields(windows_data):
+    # Process name and executable path, once per process
+    pids = {metadata["pid"] for metadata in windows_data if metadata["pid"] is not None}
+    get_process_info = metrics.timed("probe.process", backend.get_process_info)
+    with metrics.phase("scan.process"):
+        probe_scheduler.gather([
+            ("process", pid, lambda pid=pid: metadata_cache.get_or_compute(PROCESS, pid, "process", lambda: get_process_info(pid)), PROCESS_PROBE_TIMEOUT)
+            for pid in pids
+            if metadata_cache.get(PROCESS, pid, "process") is MISSING
+        ])
+
+    app_probes = []
+    get_vscode_workspace_timed = metrics.timed("probe.vscode_workspace", get_vscode_workspace)
+    for metadata in windows_data:
+        hwnd, pid = metadata["hwnd"], metadata["pid"]
+        metadata["process_name"], metadata["exe_path"] = cached_field(PROCESS, pid, "process") or (None, None)
+
+        # Check if the window belongs to Chrome and get tab URL
+        if metadata["process_name"] == "chrome.exe":
+            with metrics.phase("scan.chrome"):
+                metadata["chrome_url"] = chrome_session.url_for_window(metadata["title"])
+
+        # Check if the window belongs to VSCode and get workspace info
+        if metadata["process_name"] == "Code.exe" and metadata_cache.get(hwnd, pid, "vscode_workspace") is MISSING:
+            app_probes.append((
+                "vscode_workspace",
+                hwnd,
+                lambda hwnd=hwnd, pid=pid, title=metadata["title"]: metadata_cache.get_or_compute(
+                    hwnd, pid, "vscode_workspace", lambda: get_vscode_workspace_timed(pid, title)
+                ),
+                APP_PROBE_TIMEOUT,
+            ))
+
+    with metrics.phase("scan.apps"):
+        probe_scheduler.gather(app_probes)
+    for metadata in windows_data:
+        if metadata["process_name"] == "Code.exe":
+            metadata["vscode_workspace"] = cached_field(metadata["hwnd"], metadata["pid"], "vscode_workspace")
+
+    return windows_data
+
+
+# Function to name the project (or "") and app a window's time counts toward
+def window_activity(assignments, hwnd):
+    pid = backend.get_pid(hwnd)
+    started = metadata_cache.get_or_compute(PROCESS, pid, "started", lambda: backend.get_process_start(pid))
+    process_name, _ = metadata_cache.get_or_compute(PROCESS, pid, "process", lambda: backend.get_process_info(pid))
+    return assignments.get(window_id(hwnd, pid, started), ""), process_name or ""
+
+
+# Function to get a list of open windows. With probe=False only the cheap
+# fields are filled in (id, title, handle, pid, class); process, Chrome and
+# VS Code fields are left empty for probe_expensive_fields.
+def get_open_windows(probe=True):
+    # Get all titled windows from the backend and collect metadata for each
+    with metrics.phase("scan.enumerate"):
+        windows = backend.list_windows()
+    with metrics.phase("scan.metadata"):
+        windows_data = [get_window_metadata(hwnd, title) for hwnd, title in windows]
+    metrics.count("windows_scanned", len(windows_data))
+
+    return probe_expensive_fields(windows_data) if probe else windows_data
+
+
+# Function to re-probe only the given window handles
+def probe_windows(hwnds):
+    windows_data = []
+    for hwnd in hwnds:
+        try:
+            title = backend.get_title(hwnd)
+            if not title.strip():
+                continue
+            windows_data.append(get_window_metadata(hwnd, title))
+        except Exception as e:
+            print(f"Error probing window {hwnd}: {e}")
+    metrics.count("windows_reprobed", len(windows_data))
+    return {metadata["hwnd"]: metadata for metadata in probe_expensive_fields(windows_data)}
+
+
+# Function to apply a batch of window deltas to the window index. Returns
+# the windows that appeared, disappeared and had their metadata refreshed.
+# A retitle is a refresh of the same window; only a changed id (the handle
+# now belonging to another process) counts as a removal plus an addition.
+def apply_window_deltas(index, deltas):
+    added, removed, updated = [], [], []
+    reprobe = set()
+    for delta in deltas:
+        if delta.kind == DESTROYED:
+            reprobe.discard(delta.hwnd)
+            closed = index.remove(delta.hwnd)
+            metadata_cache.invalidate_window(delta.hwnd)
+            if closed is None:
+                continue
+            removed.append(closed)
+
+            # Forget the process once its last window is gone
+            if closed["pid"] is not None and not index.has_pid(closed["pid"]):
+                metadata_cache.invalidate_pid(closed["pid"])
+        elif delta.kind in (CREATED, RETITLED, REFRESHED):
+            reprobe.add(delta.hwnd)
+
+    probed = probe_windows(reprobe) if reprobe else {}
+    for hwnd in reprobe:
+        window = probed.get(hwnd)
+        if window is None:
+            old = index.remove(hwnd)
+        else:
+            old = index.add(window)
+        if old is not None and (window is None or old["id"] != window["id"]):
+            removed.append(old)
+        if window is not None:
+            if old is None or old["id"] != window["id"]:
+                added.append(window)
+            else:
+                updated.append(window)
+    return added, removed, updated
+
+
+# Function to apply one batch of window changes (added, removed and
+# re-probed windows) to the views, the assignment maps and the saved files
+def sync_window_changes(assigned_view, new_windows_view, assignments, last_assignments, new_assignments, index, reconciler, added, removed, updated, save_programs=True):
+    # Handle new windows: assign the ones a rule matches, and track the
+    # rest in new_assignments
+    auto_assigner.reload()
+    for window in added:
+        new_window_id = window["id"]
+        if new_window_id not in assignments and new_window_id not in last_assignments:
+            project = auto_assigner.match(window)
+            if project is not None:
+                assignments[new_window_id] = project
+                continue
+
+            new_assignments[new_window_id] = "Unassigned"
+
+            # Add to the "Newly Detected Windows" Treeview
+            new_windows_view.insert("", new_window_id, window, text=window["title"])
+
+    # Handle closed windows: remove them from the new windows tree, and drop
+    # their assignments so reconciling removes their assigned rows too
+    for window in removed:
+        if window["id"] not in index.ids():
+            new_windows_view.delete(window["id"])
+            assignments.pop(window["id"], None)
+
+    # Refresh windows that were re-probed in place, including the row text
+    # when the title changed. Late probes can fill in fields (process, URL,
+    # workspace) a rule needs, so unassigned windows get another chance to match.
+    for window in updated:
+        key = window["id"]
+        if key in new_windows_view and key not in assignments:
+            project = auto_assigner.match(window)
+            if project is not None:
+                new_windows_view.delete(key)
+                assignments[key] = project
+                continue
+        for view in (assigned_view, new_windows_view):
+            if key in view:
+                if (view.get_metadata(key) or {}).get("title") != window["title"]:
+                    view.insert(view.parent(key), key, window, text=window["title"])
+                else:
+                    view.set_metadata(key, window)
+
+    # Bring the left-hand Treeview in line with assignments, touching
+    # only the windows whose project changed
+    with metrics.phase("update.reconcile"):
+        changes = reconciler.reconcile(assignments)
+        apply_tree_changes(assigned_view, changes, index.get_by_id)
+
+    # Save assignments if they changed, and programs for every project
+    # whose membership or window metadata changed (unless the metadata is
+    # still missing its slow fields, which would overwrite good saves).
+    # A closing project's file is left alone while its snapshot is taken.
+    if changes:
+        save_top_assignments(assignments)
+    dirty_projects = changes.projects()
+    dirty_projects.update(assignments.get(window["id"]) for window in added + removed + updated)
+    dirty_projects.difference_update({None, "Unassigned"})
+    if not save_programs:
+        dirty_projects.clear()
+    for project in dirty_projects:
+        if close_pipeline.running(project):
+            continue
+        # A member the index doesn't have keeps the metadata its row last
+        # showed rather than being saved empty
+        metadata = {}
+        for key in reconciler.members.get(project, ()):
+            window = index.get_by_id(key) or assigned_view.get_metadata(key)
+            if window:
+                metadata[key] = window
+        save_project_programs(project, metadata)
+
+    # Update last_assignments to match the current state
+    changes.apply_to(last_assignments)
+
+    # Reset new_assignments for the next cycle
+    new_assignments.clear()
+
+
+# Function to bring the views up at startup, before any slow probe has run:
+# a scan of the cheap fields, the saved assignments carried over to it, and
+# a first sync. Programs files aren't saved yet, as the windows have no
+# process or app fields. Returns the scanned windows.
+def initial_sync(assigned_view, new_windows_view, assignments, last_assignments, new_assignments, index, reconciler):
+    with metrics.phase("update.initial_scan"):
+        windows = get_open_windows(probe=False)
+    for window in windows:
+        index.add(window)
+    with metrics.phase("update.load_assignments"):
+        restore_assignments(load_top_assignments(), index, assignments)
+    window_search.apply(windows, [], [])
+    with metrics.phase("update.sync"):
+        sync_window_changes(assigned_view, new_windows_view, assignments, last_assignments, new_assignments,
+                            index, reconciler, windows, [], [], save_programs=False)
+    return windows
+
+
+# Real-time update loop, run on its own thread by the GUI or the service.
+# Widget changes are posted to the views' UI queue, never made from this thread
+def update_assignments(assigned_view, new_windows_view, assignments, last_assignments, new_assignments, tracker=None, index=None):
+    # Start listening for window events before the initial scan so nothing
+    # created in between is missed
+    if tracker is None:
+        tracker = WindowTracker(backend.event_source())
+    tracker.start()
+
+    # Current open windows indexed by hwnd and id, kept up to date by deltas.
+    # Callers that want to read it (the service) pass in an empty index.
+    if index is None:
+        index = WindowIndex()
+    reconciler = TreeReconciler()
+    windows = initial_sync(assigned_view, new_windows_view, assignments, last_assignments, new_assignments, index, reconciler)
+
+    # When a slow probe finishes after its scan gave up on it, re-probe the
+    # windows it was for; the result is in the cache by then
+    def refresh_after_late_probe(name, key, result):
+        hwnds = index.hwnds_for_pid(key) if name == "process" else [key]
+        for hwnd in hwnds:
+            tracker.refresh(hwnd)
+
+    probe_scheduler.on_late = refresh_after_late_probe
+
+    # The trees are up; now fill in the slow fields and apply them as
+    # updates, which also re-runs the rules and saves the programs files.
+    # Events that arrive meanwhile wait in the tracker.
+    with metrics.phase("update.initial_probe"):
+        probed = probe_expensive_fields([dict(window) for window in windows])
+    for window in probed:
+        index.add(window)
+    window_search.apply([], [], probed)
+    added, removed, updated = [], [], probed
+
+    while True:
+        # One tick per batch of changes; a requested cProfile capture
+        # covers whole ticks
+        with metrics.tick():
+            with metrics.phase("update.sync"):
+                sync_window_changes(assigned_view, new_windows_view, assignments, last_assignments, new_assignments, index, reconciler, added, removed, updated)
+            metrics.count("ticks")
+
+            # Wait for the next window change (or assignment made in the GUI)
+            # and re-probe only what changed
+            added, removed, updated = [], [], []
+            while not (added or removed or updated) and not reconciler.pending(assignments):
+                deltas = tracker.wait_for_deltas(timeout=EVENT_TIMEOUT)
+                with metrics.phase("update.deltas"):
+                    added, removed, updated = apply_window_deltas(index, deltas)
+                with metrics.phase("update.search"):
+                    window_search.apply(added, removed, updated)
+
+
+# Function to bring the saved-state search up to date on a background thread
+def refresh_history_search(names=None):
+    Thread(target=lambda: history_search.refresh(names or get_project_list()), name="history-search", daemon=True).start()
+
+
+# Function to search open windows and, for longer queries, which projects
+# had a matching window open when they were saved; backs the filter box
+def search_windows(query, assignments):
+    windows = [dict(window, project=assignments.get(window["id"])) for window in window_search.search(query)]
+    projects = history_search.projects_for(query) if len(query.strip()) >= HISTORY_MIN_QUERY else []
+    return {"windows": windows, "projects": projects}
+
+
+# Function to assign/reassign windows to a project, moving their rows from
+# either tree to the project's group in the assigned tree
+def assign_windows(selected_items, project_name, assignments, assigned_view, new_windows_view):
+    if not (selected_items and project_name):
+        return {}
+
+    # Collect metadata for all assigned windows
+    project_metadata = {}
+
+    for item in selected_items:
+        metadata = {}
+
+        # Check if the item exists in the new windows tree
+        if item in new_windows_view:
+            # Retrieve metadata before removing the item
+            metadata = new_windows_view.get_metadata(item) or {}
+
+            # Remove from the new windows tree
+            new_windows_view.delete(item)
+        elif assigned_view.parent(item):
+            # Retrieve metadata from the assigned windows tree
+            metadata = assigned_view.get_metadata(item) or {}
+
+            # Remove the window from its current project group
+            assigned_view.delete(item)
+        else:
+            continue  # Skip if the item isn't a window in either tree
+
+        # Update assignments dictionary
+        assignments[item] = project_name
+
+        # Add the window metadata to the project metadata
+        project_metadata[item] = metadata
+
+        # Add the window to the new project group
+        assigned_view.insert("", project_name, text=project_name, open=True)
+
+        # Add the window title under the project group, metadata on expand
+        assigned_view.insert(project_name, item, metadata, text=metadata.get("title", item))
+
+    # Save updated assignments
+    save_top_assignments(assignments)
+
+    # Save project-specific programs with metadata
+    save_project_programs(project_name, project_metadata)
+
+    return project_metadata
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+# How long to wait after the first change before writing, so a burst of
+# updates ends up as a single write per file
+DEBOUNCE_DELAY = 1.0
+
+
+# Serialize data the way it will be written to disk
+def dump_json(data, compact=False):
+    if compact:
+        return json.dumps(data, separators=(",", ":"))
+    return json.dumps(data, indent=4)
+
+
+# Write text to path via a temp file in the same directory and a rename, so a
+# crash mid-write leaves either the old file or the new one, never a truncated one
+def write_atomic(path, text):
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def fingerprint(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# Debounced JSON writer that skips writes whose content hasn't changed
+class JsonStore:
+    def __init__(self, delay=DEBOUNCE_DELAY, compact=False):
+        self.delay = delay
+        self.compact = compact
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.fingerprints = {}
+        self.timer = None
+        self.writes = 0
+        self.skipped = 0
+        self.bytes_written = 0
+
+    # Fingerprint of what's on disk, read once per path so the first save
+    # after a restart doesn't rewrite an identical file
+    def _disk_fingerprint(self, path):
+        if path not in self.fingerprints:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.fingerprints[path] = fingerprint(f.read())
+            except OSError:
+                self.fingerprints[path] = None
+        return self.fingerprints[path]
+
+    # Queue data to be written to path. The data is serialized immediately,
+    # so callers are free to keep mutating it.
+    def save(self, path, data):
+        text = dump_json(data, self.compact)
+        with self.lock:
+            if self._disk_fingerprint(path) == fingerprint(text):
+                self.pending.pop(path, None)
+                self.skipped += 1
+                return
+            self.pending[path] = text
+            if self.delay > 0:
+                if self.timer is None:
+                    self.timer = threading.Timer(self.delay, self.flush)
+                    self.timer.daemon = True
+                    self.timer.start()
+                return
+        self.flush()
+
+    # Write everything pending right now
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            for path, text in pending.items():
+                try:
+                    write_atomic(path, text)
+                    self.fingerprints[path] = fingerprint(text)
+                    self.writes += 1
+                    self.bytes_written += len(text.encode("utf-8"))
+                except Exception as e:
+                    print(f"Error saving {path}: {e}")
+
+    def stats(self):
+        with self.lock:
+            return {
+                "writes": self.writes,
+                "skipped": self.skipped,
+                "pending": len(self.pending),
+                "bytes_written": self.bytes_written,
+            }
@@ -0,0 +1,224 @@
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Worker threads shared by all probes
+MAX_WORKERS = 8
+
+# Default per-probe timeout in seconds
+PROBE_TIMEOUT = 0.5
+
+# Consecutive failures (errors or timeouts) before a probe is switched off,
+# and how long it stays off before one trial call is let through
+FAILURE_THRESHOLD = 3
+RESET_AFTER = 30.0
+
+# How often gather() checks whether queued probes have started running
+QUEUE_POLL = 0.01
+
+
+# Per-target circuit breaker: closed -> open after repeated failures,
+# half-open after a cool-down, closed again on the next success
+class CircuitBreaker:
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_after=RESET_AFTER, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            if self.clock() - self.opened_at >= self.reset_after:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.clock() - self.opened_at >= self.reset_after and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = self.clock()
+
+
+# Timing of one submitted probe: when a worker picked it up, and whether a
+# gather() gave up waiting for it
+class _ProbeRun:
+    __slots__ = ("started", "late")
+
+    def __init__(self):
+        self.started = None
+        self.late = False
+
+
+# Runs expensive metadata probes concurrently on a bounded pool. Each call to
+# gather() waits at most for the per-probe timeouts, counted from when each
+# probe starts running; probes that are still running are left to finish in
+# the background and reported through on_late.
+class ProbeScheduler:
+    def __init__(self, max_workers=MAX_WORKERS, timeout=PROBE_TIMEOUT, initializer=None,
+                 failure_threshold=FAILURE_THRESHOLD, reset_after=RESET_AFTER):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="probe", initializer=initializer)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.lock = threading.Lock()
+        self.breakers = {}
+        self.inflight = {}
+        self.on_late = None
+        self.completed = 0
+        self.timed_out = 0
+        self.skipped = 0
+
+    # Breakers are per (name, key), so one hung window switches off the probe
+    # for that window only
+    def breaker(self, name, key):
+        with self.lock:
+            if (name, key) not in self.breakers:
+                self.breakers[(name, key)] = CircuitBreaker(self.failure_threshold, self.reset_after)
+            return self.breakers[(name, key)]
+
+    def _run(self, name, key, function, run):
+        run.started = time.monotonic()
+        breaker = self.breaker(name, key)
+        try:
+            result = function()
+        except Exception:
+            if not run.late:
+                breaker.record_failure()
+            raise
+        # A probe that outlived its timeout was already counted as a failure,
+        # so its outcome doesn't touch the breaker again
+        if not run.late:
+            breaker.record_success()
+        return result
+
+    # Start a probe unless its breaker is open or the same probe is still
+    # running. Returns the future, or None if the probe was skipped.
+    def submit(self, name, key, function):
+        with self.lock:
+            future = self.inflight.get((name, key))
+            if future is not None:
+                return future
+        if not self.breaker(name, key).allow():
+            with self.lock:
+                self.skipped += 1
+            return None
+        run = _ProbeRun()
+        future = self.executor.submit(self._run, name, key, function, run)
+        future.probe_run = run
+        with self.lock:
+            self.inflight[(name, key)] = future
+        future.add_done_callback(lambda done: self._finished(name, key, done))
+        return future
+
+    def _finished(self, name, key, future):
+        with self.lock:
+            if self.inflight.get((name, key)) is future:
+                del self.inflight[(name, key)]
+            # A breaker with nothing against it is the same as a new one, so
+            # don't keep one around for every window ever probed
+            breaker = self.breakers.get((name, key))
+            if breaker is not None and breaker.failures == 0 and breaker.opened_at is None:
+                del self.breakers[(name, key)]
+            late = future.probe_run.late
+        if late and self.on_late is not None and future.exception() is None:
+            try:
+                self.on_late(name, key, future.result())
+            except Exception as e:
+                print(f"Error reporting late probe {name} for {key}: {e}")
+
+    # Run a batch of (name, key, function[, timeout]) probes concurrently and
+    # return {(name, key): result} for the ones that finished in time. A
+    # probe's timeout starts when a worker picks it up, so probes queued
+    # behind a full pool aren't charged for the wait; one that still hasn't
+    # started once the whole batch should have finished is dropped as skipped.
+    def gather(self, probes):
+        started = time.monotonic()
+        pending = []
+        longest = 0.0
+        for probe in probes:
+            name, key, function = probe[:3]
+            timeout = probe[3] if len(probe) > 3 else self.timeout
+            future = self.submit(name, key, function)
+            if future is not None:
+                pending.append((timeout, name, key, future))
+                longest = max(longest, timeout)
+        queue_deadline = started + longest * (math.ceil(len(pending) / self.max_workers) + 1)
+
+        results = {}
+        while pending:
+            now = time.monotonic()
+            waiting = []
+            wake = None
+            for timeout, name, key, future in pending:
+                run = future.probe_run
+                if future.done():
+                    try:
+                        results[(name, key)] = future.result()
+                        with self.lock:
+                            self.completed += 1
+                    except Exception:
+                        pass
+                elif run.started is not None and now >= run.started + timeout:
+                    # Count the slow probe against its breaker now, and let
+                    # the result be picked up on a later scan when it arrives.
+                    # A probe an earlier gather already gave up on is still
+                    # the same single failure.
+                    if not run.late:
+                        run.late = True
+                        self.breaker(name, key).record_failure()
+                        with self.lock:
+                            self.timed_out += 1
+                        if future.done():
+                            self._finished(name, key, future)
+                elif run.started is None and now >= queue_deadline:
+                    # Still queued behind probes that won't finish; it may
+                    # yet run, and is reported late if it does
+                    if not run.late:
+                        run.late = True
+                        with self.lock:
+                            self.skipped += 1
+                else:
+                    waiting.append((timeout, name, key, future))
+                    deadline = run.started + timeout if run.started is not None else now + QUEUE_POLL
+                    wake = deadline if wake is None else min(wake, deadline)
+            pending = waiting
+            if pending:
+                wait([future for _, _, _, future in pending], timeout=max(0.0, wake - time.monotonic()), return_when=FIRST_COMPLETED)
+        return results
+
+    def stats(self):
+        with self.lock:
+            return {
+                "completed": self.completed,
+                "timed_out": self.timed_out,
+                "skipped": self.skipped,
+                "inflight": len(self.inflight),
+                "open_breakers": [f"{name}:{key}" for (name, key), breaker in self.breakers.items() if breaker.state != "closed"],
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
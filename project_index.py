@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+
+from state_history import INDEX_FILE as HISTORY_INDEX_FILE
+
+# Cache file, kept per machine outside the projects folder: writing it there
+# would change the folder's mtime and make every refresh re-list it
+INDEX_PATH = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache"), "ProjectOrganizer", "project_index.json")
+
+# How often the watcher checks the projects folder for changes, in seconds
+REFRESH_INTERVAL = 5.0
+
+# Files inside a project whose modification times drive its metadata
+PROGRAMS_FILE = "current_programs.json"
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+# Cached list of project folders with per-project metadata (last close,
+# window count, saved state count). Startup reads the cache instead of
+# scanning the share; refresh() then re-lists the folder only when its
+# mtime changed and re-reads a project's files only when theirs did. The
+# organizer's own files live elsewhere, so only project folders coming and
+# going (or other people's files) change that mtime.
+class ProjectIndex:
+    def __init__(self, projects_path, store, path=INDEX_PATH, refresh_interval=REFRESH_INTERVAL):
+        self.projects_path = projects_path
+        self.path = path
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self.lock = threading.RLock()
+        self.listeners = []
+        self.thread = None
+        self.stopped = threading.Event()
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # A cache of some other projects folder is no use
+            if isinstance(data.get("projects"), dict) and data.get("root") == self.projects_path:
+                return data
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {"root": self.projects_path, "root_mtime": None, "projects": {}}
+
+    # Project names, from the cache if there is one
+    def names(self):
+        with self.lock:
+            if self.data["root_mtime"] is None:
+                self.refresh()
+            return sorted(self.data["projects"])
+
+    def get(self, name):
+        with self.lock:
+            entry = self.data["projects"].get(name)
+            return dict(entry) if entry is not None else None
+
+    # Call listener(names) from the refreshing thread whenever the index changes
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    # Bring the index up to date. Returns True if any project was added,
+    # removed or had its metadata change.
+    def refresh(self, force=False):
+        with self.lock:
+            projects = self.data["projects"]
+            changed = False
+            root_mtime = _mtime(self.projects_path)
+            if force or root_mtime != self.data["root_mtime"]:
+                try:
+                    names = {entry.name for entry in os.scandir(self.projects_path) if entry.is_dir()}
+                except OSError as e:
+                    print(f"Error reading project directory: {e}")
+                    return False
+                for name in set(projects) - names:
+                    del projects[name]
+                    changed = True
+                for name in names - set(projects):
+                    projects[name] = {}
+                    changed = True
+                self.data["root_mtime"] = root_mtime
+
+            for name in projects:
+                changed = self._refresh_project(name) or changed
+
+            if changed:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self.store.save(self.path, self.data)
+        if changed:
+            names = self.names()
+            for listener in self.listeners:
+                try:
+                    listener(names)
+                except Exception as e:
+                    print(f"Error updating project list: {e}")
+        return changed
+
+    # Re-read a project's programs and history only if they changed on disk
+    def _refresh_project(self, name):
+        entry = self.data["projects"][name]
+        project_path = os.path.join(self.projects_path, name)
+        programs_file = os.path.join(project_path, PROGRAMS_FILE)
+        history_file = os.path.join(project_path, "Savedstates", HISTORY_INDEX_FILE)
+        programs_mtime, history_mtime = _mtime(programs_file), _mtime(history_file)
+        changed = False
+
+        if "programs_mtime" not in entry or programs_mtime != entry["programs_mtime"]:
+            entry["programs_mtime"] = programs_mtime
+            entry["windows"] = 0
+            if programs_mtime is not None:
+                try:
+                    with open(programs_file, "r", encoding="utf-8") as f:
+                        entry["windows"] = len(json.load(f))
+                except (OSError, ValueError):
+                    pass
+            changed = True
+
+        if "history_mtime" not in entry or history_mtime != entry["history_mtime"]:
+            entry["history_mtime"] = history_mtime
+            entry["states"] = 0
+            entry["last_closed"] = None
+            if history_mtime is not None:
+                try:
+                    with open(history_file, "r", encoding="utf-8") as f:
+                        states = json.load(f).get("states", [])
+                    entry["states"] = len(states)
+                    entry["last_closed"] = states[-1]["time"] if states else None
+                except (OSError, ValueError, KeyError):
+                    pass
+            changed = True
+        return changed
+
+    # Refresh on a background thread every refresh_interval
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._watch, name="project-index", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread = None
+
+    # The first refresh runs right away, so a stale cache used at startup
+    # is corrected without waiting a full interval
+    def _watch(self):
+        while not self.stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing project index: {e}")
+            self.stopped.wait(self.refresh_interval)
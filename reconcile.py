@@ -0,0 +1,224 @@
+import threading
+
+
+# Stable key for a window: its handle, its process, and when that process
+# started, so a handle or pid reused after the original went away gets a
+# new key. The title is an attribute that can change under the same key.
+def window_id(hwnd, pid, started):
+    started = "" if started is None else f"{started:.3f}"
+    return f"{hwnd}:{'' if pid is None else pid}:{started}"
+
+
+# Handle and pid encoded in a window id
+def parse_window_id(key):
+    hwnd, pid, _ = key.split(":", 2)
+    return int(hwnd), int(pid) if pid else None
+
+
+# Scan results indexed by window handle, id, title and pid. Writes come from
+# the update thread; hwnds_for_pid may be called from probe threads.
+class WindowIndex:
+    def __init__(self, windows=()):
+        self.by_hwnd = {}
+        self.by_id = {}
+        self.by_title = {}
+        self.by_pid = {}
+        self.lock = threading.Lock()
+        for window in windows:
+            self.add(window)
+
+    def __len__(self):
+        return len(self.by_hwnd)
+
+    def __contains__(self, hwnd):
+        return hwnd in self.by_hwnd
+
+    def values(self):
+        return self.by_hwnd.values()
+
+    def titles(self):
+        return self.by_title.keys()
+
+    def get(self, hwnd):
+        return self.by_hwnd.get(hwnd)
+
+    def get_by_id(self, key):
+        return self.by_id.get(key)
+
+    def ids(self):
+        return self.by_id.keys()
+
+    # First window with this title (titles aren't unique)
+    def get_by_title(self, title):
+        hwnds = self.by_title.get(title)
+        if not hwnds:
+            return None
+        return self.by_hwnd[next(iter(hwnds))]
+
+    def has_pid(self, pid):
+        return pid in self.by_pid
+
+    def hwnds_for_pid(self, pid):
+        with self.lock:
+            return list(self.by_pid.get(pid, ()))
+
+    # Add or replace a window, returning the metadata it replaced
+    def add(self, window):
+        old = self.remove(window["hwnd"])
+        with self.lock:
+            self.by_hwnd[window["hwnd"]] = window
+            self.by_id[window["id"]] = window
+            self.by_title.setdefault(window["title"], {})[window["hwnd"]] = None
+            self.by_pid.setdefault(window.get("pid"), {})[window["hwnd"]] = None
+        return old
+
+    def remove(self, hwnd):
+        with self.lock:
+            window = self.by_hwnd.pop(hwnd, None)
+            if window is None:
+                return None
+            self.by_id.pop(window["id"], None)
+            for table, key in ((self.by_title, window["title"]), (self.by_pid, window.get("pid"))):
+                hwnds = table[key]
+                del hwnds[hwnd]
+                if not hwnds:
+                    del table[key]
+        return window
+
+
+# Assignments dict that remembers which keys changed since the last
+# reconciliation, so the tree can be updated without re-reading everything
+class TrackedAssignments(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dirty = set(self)
+        self.dirty_lock = threading.Lock()
+
+    def _mark(self, key):
+        with self.dirty_lock:
+            self.dirty.add(key)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._mark(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._mark(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            self._mark(key)
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._mark(key)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        with self.dirty_lock:
+            self.dirty.update(self)
+        super().clear()
+
+    def take_dirty(self):
+        with self.dirty_lock:
+            dirty, self.dirty = self.dirty, set()
+        return dirty
+
+
+# Minimal set of tree operations between two assignment snapshots
+class TreeChanges:
+    def __init__(self):
+        self.groups = []
+        self.inserts = []
+        self.deletes = []
+        self.moves = []
+
+    def __bool__(self):
+        return bool(self.groups or self.inserts or self.deletes or self.moves)
+
+    # Every project whose membership changed
+    def projects(self):
+        projects = set(self.groups)
+        projects.update(project for _, project in self.inserts)
+        projects.update(project for _, project in self.deletes)
+        for _, old_project, new_project in self.moves:
+            projects.add(old_project)
+            projects.add(new_project)
+        return projects
+
+    # Replay the changes onto a plain {window: project} dict
+    def apply_to(self, mapping):
+        for window, _ in self.deletes:
+            mapping.pop(window, None)
+        for window, project in self.inserts:
+            mapping[window] = project
+        for window, _, project in self.moves:
+            mapping[window] = project
+
+
+# Keeps track of what the assigned-windows tree shows and computes the
+# inserts, deletes and moves needed to bring it in line with assignments
+class TreeReconciler:
+    def __init__(self):
+        self.rendered = {}
+        self.members = {}
+
+    # Whether assignments changed since the last reconcile
+    def pending(self, assignments):
+        if isinstance(assignments, TrackedAssignments):
+            return bool(assignments.dirty)
+        return assignments != self.rendered
+
+    def reconcile(self, assignments):
+        changes = TreeChanges()
+        if isinstance(assignments, TrackedAssignments):
+            keys = assignments.take_dirty()
+        else:
+            keys = set(self.rendered).union(assignments)
+
+        for window in keys:
+            old_project = self.rendered.get(window)
+            new_project = assignments.get(window)
+            if old_project == new_project:
+                continue
+            if new_project is not None and new_project not in self.members:
+                self.members[new_project] = set()
+                changes.groups.append(new_project)
+            if old_project is None:
+                changes.inserts.append((window, new_project))
+            elif new_project is None:
+                changes.deletes.append((window, old_project))
+            else:
+                changes.moves.append((window, old_project, new_project))
+            if old_project is not None:
+                self.members[old_project].discard(window)
+                if not self.members[old_project]:
+                    del self.members[old_project]
+                del self.rendered[window]
+            if new_project is not None:
+                self.members[new_project].add(window)
+                self.rendered[window] = new_project
+        return changes
+
+
+# Queue reconciliation results for a project-grouped LazyTree, looking up
+# each window's metadata (and so its title) through metadata_for(window)
+def apply_tree_changes(view, changes, metadata_for):
+    for project in changes.groups:
+        view.insert("", project, text=project, open=True)
+    for window, _ in changes.deletes:
+        view.delete(window)
+    for window, project in changes.inserts + [(window, project) for window, _, project in changes.moves]:
+        metadata = metadata_for(window)
+        view.insert(project, window, metadata, text=metadata["title"] if metadata else window)
@@ -0,0 +1,361 @@
+import bisect
+import heapq
+import itertools
+import json
+import os
+import re
+import threading
+
+from persistence import dump_json, write_atomic
+from state_history import INDEX_FILE as HISTORY_INDEX_FILE, StateHistory
+
+# Search cache for saved states. It's derived from the synced Savedstates
+# folders, so each machine keeps its own rather than syncing it.
+HISTORY_SEARCH_PATH = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache"), "ProjectOrganizer", "history_search.json")
+
+# Prefixes up to this long get their own postings; longer ones are looked
+# up as a range of the sorted vocabulary
+PREFIX_LENGTH = 3
+
+# Most results returned by a search
+SEARCH_LIMIT = 200
+
+# Above this many matching history entries, results are found by walking
+# entries newest first instead of ranking every match
+DENSE_RESULTS = 5000
+
+# Bumped when the cached entries' meaning changes, so older caches are rebuilt
+CACHE_VERSION = 3
+
+# Letters and digits; paths, URLs and titles all split on everything else
+TOKEN = re.compile(r"[^\W_]+")
+
+EMPTY = frozenset()
+
+
+def tokenize(text):
+    return set(TOKEN.findall(text.lower())) if text else set()
+
+
+# Searchable text of a window: title, process, Chrome URL and VS Code workspace
+def window_tokens(window):
+    workspace = window.get("vscode_workspace")
+    if isinstance(workspace, (list, tuple)):
+        workspace = " ".join(str(part) for part in workspace)
+    tokens = set()
+    for value in (window.get("title"), window.get("process_name"), window.get("chrome_url"), workspace):
+        if value:
+            tokens |= tokenize(str(value))
+    return tokens
+
+
+# Identity of a saved window in the history entry table: project, title,
+# process, URL and workspace. title is used when the window has none.
+def entry_key(project, window, title=""):
+    workspace = window.get("vscode_workspace")
+    if isinstance(workspace, (list, tuple)):
+        workspace = " ".join(str(part) for part in workspace)
+    return (project, window.get("title") or title, window.get("process_name") or "", window.get("chrome_url") or "", workspace or "")
+
+
+# Searchable text of a history entry
+def entry_tokens(entry):
+    return tokenize(" ".join(entry[1:5]))
+
+
+# History entry ids newest first, the same per project, and each project's
+# ids as a set; used to answer broad queries without ranking every match
+def recency_orders(entries):
+    recent = sorted(range(len(entries)), key=lambda doc: -entries[doc][6])
+    by_project = {}
+    for doc in recent:
+        by_project.setdefault(entries[doc][0], []).append(doc)
+    return recent, by_project, {project: set(docs) for project, docs in by_project.items()}
+
+
+# Token -> documents map that answers prefix queries: every query word must
+# be a prefix of some token of a document ("chr git" finds Chrome on GitHub).
+class InvertedIndex:
+    def __init__(self):
+        self.postings = {}
+        self.prefixes = {}
+        self.vocabulary = []
+
+    def add(self, doc, tokens):
+        for token in tokens:
+            docs = self.postings.get(token)
+            if docs is None:
+                docs = self.postings[token] = set()
+                bisect.insort(self.vocabulary, token)
+            docs.add(doc)
+            for length in range(1, min(len(token), PREFIX_LENGTH) + 1):
+                self.prefixes.setdefault(token[:length], set()).add(doc)
+
+    # tokens must be all of doc's tokens, as given to add()
+    def remove(self, doc, tokens):
+        for token in tokens:
+            docs = self.postings.get(token)
+            if docs is None:
+                continue
+            docs.discard(doc)
+            if not docs:
+                del self.postings[token]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+            for length in range(1, min(len(token), PREFIX_LENGTH) + 1):
+                prefix = token[:length]
+                docs = self.prefixes.get(prefix)
+                if docs is not None:
+                    docs.discard(doc)
+                    if not docs:
+                        del self.prefixes[prefix]
+
+    # Documents with a token starting with prefix
+    def prefix_docs(self, prefix):
+        if len(prefix) <= PREFIX_LENGTH:
+            return self.prefixes.get(prefix, EMPTY)
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        sets = []
+        for token in itertools.islice(self.vocabulary, start, None):
+            if not token.startswith(prefix):
+                break
+            sets.append(self.postings[token])
+        if len(sets) == 1:
+            return sets[0]
+        return set().union(*sets)
+
+    # Documents matching every word of query, or None for an empty query.
+    # The smallest sets are intersected first. The result may be one of the
+    # index's own sets, so callers must not modify it.
+    def search(self, query):
+        words = tokenize(query)
+        if not words:
+            return None
+        sets = sorted((self.prefix_docs(word) for word in words), key=len)
+        result = sets[0]
+        for docs in sets[1:]:
+            if not result:
+                break
+            result = result & docs
+        return result
+
+
+# Live windows, kept current from the update loop's deltas
+class WindowSearch:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.index = InvertedIndex()
+        self.windows = {}
+        self.tokens = {}
+
+    def __len__(self):
+        return len(self.windows)
+
+    def add(self, window):
+        with self.lock:
+            self._remove(window["id"])
+            tokens = window_tokens(window)
+            self.windows[window["id"]] = window
+            self.tokens[window["id"]] = tokens
+            self.index.add(window["id"], tokens)
+
+    def remove(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        tokens = self.tokens.pop(key, None)
+        if tokens is not None:
+            del self.windows[key]
+            self.index.remove(key, tokens)
+
+    # Apply one batch of scan deltas
+    def apply(self, added, removed, updated):
+        for window in removed:
+            self.remove(window["id"])
+        for window in added + updated:
+            self.add(window)
+
+    # Metadata of the windows matching query, sorted by title
+    def search(self, query, limit=SEARCH_LIMIT):
+        with self.lock:
+            keys = self.index.search(query)
+            if keys is None:
+                return []
+            windows = [self.windows[key] for key in itertools.islice(keys, limit)]
+        return sorted(windows, key=lambda window: window["title"].lower())
+
+
+# Windows from every project's saved states, for "which project had this
+# open" queries. Each distinct (project, title, process, URL, workspace) is
+# one entry with the first and last time it was saved. The entry table is
+# cached on disk with how far each project's history has been read, so
+# refresh() only reads snapshots saved since; the token index over it is
+# rebuilt in memory when the cache is loaded.
+#
+# refresh() calls are serialized and are the only writers; searches from
+# other threads see their changes once each project is applied.
+class HistorySearch:
+    def __init__(self, projects_path, path=HISTORY_SEARCH_PATH):
+        self.projects_path = projects_path
+        self.path = path
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.ready = False
+        self.projects = {}
+        self.entries = []
+        self.keys = {}
+        self.index = InvertedIndex()
+        self.recent = []
+        self.by_project = {}
+        self.project_docs = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION:
+                return
+            projects, entries = data["projects"], data["entries"]
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            print(f"Error reading history search cache: {e}")
+            return
+        self._rebuild(projects, entries)
+
+    # Index a whole entry table off to the side, then switch to it
+    def _rebuild(self, projects, entries):
+        index, keys = InvertedIndex(), {}
+        for doc, entry in enumerate(entries):
+            keys[tuple(entry[:5])] = doc
+            index.add(doc, entry_tokens(entry))
+        orders = recency_orders(entries)
+        with self.lock:
+            self.projects, self.entries, self.keys, self.index = projects, entries, keys, index
+            self.recent, self.by_project, self.project_docs = orders
+
+    def save(self):
+        data = {"version": CACHE_VERSION, "projects": self.projects, "entries": self.entries}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        write_atomic(self.path, dump_json(data, compact=True))
+
+    # Record one saved window; entry layout is
+    # [project, title, process_name, chrome_url, workspace, first_seen, last_seen]
+    def add_entry(self, project, window, timestamp):
+        self._merge(entry_key(project, window), timestamp, timestamp)
+
+    # Widen an entry's first and last seen times, adding it if it's new
+    def _merge(self, key, first_seen, last_seen):
+        doc = self.keys.get(key)
+        if doc is not None:
+            entry = self.entries[doc]
+            entry[5] = min(entry[5], first_seen)
+            entry[6] = max(entry[6], last_seen)
+            return
+        entry = list(key) + [first_seen, last_seen]
+        doc = self.keys[key] = len(self.entries)
+        self.entries.append(entry)
+        self.index.add(doc, entry_tokens(entry))
+
+    # Index snapshots saved since the last refresh, loading the cache first
+    # if this is the first. Returns True if anything was added.
+    def refresh(self, project_names):
+        with self.refresh_lock:
+            if not self.ready:
+                self._load()
+            changed = False
+            for project in project_names:
+                changed = self._refresh_project(project) or changed
+            if changed:
+                # Only the refreshing thread writes, so the orders can be built unlocked
+                orders = recency_orders(self.entries)
+                with self.lock:
+                    self.recent, self.by_project, self.project_docs = orders
+                try:
+                    self.save()
+                except OSError as e:
+                    print(f"Error saving history search cache: {e}")
+            self.ready = True
+            return changed
+
+    def _refresh_project(self, project):
+        savestate_path = os.path.join(self.projects_path, project, "Savedstates")
+        index_file = os.path.join(savestate_path, HISTORY_INDEX_FILE)
+        try:
+            mtime = os.stat(index_file).st_mtime
+        except OSError:
+            return False
+        known = self.projects.get(project)
+        if known is not None and known["mtime"] == mtime:
+            return False
+
+        history = StateHistory(savestate_path)
+        log = history.log_name()
+        if known is not None and known["log"] != log:
+            # The log was compacted, so its ids and offsets were rewritten;
+            # start this project over
+            self._rebuild({name: value for name, value in self.projects.items() if name != project},
+                          [entry for entry in self.entries if entry[0] != project])
+            known = None
+        # Every window in each snapshot counts as seen then, not only the
+        # ones the snapshot's delta record stored. The history is replayed
+        # without the lock, folding each window's sightings into one time
+        # range, so searches only wait for the merge.
+        last_state = known["state"] if known is not None else 0
+        seen = {}
+        for state_id, timestamp, windows in history.states(last_state):
+            for key, window in windows.items():
+                times = seen.setdefault(entry_key(project, window, key), [timestamp, timestamp])
+                times[0] = min(times[0], timestamp)
+                times[1] = max(times[1], timestamp)
+            last_state = state_id
+        with self.lock:
+            for key, (first_seen, last_seen) in seen.items():
+                self._merge(key, first_seen, last_seen)
+            self.projects[project] = {"log": log, "state": last_state, "mtime": mtime}
+        return True
+
+    # Saved windows matching query, most recently seen first
+    def search(self, query, limit=SEARCH_LIMIT):
+        with self.lock:
+            docs = self.index.search(query)
+            if not docs:
+                return []
+            if len(docs) > DENSE_RESULTS:
+                # Most entries match, so the newest matches come up quickly
+                picked = list(itertools.islice((doc for doc in self.recent if doc in docs), limit))
+            else:
+                picked = heapq.nlargest(limit, docs, key=lambda doc: self.entries[doc][6])
+            entries = [self.entries[doc] for doc in picked]
+        return [
+            {"project": entry[0], "title": entry[1], "process_name": entry[2], "chrome_url": entry[3],
+             "vscode_workspace": entry[4], "first_seen": entry[5], "last_seen": entry[6]}
+            for entry in entries
+        ]
+
+    # [{"project", "matches", "last_seen"}] for the projects that had a
+    # window matching query open, most recent first
+    def projects_for(self, query):
+        with self.lock:
+            docs = self.index.search(query)
+            if not docs:
+                return []
+            projects = []
+            if len(docs) > DENSE_RESULTS:
+                for project, project_docs in self.project_docs.items():
+                    matches = len(docs & project_docs)
+                    if matches:
+                        newest = next(doc for doc in self.by_project[project] if doc in docs)
+                        projects.append({"project": project, "matches": matches, "last_seen": self.entries[newest][6]})
+            else:
+                found = {}
+                for doc in docs:
+                    entry = self.entries[doc]
+                    project = found.setdefault(entry[0], {"project": entry[0], "matches": 0, "last_seen": 0})
+                    project["matches"] += 1
+                    project["last_seen"] = max(project["last_seen"], entry[6])
+                projects = list(found.values())
+        return sorted(projects, key=lambda project: -project["last_seen"])
@@ -0,0 +1,245 @@
+import argparse
+import hmac
+import json
+import os
+import secrets
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import organizer
+from lazy_tree import TreeModel
+from persistence import write_atomic
+from reconcile import TrackedAssignments, WindowIndex
+from service_client import SERVICE_FILE, TOKEN_HEADER
+from time_tracking import ActivitySampler
+
+# Events kept for clients to catch up on; one that falls further behind
+# is told to take a fresh snapshot
+EVENT_BACKLOG = 10000
+
+# Longest a client may wait in one events request, in seconds
+MAX_EVENT_WAIT = 60.0
+
+
+# Sequenced log of change events. Publishers append; clients long-poll for
+# everything after the last sequence number they saw.
+class EventLog:
+    def __init__(self, capacity=EVENT_BACKLOG):
+        self.lock = threading.RLock()
+        self.changed = threading.Condition(self.lock)
+        self.events = deque(maxlen=capacity)
+        self.last = 0
+
+    def publish(self, event):
+        with self.lock:
+            self.last += 1
+            self.events.append((self.last, event))
+            self.changed.notify_all()
+
+    # (events after sequence number after, last sequence number, reset).
+    # reset means the events the client needs can't be given to it.
+    def since(self, after, timeout=0.0):
+        with self.lock:
+            if after >= self.last and timeout > 0:
+                self.changed.wait_for(lambda: self.last > after, timeout)
+            first = self.events[0][0] if self.events else self.last + 1
+            # Behind the backlog, or ahead of it (the service restarted)
+            if after + 1 < first or after > self.last:
+                return [], self.last, True
+            return [event for sequence, event in self.events if sequence > after], self.last, False
+
+
+# The window tracker without the GUI: the update loop, time tracking and
+# project index run here once, and any number of clients query and control
+# them over the local JSON API.
+class OrganizerService:
+    def __init__(self):
+        organizer.init()
+        self.events = EventLog()
+        self.assignments = TrackedAssignments()
+        self.last_assignments = {}
+        self.new_assignments = {}
+        self.index = WindowIndex()
+        self.assigned_view = TreeModel("assigned", self.events.publish, self.events.lock)
+        self.new_windows_view = TreeModel("new", self.events.publish, self.events.lock)
+        self.sampler = ActivitySampler(organizer.activity_log, organizer.backend, lambda hwnd: organizer.window_activity(self.assignments, hwnd))
+        self.update_thread = None
+
+    def start(self):
+        organizer.close_pipeline.on_progress = self._report_close_progress
+        organizer.project_index.add_listener(lambda names: self.events.publish({"type": "projects", "projects": names}))
+        organizer.project_index.add_listener(organizer.refresh_history_search)
+        organizer.project_index.start()
+        organizer.refresh_history_search()
+        self.sampler.start()
+        self.update_thread = threading.Thread(
+            target=organizer.update_assignments,
+            args=(self.assigned_view, self.new_windows_view, self.assignments, self.last_assignments, self.new_assignments),
+            kwargs={"index": self.index},
+            name="update",
+            daemon=True,
+        )
+        self.update_thread.start()
+
+    def stop(self):
+        self.sampler.stop()
+        organizer.project_index.stop()
+        organizer.json_store.flush()
+
+    def _report_close_progress(self, project, stage, state, error):
+        self.events.publish({"type": "progress", "message": organizer.describe_close_progress(project, stage, state, error)})
+
+    def status(self):
+        with self.events.lock:
+            last = self.events.last
+        return {"pid": os.getpid(), "windows": len(self.index), "assignments": len(self.assignments), "last": last}
+
+    def projects(self):
+        return [dict(organizer.project_index.get(name) or {}, name=name) for name in organizer.project_index.names()]
+
+    def windows(self):
+        with self.index.lock:
+            return list(self.index.values())
+
+    def views(self):
+        with self.events.lock:
+            return {
+                "last": self.events.last,
+                "views": {"assigned": self.assigned_view.snapshot(), "new": self.new_windows_view.snapshot()},
+            }
+
+    def assign(self, window_ids, project):
+        with self.events.lock:
+            assigned = organizer.assign_windows(window_ids, project, self.assignments, self.assigned_view, self.new_windows_view)
+        return {"assigned": list(assigned)}
+
+    def close(self, project, notes=""):
+        if project not in organizer.project_index.names():
+            raise ValueError(f"no project named {project}")
+        future = organizer.close_active_project(project, self.assignments, self.assigned_view, notes=notes)
+        return {"closing": future is not None}
+
+    def restore(self, project):
+        if project not in organizer.project_index.names():
+            raise ValueError(f"no project named {project}")
+
+        def report(message):
+            self.events.publish({"type": "progress", "message": message})
+
+        threading.Thread(target=organizer.restore_project, args=(project, self.assignments, report), daemon=True).start()
+        return {"restoring": True}
+
+
+class ServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, token):
+        super().__init__(address, ServiceHandler)
+        self.service = service
+        self.token = token
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self):
+        token = self.headers.get(TOKEN_HEADER) or ""
+        if hmac.compare_digest(token.encode("utf-8"), self.server.token.encode("utf-8")):
+            return True
+        self._send(401, {"error": "bad or missing token"})
+        return False
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        service = self.server.service
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        try:
+            if url.path == "/status":
+                self._send(200, service.status())
+            elif url.path == "/projects":
+                self._send(200, {"projects": service.projects()})
+            elif url.path == "/windows":
+                self._send(200, {"windows": service.windows()})
+            elif url.path == "/assignments":
+                self._send(200, {"assignments": dict(service.assignments)})
+            elif url.path == "/views":
+                self._send(200, service.views())
+            elif url.path == "/search":
+                self._send(200, organizer.search_windows(query.get("q", [""])[0], service.assignments))
+            elif url.path == "/metrics":
+                self._send(200, organizer.metrics.snapshot())
+            elif url.path == "/events":
+                after = int(query.get("after", ["0"])[0])
+                timeout = min(float(query.get("timeout", ["0"])[0]), MAX_EVENT_WAIT)
+                events, last, reset = service.events.since(after, timeout)
+                self._send(200, {"events": events, "last": last, "reset": reset})
+            else:
+                self._send(404, {"error": f"no such endpoint {url.path}"})
+        except ValueError as e:
+            self._send(400, {"error": str(e)})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        service = self.server.service
+        path = urlsplit(self.path).path
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if path == "/assign":
+                self._send(200, service.assign(body["windows"], body["project"]))
+            elif path == "/close":
+                self._send(200, service.close(body["project"], body.get("notes", "")))
+            elif path == "/restore":
+                self._send(200, service.restore(body["project"]))
+            else:
+                self._send(404, {"error": f"no such endpoint {path}"})
+        except (KeyError, TypeError, ValueError) as e:
+            self._send(400, {"error": f"bad request: {e}"})
+
+
+# Run the service until interrupted. The port and a fresh access token are
+# written to SERVICE_FILE for clients to find; it's removed on the way out.
+def serve(port=0, service_file=SERVICE_FILE):
+    service = OrganizerService()
+    token = secrets.token_urlsafe(24)
+    server = ServiceServer(("127.0.0.1", port), service, token)
+    os.makedirs(os.path.dirname(service_file), exist_ok=True)
+    write_atomic(service_file, json.dumps({"port": server.server_address[1], "token": token, "pid": os.getpid()}))
+    service.start()
+    print(f"Organizer service listening on 127.0.0.1:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        try:
+            os.remove(service_file)
+        except OSError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Track windows and projects in the background")
+    parser.add_argument("--port", type=int, default=0, help="port to listen on (default: any free port)")
+    args = parser.parse_args()
+    serve(args.port)
+
+
+if __name__ == "__main__":
+    main()
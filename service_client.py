@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+# Where a running service records its port and access token. It's per user
+# and per machine, like the activity log.
+SERVICE_FILE = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache"), "ProjectOrganizer", "service.json")
+
+# Header carrying the access token
+TOKEN_HEADER = "X-Organizer-Token"
+
+# How long one events request waits for something to happen, in seconds
+EVENT_POLL_TIMEOUT = 25.0
+
+# How long to wait before reconnecting after the service went away
+RECONNECT_DELAY = 2.0
+
+
+class ServiceError(Exception):
+    pass
+
+
+# Client for the organizer service's local JSON API
+class ServiceClient:
+    def __init__(self, port, token, host="127.0.0.1"):
+        self.base = f"http://{host}:{port}"
+        self.token = token
+
+    # Client for the running service, or None if there isn't one
+    @classmethod
+    def discover(cls, service_file=SERVICE_FILE):
+        try:
+            with open(service_file, "r", encoding="utf-8") as f:
+                info = json.load(f)
+            client = cls(info["port"], info["token"])
+            client.status()
+            return client
+        except (OSError, ValueError, KeyError, ServiceError):
+            return None
+
+    def _request(self, method, path, body=None, timeout=10.0):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(self.base + path, data=data, method=method)
+        request.add_header(TOKEN_HEADER, self.token)
+        if data is not None:
+            request.add_header("Content-Type", "application/json")
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.load(e).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise ServiceError(f"{method} {path}: {message}") from None
+        except (urllib.error.URLError, OSError) as e:
+            raise ServiceError(f"{method} {path}: {e}") from None
+
+    def status(self):
+        return self._request("GET", "/status")
+
+    def projects(self):
+        return self._request("GET", "/projects")["projects"]
+
+    def windows(self):
+        return self._request("GET", "/windows")["windows"]
+
+    def assignments(self):
+        return self._request("GET", "/assignments")["assignments"]
+
+    # Open windows matching query, and projects that had a match open
+    def search(self, query):
+        return self._request("GET", "/search?" + urllib.parse.urlencode({"q": query}))
+
+    def metrics(self):
+        return self._request("GET", "/metrics")
+
+    # Rows of both trees plus the sequence number to follow events from
+    def views(self):
+        return self._request("GET", "/views")
+
+    # Events after sequence number after, waiting up to timeout for one
+    def events(self, after, timeout=EVENT_POLL_TIMEOUT):
+        query = urllib.parse.urlencode({"after": after, "timeout": timeout})
+        return self._request("GET", f"/events?{query}", timeout=timeout + 10)
+
+    def assign(self, window_ids, project):
+        return self._request("POST", "/assign", {"windows": list(window_ids), "project": project})
+
+    def close(self, project, notes=""):
+        return self._request("POST", "/close", {"project": project, "notes": notes})
+
+    def restore(self, project):
+        return self._request("POST", "/restore", {"project": project})
+
+
+# Follow the service's views: on_snapshot(views) with every row, then
+# on_event(event) for each change. Reconnects (and re-snapshots) if the
+# service restarts or the client fell too far behind. Runs until stopped
+# is set, if given.
+def follow(client, on_snapshot, on_event, stopped=None):
+    after = None
+    while stopped is None or not stopped.is_set():
+        try:
+            if after is None:
+                snapshot = client.views()
+                on_snapshot(snapshot["views"])
+                after = snapshot["last"]
+            result = client.events(after)
+            if result["reset"]:
+                after = None
+                continue
+            for event in result["events"]:
+                on_event(event)
+            after = result["last"]
+        except ServiceError as e:
+            print(f"Lost connection to the organizer service: {e}")
+            after = None
+            time.sleep(RECONNECT_DELAY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and control the organizer service")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="show service status")
+    commands.add_parser("projects", help="list projects")
+    commands.add_parser("windows", help="list open windows and their projects")
+    commands.add_parser("metrics", help="show the service's timing metrics")
+    search = commands.add_parser("search", help="find open windows, and projects that had them open")
+    search.add_argument("query", nargs="+")
+    assign = commands.add_parser("assign", help="assign windows to a project")
+    assign.add_argument("project")
+    assign.add_argument("windows", nargs="+", help="window ids (see 'windows')")
+    close = commands.add_parser("close", help="close a project")
+    close.add_argument("project")
+    close.add_argument("--notes", default="", help="closing notes to commit with the project")
+    restore = commands.add_parser("restore", help="reopen a project's saved windows")
+    restore.add_argument("project")
+    commands.add_parser("watch", help="print change events as they happen")
+    args = parser.parse_args()
+
+    client = ServiceClient.discover()
+    if client is None:
+        print("The organizer service isn't running (start it with 'python service.py').")
+        sys.exit(1)
+
+    try:
+        if args.command == "projects":
+            for project in client.projects():
+                print(f"{project['name']:<40} {project.get('windows', 0):>4} windows  {project.get('states', 0):>4} states")
+        elif args.command == "windows":
+            assignments = client.assignments()
+            for window in client.windows():
+                project = assignments.get(window["id"], "-")
+                print(f"{window['id']:<32} {project:<24} {window.get('process_name') or '':<20} {window['title']}")
+        elif args.command == "search":
+            found = client.search(" ".join(args.query))
+            for window in found["windows"]:
+                print(f"{window['id']:<32} {window.get('project') or '-':<24} {window['title']}")
+            for project in found["projects"]:
+                print(f"previously in {project['project']}: {project['matches']} windows, last saved {time.strftime('%Y-%m-%d %H:%M', time.localtime(project['last_seen']))}")
+        elif args.command == "assign":
+            print(json.dumps(client.assign(args.windows, args.project), indent=4))
+        elif args.command == "close":
+            print(json.dumps(client.close(args.project, args.notes), indent=4))
+        elif args.command == "restore":
+            print(json.dumps(client.restore(args.project), indent=4))
+        elif args.command == "watch":
+            after = client.status()["last"]
+            while True:
+                result = client.events(after)
+                for event in result["events"]:
+                    print(json.dumps(event))
+                after = result["last"]
+        else:
+            print(json.dumps(getattr(client, args.command)(), indent=4))
+    except ServiceError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
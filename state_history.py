@@ -0,0 +1,275 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+from persistence import dump_json, write_atomic
+
+# Files kept in a project's Savedstates folder
+INDEX_FILE = "history_index.json"
+LOG_FILE = "history.jsonl"
+
+# Every this many snapshots one is stored in full, so a restore never has
+# to replay more than this many deltas
+KEYFRAME_INTERVAL = 50
+
+# Most snapshots kept; older ones are dropped by compaction once the
+# history grows a tenth past this
+MAX_STATES = 1000
+
+# Snapshot files written by earlier versions, imported on first use and
+# then moved into a subfolder of Savedstates rather than deleted
+LEGACY_STATE = re.compile(r"^state(\d+)\.json$")
+LEGACY_DIR = "legacy"
+
+# Marker for keys missing from the previous state, so a key explicitly set
+# to None still counts as a change
+MISSING = object()
+
+
+# Append-only snapshot history for one project. Each snapshot is one line
+# in a log: either the full state or only the windows that changed since
+# the previous one. A small index holds the counter, timestamps and byte
+# offsets, so adding a snapshot or restoring one doesn't list the folder
+# or read the whole log.
+class StateHistory:
+    def __init__(self, path, keyframe_interval=KEYFRAME_INTERVAL, max_states=MAX_STATES):
+        self.path = path
+        self.index_path = os.path.join(path, INDEX_FILE)
+        self.keyframe_interval = keyframe_interval
+        self.max_states = max_states
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            self.index = {"next": 1, "states": []}
+            self._import_legacy()
+            return self.index
+        except (OSError, ValueError) as e:
+            print(f"Error reading state history index {self.index_path}: {e}")
+            return {"next": 1, "states": []}
+
+    # Fold stateN.json files from the old layout into the log, oldest first,
+    # then move the originals into the legacy folder
+    def _import_legacy(self):
+        try:
+            names = [name for name in os.listdir(self.path) if LEGACY_STATE.match(name)]
+        except OSError:
+            return
+        imported = []
+        for name in sorted(names, key=lambda name: int(LEGACY_STATE.match(name).group(1))):
+            file_path = os.path.join(self.path, name)
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                self._append(state, os.path.getmtime(file_path))
+                imported.append(file_path)
+            except (OSError, ValueError) as e:
+                print(f"Error importing saved state {file_path}: {e}")
+        self._save_index()
+        if not imported:
+            return
+        legacy_path = os.path.join(self.path, LEGACY_DIR)
+        try:
+            os.makedirs(legacy_path, exist_ok=True)
+            for file_path in imported:
+                os.replace(file_path, os.path.join(legacy_path, os.path.basename(file_path)))
+        except OSError as e:
+            print(f"Error moving imported saved states to {legacy_path}: {e}")
+            return
+        print(f"Imported {len(imported)} saved states into {self.log_path}; the originals are in {legacy_path}")
+
+    # The index names the log it describes, so compaction can write a new
+    # log and switch to it with a single atomic index write
+    @property
+    def log_path(self):
+        return os.path.join(self.path, self.index.get("log", LOG_FILE))
+
+    def _save_index(self):
+        write_atomic(self.index_path, dump_json(self.index, compact=True))
+
+    def __len__(self):
+        with self.lock:
+            return len(self.index["states"])
+
+    # [(id, timestamp)] oldest first
+    def list(self):
+        with self.lock:
+            return [(entry["id"], entry["time"]) for entry in self.index["states"]]
+
+    def latest_id(self):
+        with self.lock:
+            states = self.index["states"]
+            return states[-1]["id"] if states else None
+
+    # Record a snapshot and return its id
+    def snapshot(self, state, timestamp=None):
+        with self.lock:
+            state_id = self._append(state, time.time() if timestamp is None else timestamp)
+            self._save_index()
+            if self.max_states is not None and len(self.index["states"]) > self.max_states * 1.1:
+                self._prune(self.max_states)
+            return state_id
+
+    def _append(self, state, timestamp):
+        states = self.index["states"]
+        keyframe = not states or len(states) - self._last_keyframe_position() >= self.keyframe_interval
+        state_id = self.index["next"]
+        record = {"id": state_id}
+        if keyframe:
+            record["set"] = state
+        else:
+            previous = self._restore_position(len(states) - 1)
+            record["set"] = {key: value for key, value in state.items() if previous.get(key, MISSING) != value}
+            record["removed"] = [key for key in previous if key not in state]
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+        with open(self.log_path, "ab") as f:
+            f.seek(0, os.SEEK_END)
+            offset = f.tell()
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+        states.append({"id": state_id, "time": timestamp, "offset": offset, "length": len(line), "key": keyframe})
+        self.index["next"] = state_id + 1
+        return state_id
+
+    def _last_keyframe_position(self):
+        states = self.index["states"]
+        for position in range(len(states) - 1, -1, -1):
+            if states[position]["key"]:
+                return position
+        return 0
+
+    # The full state for a snapshot id
+    def restore(self, state_id):
+        with self.lock:
+            for position, entry in enumerate(self.index["states"]):
+                if entry["id"] == state_id:
+                    return self._restore_position(position)
+        raise KeyError(state_id)
+
+    def restore_latest(self):
+        with self.lock:
+            if not self.index["states"]:
+                return None
+            return self._restore_position(len(self.index["states"]) - 1)
+
+    # Read from the nearest keyframe at or before position and replay the
+    # deltas up to it
+    def _restore_position(self, position):
+        states = self.index["states"]
+        start = position
+        while not states[start]["key"]:
+            start -= 1
+        begin = states[start]["offset"]
+        end = states[position]["offset"] + states[position]["length"]
+
+        with open(self.log_path, "rb") as f:
+            f.seek(begin)
+            data = f.read(end - begin)
+
+        # Records are sliced out by their indexed offsets, so bytes left by
+        # an interrupted write in between are never parsed
+        state = {}
+        for entry in states[start:position + 1]:
+            record = json.loads(data[entry["offset"] - begin:entry["offset"] - begin + entry["length"]])
+            for key in record.get("removed", ()):
+                state.pop(key, None)
+            state.update(record["set"])
+        return state
+
+    # Name of the log file currently in use; it changes when the log is compacted
+    def log_name(self):
+        with self.lock:
+            return self.index.get("log", LOG_FILE)
+
+    # Yield (id, timestamp, state) with the full state of each snapshot after
+    # after_id, oldest first, replaying from the nearest keyframe before the
+    # first of them. The log is read in one pass. The state dict is reused
+    # from one snapshot to the next, so copy it to keep it.
+    def states(self, after_id=0):
+        with self.lock:
+            states = self.index["states"]
+            first = next((position for position, entry in enumerate(states) if entry["id"] > after_id), None)
+            if first is None:
+                return
+            start = first
+            while not states[start]["key"]:
+                start -= 1
+            entries = states[start:]
+            begin = entries[0]["offset"]
+            end = entries[-1]["offset"] + entries[-1]["length"]
+            with open(self.log_path, "rb") as f:
+                f.seek(begin)
+                data = f.read(end - begin)
+
+        state = {}
+        for entry in entries:
+            record = json.loads(data[entry["offset"] - begin:entry["offset"] - begin + entry["length"]])
+            # A keyframe is the whole state, not a change to the previous one
+            if entry["key"]:
+                state.clear()
+            for key in record.get("removed", ()):
+                state.pop(key, None)
+            state.update(record["set"])
+            if entry["id"] > after_id:
+                yield entry["id"], entry["time"], state
+
+    # Keep only the newest keep snapshots and rewrite the log without the rest
+    def prune(self, keep):
+        with self.lock:
+            self._prune(keep)
+
+    # Rewrite the log with only the indexed snapshots, dropping any partial writes
+    def compact(self):
+        with self.lock:
+            self._prune(len(self.index["states"]))
+
+    def _prune(self, keep):
+        states = self.index["states"]
+        kept = states[len(states) - keep:] if keep > 0 else []
+        first = len(states) - len(kept)
+        snapshots = [(entry["id"], entry["time"], self._restore_position(first + number)) for number, entry in enumerate(kept)]
+
+        # Re-encode into a new log under a name never used before, point the
+        # index at it, then drop the old one. Until the index write the old
+        # log and index are untouched, so a failure leaves them as they were.
+        old_index, old_log = self.index, self.log_path
+        self.index = {"next": old_index["next"], "log": f"history-{uuid.uuid4().hex}.jsonl", "states": []}
+        try:
+            for state_id, timestamp, state in snapshots:
+                self.index["next"] = state_id
+                self._append(state, timestamp)
+            self.index["next"] = old_index["next"]
+            self._save_index()
+        except BaseException:
+            new_log, self.index = self.log_path, old_index
+            try:
+                os.remove(new_log)
+            except OSError:
+                pass
+            raise
+        try:
+            os.remove(old_log)
+        except OSError:
+            pass
+
+    # Log and index size in bytes
+    def disk_usage(self):
+        total = 0
+        for file_path in (self.log_path, self.index_path):
+            try:
+                total += os.path.getsize(file_path)
+            except OSError:
+                pass
+        return total
+
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository, as the benchmarks import them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Just enough of ttk.Treeview for LazyTree and UIQueue: items and their parents
+class FakeTreeview:
+    def __init__(self):
+        self.items = {"": None}
+        self.options = {}
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def focus(self):
+        return ""
+
+    def exists(self, iid):
+        return iid in self.items
+
+    def parent(self, iid):
+        return self.items[iid]
+
+    def insert(self, parent, index, iid=None, **options):
+        self.items[iid] = parent
+        self.options[iid] = options
+        return iid
+
+    def delete(self, iid):
+        for child in [child for child, parent in self.items.items() if parent == iid]:
+            self.delete(child)
+        self.items.pop(iid, None)
+        self.options.pop(iid, None)
+
+    def move(self, iid, parent, index):
+        self.items[iid] = parent
+
+    def item(self, iid, **options):
+        self.options[iid].update(options)
+
+    def children(self, iid):
+        return [child for child, parent in self.items.items() if parent == iid]
+
+
+@pytest.fixture
+def treeview():
+    return FakeTreeview()
@@ -0,0 +1,81 @@
+import json
+import os
+
+from assignment_rules import AutoAssigner, RuleSet, required_literal
+
+
+def test_required_literal_is_the_longest_fixed_run():
+    assert required_literal(r"^Inv \d+ - Excel$") == " - excel"
+    assert required_literal("(foo|bar)baz") == "baz"
+    assert required_literal("[") == ""
+
+
+def test_rules_are_filed_under_their_least_shared_key():
+    rules = RuleSet([
+        {"project": "Web", "url_host": "github.com"},
+        {"project": "Budget", "title": "Budget 20[0-9]{2}", "process_name": "EXCEL.EXE"},
+        {"project": "Notes", "process_name": "EXCEL.EXE"},
+        {"project": "Anything", "title": ".*"},
+    ])
+
+    assert rules.exact["url_host"] == {"github.com": [0]}
+    # The shared process name would put rules 1 and 2 in one bucket
+    assert [positions for positions in rules.text["title"].values()] == [[1]]
+    assert rules.exact["process_name"] == {"excel.exe": [2]}
+    assert rules.unindexed == [3]
+
+
+def test_a_window_only_evaluates_rules_it_shares_a_key_with():
+    rules = RuleSet([{"project": f"Project{number}", "title": f"Ticket {number:05d}"} for number in range(500)])
+    fields = {"url_host": [], "exe_path": "", "process_name": "", "title": "Ticket 00123 - Chrome", "workspace": ""}
+
+    assert len(rules.candidates(fields)) < 50
+    assert rules.match({"title": "Ticket 00123 - Chrome"}) == "Project123"
+    assert rules.match({"title": "Nothing to see"}) is None
+
+
+def test_the_earliest_matching_rule_wins():
+    rules = RuleSet([
+        {"project": "Specific", "title": "quarterly report", "process_name": "EXCEL.EXE"},
+        {"project": "General", "process_name": "excel.exe"},
+    ])
+
+    assert rules.match({"title": "Quarterly Report.xlsx", "process_name": "EXCEL.EXE"}) == "Specific"
+    assert rules.match({"title": "Other.xlsx", "process_name": "EXCEL.EXE"}) == "General"
+
+
+def test_url_rules_match_subdomains_and_workspaces_match_substrings():
+    rules = RuleSet([
+        {"project": "Code", "url_host": "github.com"},
+        {"project": "Organizer", "workspace": "ProjectOrganizer"},
+    ])
+
+    assert rules.match({"chrome_url": "https://gist.github.com/someone/1"}) == "Code"
+    assert rules.match({"chrome_url": "https://notgithub.com/"}) is None
+    assert rules.match({"vscode_workspace": ["C:/src/projectorganizer"]}) == "Organizer"
+
+
+def test_invalid_rules_are_skipped():
+    rules = RuleSet([{"title": "no project"}, {"project": "Empty"}, {"project": "Bad", "title": "("}, {"project": "Ok", "title": "fine"}])
+
+    assert len(rules) == 1
+    assert rules.match({"title": "all fine"}) == "Ok"
+
+
+def test_a_malformed_rules_file_keeps_the_previous_rules(tmp_path):
+    path = tmp_path / "assignment_rules.json"
+    path.write_text(json.dumps([{"project": "Web", "url_host": "github.com"}]))
+    assigner = AutoAssigner(str(path))
+    assigner.reload()
+
+    path.write_text("[{not json")
+    os.utime(path, (1, 1))
+    assigner.reload()
+
+    assert assigner.match({"chrome_url": "https://github.com/"}) == "Web"
+
+    path.write_text(json.dumps([{"project": "Docs", "url_host": "github.com"}]))
+    os.utime(path, (2, 2))
+    assigner.reload()
+
+    assert assigner.match({"chrome_url": "https://github.com/"}) == "Docs"
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from chrome_session import ChromeSession
+from fake_devtools import FakeDevToolsServer
+
+
+@pytest.fixture
+def devtools():
+    with FakeDevToolsServer() as server:
+        yield server
+
+
+def eventually(check, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not check():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_window_titles_map_to_tab_urls(devtools):
+    devtools.add_target("Pull requests", "https://github.com/pulls")
+    devtools.add_target("Service worker", "https://github.com/sw.js", target_type="service_worker")
+    session = ChromeSession(devtools.url)
+
+    assert session.url_for_window("Pull requests - Google Chrome") == "https://github.com/pulls"
+    assert list(session.tabs().values()) == [{"id": "TARGET1", "title": "Pull requests", "url": "https://github.com/pulls"}]
+    session.close()
+
+
+def test_the_index_follows_target_events(devtools):
+    first = devtools.add_target("Inbox", "https://mail.example.com/")
+    session = ChromeSession(devtools.url)
+    assert session.ensure_connected()
+
+    devtools.update_target(first, title="Inbox (3)")
+    second = devtools.add_target("Calendar", "https://calendar.example.com/")
+    devtools.remove_target(second)
+
+    assert eventually(lambda: session.url_for_title("Inbox (3)") == "https://mail.example.com/")
+    assert eventually(lambda: "Calendar" not in session.ids_by_title)
+    assert session.url_for_title("Inbox") is None
+    session.close()
+
+
+def test_urls_open_over_the_session(devtools):
+    session = ChromeSession(devtools.url)
+
+    ids = session.open_urls(["https://a.example.com/", "https://b.example.com/"])
+
+    assert len(ids) == 2
+    assert sorted(target["url"] for target in devtools.targets.values()) == ["https://a.example.com/", "https://b.example.com/"]
+    session.close()
+
+
+def test_an_unreachable_browser_is_retried_only_after_the_interval(capsys):
+    session = ChromeSession("http://127.0.0.1:9", reconnect_interval=60, timeout=0.5)
+
+    assert session.open_urls(["https://example.com/"]) is None
+    assert not session.ensure_connected()
+    assert capsys.readouterr().out.count("Error connecting to Chrome DevTools") == 1
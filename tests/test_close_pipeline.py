@@ -0,0 +1,168 @@
+import subprocess
+import threading
+import time
+
+import pytest
+
+from close_pipeline import ClosePipeline, DONE, FINISHED, STARTED
+from git_sync import GitSync
+
+
+def git(path, *args):
+    return subprocess.run(["git", "-C", str(path), *args], check=True, capture_output=True, text=True).stdout
+
+
+# A bare repository standing in for the remote, and a working clone of it
+# with an identity to commit as
+@pytest.fixture
+def repo(tmp_path):
+    remote = tmp_path / "remote.git"
+    clone = tmp_path / "project"
+    subprocess.run(["git", "init", "-q", "--bare", str(remote)], check=True)
+    subprocess.run(["git", "clone", "-q", str(remote), str(clone)], check=True, capture_output=True)
+    git(clone, "config", "user.name", "Test")
+    git(clone, "config", "user.email", "test@example.com")
+    return remote, clone
+
+
+def remote_log(remote):
+    return git(remote, "log", "--all", "--format=%s").splitlines()
+
+
+def test_sync_commits_and_pushes_changes(repo):
+    remote, clone = repo
+    (clone / "notes.txt").write_text("first close\n")
+
+    result = GitSync().sync(str(clone))
+
+    assert result == {"changed": 1, "committed": True, "pushed": True}
+    assert remote_log(remote) == ["Project closed"]
+
+
+def test_sync_without_changes_does_nothing(repo):
+    remote, clone = repo
+    (clone / "notes.txt").write_text("first close\n")
+    sync = GitSync()
+    sync.sync(str(clone))
+
+    result = sync.sync(str(clone))
+
+    assert result == {"changed": 0, "committed": False, "pushed": False}
+    assert remote_log(remote) == ["Project closed"]
+    assert sync.stats()["skipped"] == 1
+
+
+def test_sync_pushes_commits_made_outside_it(repo):
+    remote, clone = repo
+    (clone / "notes.txt").write_text("first close\n")
+    sync = GitSync()
+    sync.sync(str(clone))
+    (clone / "notes.txt").write_text("edited by hand\n")
+    git(clone, "commit", "-q", "-am", "Manual commit")
+
+    result = sync.sync(str(clone))
+
+    assert result == {"changed": 0, "committed": False, "pushed": True}
+    assert remote_log(remote)[0] == "Manual commit"
+
+
+def test_requests_queued_twice_are_synced_once(repo):
+    remote, clone = repo
+    (clone / "notes.txt").write_text("first close\n")
+    sync = GitSync()
+
+    first, second = sync.request(str(clone)), sync.request(str(clone))
+
+    assert first.result(timeout=30)["pushed"]
+    assert second.result(timeout=30)["pushed"]
+    assert remote_log(remote) == ["Project closed"]
+
+
+def test_close_snapshots_then_pushes(repo):
+    remote, clone = repo
+    sync = GitSync()
+    reports = []
+    pipeline = ClosePipeline(on_progress=lambda project, stage, state, error: reports.append((stage, state)))
+
+    future = pipeline.submit(
+        "project",
+        [
+            ("snapshot", lambda: (clone / "state.json").write_text("{}\n")),
+            ("git", lambda: sync.request(str(clone)).result()),
+        ],
+        side=("close_windows", lambda: None),
+    )
+
+    assert future.result(timeout=30) == {"snapshot": None, "git": None, "close_windows": None}
+    assert remote_log(remote) == ["Project closed"]
+    assert reports.index(("snapshot", DONE)) < reports.index(("git", STARTED))
+    assert not pipeline.running("project")
+
+
+def test_close_reports_failed_stage_and_keeps_going(repo):
+    remote, clone = repo
+    sync = GitSync()
+
+    def broken_snapshot():
+        raise OSError("disk full")
+
+    future = ClosePipeline().submit(
+        "project",
+        [("snapshot", broken_snapshot), ("git", lambda: sync.request(str(clone)).result())],
+        final=lambda: None,
+    )
+
+    results = future.result(timeout=30)
+    assert isinstance(results["snapshot"], OSError)
+    assert results["git"] is None
+    assert results[FINISHED] is None
+
+
+# Stage function that records how many calls overlap
+class ConcurrencyProbe:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def __call__(self, *args):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+
+
+def test_close_pipeline_respects_concurrency_cap():
+    probe = ConcurrencyProbe()
+    pipeline = ClosePipeline(max_concurrent=2)
+
+    futures = [pipeline.submit(f"project{number}", [("git", probe)]) for number in range(6)]
+    for future in futures:
+        future.result(timeout=30)
+
+    assert probe.peak == 2
+
+
+def test_git_sync_respects_concurrency_cap(tmp_path):
+    probe = ConcurrencyProbe()
+    sync = GitSync(max_concurrent=3)
+    sync.sync = probe
+
+    sync.sync_many([str(tmp_path / f"project{number}") for number in range(8)])
+
+    assert probe.peak == 3
+
+
+def test_close_of_a_closing_project_is_not_queued_twice():
+    release = threading.Event()
+    pipeline = ClosePipeline()
+
+    first = pipeline.submit("project", [("git", release.wait)])
+    second = pipeline.submit("project", [("git", release.wait)])
+    release.set()
+
+    assert first is second
+    first.result(timeout=30)
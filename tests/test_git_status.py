@@ -0,0 +1,43 @@
+from git_sync import parse_status
+
+
+def porcelain(*entries):
+    return "\0".join(entries).encode("utf-8") + b"\0"
+
+
+def test_branch_headers():
+    status = parse_status(porcelain(
+        "# branch.oid 1234567890abcdef",
+        "# branch.head master",
+        "# branch.upstream origin/master",
+        "# branch.ab +2 -0",
+    ))
+
+    assert (status.branch, status.upstream, status.ahead) == ("master", "origin/master", 2)
+    assert status.clean
+
+
+def test_detached_head_without_upstream():
+    status = parse_status(porcelain("# branch.oid (initial)", "# branch.head (detached)"))
+
+    assert (status.branch, status.upstream, status.ahead) == (None, None, 0)
+
+
+def test_changed_paths_of_every_entry_kind():
+    status = parse_status(porcelain(
+        "# branch.head master",
+        "1 .M N... 100644 100644 100644 aaaa bbbb notes with spaces.txt",
+        "2 R. N... 100644 100644 100644 aaaa bbbb R100 new name.txt",
+        "old name.txt",
+        "u UU N... 100644 100644 100644 100644 aaaa bbbb cccc conflict.txt",
+        "? Savedstates/history.jsonl",
+    ))
+
+    assert status.changed == [
+        "notes with spaces.txt",
+        "new name.txt",
+        "old name.txt",
+        "conflict.txt",
+        "Savedstates/history.jsonl",
+    ]
+    assert not status.clean
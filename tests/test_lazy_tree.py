@@ -0,0 +1,92 @@
+from lazy_tree import OVERFLOW_IID, PLACEHOLDER_SUFFIX, LazyTree
+from ui_queue import MAX_DEFERRALS, UIQueue
+
+
+def test_metadata_rows_are_created_on_expand(treeview):
+    ui = UIQueue()
+    view = LazyTree(treeview, ui)
+    view.insert("", "Project", text="Project")
+    view.insert("Project", "w1", {"title": "Editor", "pid": 10}, text="Editor")
+    ui.drain()
+
+    assert treeview.children("w1") == ["w1" + PLACEHOLDER_SUFFIX]
+
+    treeview.focus = lambda: "w1"
+    view._on_open(None)
+
+    assert treeview.children("w1") == ["w1::0", "w1::1"]
+    assert treeview.options["w1::1"]["text"] == "pid: 10"
+
+
+def test_rows_past_the_cap_are_hidden_behind_a_summary(treeview):
+    ui = UIQueue()
+    view = LazyTree(treeview, ui, max_rows=2)
+
+    for number in range(4):
+        view.insert("", f"w{number}", {"title": f"Window {number}"}, text=f"Window {number}")
+    ui.drain()
+
+    assert treeview.children("") == ["w0", "w1", OVERFLOW_IID]
+    assert treeview.options[OVERFLOW_IID]["text"] == "... 2 more windows"
+
+
+def test_a_promoted_row_keeps_metadata_set_while_it_was_hidden(treeview):
+    ui = UIQueue()
+    view = LazyTree(treeview, ui, max_rows=1)
+    view.insert("", "w0", {"title": "Shown"}, text="Shown")
+    view.insert("", "w1", {"title": "Hidden", "version": 1}, text="Hidden")
+
+    view.set_metadata("w1", {"title": "Hidden", "version": 2})
+    view.delete("w0")
+    ui.drain()
+
+    assert view.get_metadata("w1") == {"title": "Hidden", "version": 2}
+    assert treeview.children("") == ["w1"]
+    treeview.focus = lambda: "w1"
+    view._on_open(None)
+    assert treeview.options["w1::1"]["text"] == "version: 2"
+
+
+def test_updates_to_one_item_are_folded(treeview):
+    ui = UIQueue()
+    ui.insert(treeview, "", "w1", text="a")
+    ui.item(treeview, "w1", text="b")
+    ui.item(treeview, "w1", values=(1,))
+
+    assert ui.pending() == 1
+    ui.drain()
+    assert treeview.options["w1"] == {"text": "b", "values": (1,)}
+
+
+def test_a_child_queued_before_its_parent_waits_for_it(treeview):
+    ui = UIQueue()
+    ui.insert(treeview, "Project", "w1", text="Editor")
+    ui.drain()
+
+    assert not treeview.exists("w1") and ui.pending() == 1
+
+    ui.insert(treeview, "", "Project", text="Project")
+    ui.drain()
+
+    assert treeview.parent("w1") == "Project"
+
+
+def test_a_child_of_a_deleted_parent_is_discarded(treeview):
+    ui = UIQueue()
+    ui.insert(treeview, "Project", "w1", text="Editor")
+    ui.delete(treeview, "Project")
+
+    ui.drain()
+
+    assert ui.pending() == 0 and ui.dropped == 0
+
+
+def test_a_command_whose_parent_never_appears_is_dropped_and_counted(treeview, capsys):
+    ui = UIQueue()
+    ui.insert(treeview, "Missing", "w1", text="Editor")
+
+    for _ in range(MAX_DEFERRALS + 1):
+        ui.drain()
+
+    assert ui.pending() == 0 and ui.dropped == 1
+    assert "Dropping UI update insert w1" in capsys.readouterr().out
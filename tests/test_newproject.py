@@ -0,0 +1,65 @@
+import functools
+import subprocess
+
+import pytest
+
+import newproject
+from newproject import LocalRemote, create_project, create_projects
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "Templates" / "ProjectTemplate"
+    (path / "Savedstates").mkdir(parents=True)
+    (path / "ReadMe.txt").write_text("Project notes\n")
+    return path
+
+
+def origin(project_path):
+    return subprocess.run(["git", "-C", str(project_path), "remote", "get-url", "origin"],
+                          check=True, capture_output=True, text=True).stdout.strip()
+
+
+def test_a_project_is_copied_initialized_and_linked(tmp_path, template):
+    remotes = tmp_path / "remotes"
+    projects = tmp_path / "Projects"
+    projects.mkdir()
+
+    assert create_project("Alpha", str(template), LocalRemote(str(remotes)), base_path=str(projects))
+
+    assert (projects / "Alpha" / "ReadMe.txt").read_text() == "Project notes\n"
+    assert (projects / "Alpha" / ".git").is_dir()
+    assert origin(projects / "Alpha") == str(remotes / "Alpha.git")
+    assert (remotes / "Alpha.git" / "HEAD").is_file()
+
+
+def test_a_failed_copy_creates_no_remote(tmp_path):
+    remotes = tmp_path / "remotes"
+
+    assert not create_project("Alpha", str(tmp_path / "missing"), LocalRemote(str(remotes)), base_path=str(tmp_path / "Projects"))
+
+    assert not remotes.exists()
+
+
+def test_an_existing_project_is_left_alone(tmp_path, template):
+    projects = tmp_path / "Projects"
+    (projects / "Alpha").mkdir(parents=True)
+
+    assert not create_project("Alpha", str(template), LocalRemote(str(tmp_path / "remotes")), base_path=str(projects))
+
+    assert list((projects / "Alpha").iterdir()) == []
+
+
+def test_projects_are_created_in_a_batch_from_a_cached_template(tmp_path, template, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(newproject, "cached_template", functools.partial(newproject.cached_template, cache_path=str(cache)))
+    projects = tmp_path / "Projects"
+    projects.mkdir()
+
+    results = create_projects(["Alpha", "Beta", "Alpha"], LocalRemote(str(tmp_path / "remotes")),
+                              template_path=str(template), base_path=str(projects))
+
+    assert results == {"Alpha": True, "Beta": True}
+    assert (cache / "ProjectTemplate" / "ReadMe.txt").is_file()
+    assert not (projects / "Beta" / newproject.STAMP_FILE).exists()
+    assert origin(projects / "Beta") == str(tmp_path / "remotes" / "Beta.git")
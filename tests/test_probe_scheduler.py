@@ -0,0 +1,78 @@
+import threading
+import time
+
+from probe_scheduler import CircuitBreaker, ProbeScheduler
+
+
+def test_breaker_opens_after_repeated_failures_and_lets_one_trial_through():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_after=10, clock=lambda: now[0])
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] = 10
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_gather_returns_results_and_skips_failures():
+    scheduler = ProbeScheduler(max_workers=2, timeout=1)
+
+    def fail():
+        raise OSError("gone")
+
+    results = scheduler.gather([("process", 1, lambda: "code.exe"), ("process", 2, fail)])
+
+    assert results == {("process", 1): "code.exe"}
+    assert scheduler.stats()["completed"] == 1
+
+
+def test_queued_probes_are_not_charged_for_the_wait():
+    scheduler = ProbeScheduler(max_workers=2, timeout=0.1)
+
+    results = scheduler.gather([("process", key, lambda: time.sleep(0.05) or key) for key in range(8)])
+
+    assert len(results) == 8
+    assert scheduler.stats()["timed_out"] == 0
+
+
+def test_a_hung_probe_is_one_failure_however_often_it_is_gathered():
+    scheduler = ProbeScheduler(timeout=0.02, failure_threshold=2)
+    release = threading.Event()
+
+    for _ in range(4):
+        scheduler.gather([("vscode_workspace", 1, release.wait)])
+
+    assert scheduler.stats()["timed_out"] == 1
+    assert scheduler.breaker("vscode_workspace", 1).state == "closed"
+    release.set()
+
+
+def test_a_broken_window_does_not_switch_the_probe_off_for_others():
+    scheduler = ProbeScheduler(timeout=1, failure_threshold=2)
+
+    def fail():
+        raise OSError("UIA attach failed")
+
+    for _ in range(3):
+        scheduler.gather([("vscode_workspace", 1, fail)])
+
+    assert scheduler.stats()["open_breakers"] == ["vscode_workspace:1"]
+    assert scheduler.gather([("vscode_workspace", 2, lambda: ["workspace"])]) == {("vscode_workspace", 2): ["workspace"]}
+    assert scheduler.gather([("vscode_workspace", 1, lambda: ["workspace"])]) == {}
+
+
+def test_a_late_result_is_reported_once_it_arrives():
+    scheduler = ProbeScheduler(timeout=0.02)
+    late = []
+    arrived = threading.Event()
+    scheduler.on_late = lambda name, key, result: late.append((name, key, result)) or arrived.set()
+
+    assert scheduler.gather([("process", 7, lambda: time.sleep(0.1) or "slow.exe")]) == {}
+
+    assert arrived.wait(1)
+    assert late == [("process", 7, "slow.exe")]
@@ -0,0 +1,71 @@
+from lazy_tree import LazyTree
+from reconcile import TrackedAssignments, TreeReconciler, apply_tree_changes, parse_window_id, window_id
+from ui_queue import UIQueue
+
+
+def test_window_ids_round_trip():
+    key = window_id(0x1234, 42, 1700000000.5)
+
+    assert key == "4660:42:1700000000.500"
+    assert parse_window_id(key) == (0x1234, 42)
+    assert parse_window_id(window_id(7, None, None)) == (7, None)
+
+
+def test_tracked_assignments_remember_changed_keys():
+    assignments = TrackedAssignments({"a": "One"})
+    assert assignments.take_dirty() == {"a"}
+
+    assignments["b"] = "Two"
+    assignments.pop("a")
+    assignments.pop("missing", None)
+
+    assert assignments.take_dirty() == {"a", "b"}
+    assert assignments.take_dirty() == set()
+
+
+def test_reconcile_reports_groups_inserts_moves_and_deletes():
+    reconciler = TreeReconciler()
+    assignments = TrackedAssignments({"w1": "One", "w2": "One"})
+
+    first = reconciler.reconcile(assignments)
+    assert first.groups == ["One"]
+    assert sorted(first.inserts) == [("w1", "One"), ("w2", "One")]
+
+    assignments["w1"] = "Two"
+    del assignments["w2"]
+    second = reconciler.reconcile(assignments)
+
+    assert second.groups == ["Two"]
+    assert second.moves == [("w1", "One", "Two")]
+    assert second.deletes == [("w2", "One")]
+    assert second.projects() == {"One", "Two"}
+    assert not reconciler.reconcile(assignments)
+
+
+def test_reconcile_plain_dicts_by_comparison():
+    reconciler = TreeReconciler()
+    reconciler.reconcile({"w1": "One"})
+
+    assert not reconciler.pending({"w1": "One"})
+    changes = reconciler.reconcile({"w1": "One", "w2": "One"})
+
+    assert changes.inserts == [("w2", "One")] and changes.groups == []
+
+
+def test_changes_replay_onto_a_mapping_and_a_tree(treeview):
+    reconciler = TreeReconciler()
+    mirror = {}
+    ui = UIQueue()
+    view = LazyTree(treeview, ui)
+    titles = {"w1": {"title": "Editor"}, "w2": {"title": "Browser"}}
+
+    for assignments in ({"w1": "One", "w2": "One"}, {"w1": "Two"}):
+        changes = reconciler.reconcile(assignments)
+        changes.apply_to(mirror)
+        apply_tree_changes(view, changes, titles.get)
+        ui.drain()
+
+    assert mirror == {"w1": "Two"}
+    assert treeview.parent("w1") == "Two"
+    assert not treeview.exists("w2")
+    assert treeview.options["w1"]["text"] == "Editor"
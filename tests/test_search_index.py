@@ -0,0 +1,60 @@
+import os
+
+from search_index import HistorySearch
+from state_history import StateHistory
+
+
+def save_states(projects_path, project, states):
+    history = StateHistory(os.path.join(projects_path, project, "Savedstates"), keyframe_interval=3)
+    for timestamp, state in states:
+        history.snapshot(state, timestamp=timestamp)
+
+
+def test_every_window_in_a_snapshot_counts_as_seen_then(tmp_path):
+    editor = {"title": "notes.txt - Notepad", "process_name": "notepad.exe"}
+    browser = {"title": "Docs - Google Chrome", "process_name": "chrome.exe", "chrome_url": "https://docs.example.com/"}
+    save_states(str(tmp_path), "Alpha", [(100 + number, {"e": editor, "b": browser}) for number in range(5)] + [(200, {"e": editor})])
+    search = HistorySearch(str(tmp_path), path=str(tmp_path / "cache.json"))
+
+    assert search.refresh(["Alpha"])
+
+    assert search.search("notepad docs") == []
+    assert [(entry["first_seen"], entry["last_seen"]) for entry in search.search("notepad")] == [(100, 200)]
+    assert [(entry["first_seen"], entry["last_seen"]) for entry in search.search("docs example")] == [(100, 104)]
+    assert search.projects_for("chrome") == [{"project": "Alpha", "matches": 1, "last_seen": 104}]
+
+
+def test_refresh_reads_only_new_snapshots_and_survives_a_reload(tmp_path):
+    window = {"title": "Budget.xlsx - Excel", "process_name": "EXCEL.EXE"}
+    save_states(str(tmp_path), "Alpha", [(100, {"w": window})])
+    cache = str(tmp_path / "cache.json")
+    search = HistorySearch(str(tmp_path), path=cache)
+    search.refresh(["Alpha"])
+
+    assert not search.refresh(["Alpha"])
+    save_states(str(tmp_path), "Alpha", [(300, {"w": window})])
+    # Make sure the index looks changed even on a coarse-grained clock
+    os.utime(tmp_path / "Alpha" / "Savedstates" / "history_index.json", (1, 1))
+    assert search.refresh(["Alpha"])
+
+    reloaded = HistorySearch(str(tmp_path), path=cache)
+    reloaded.refresh(["Alpha"])
+    assert [entry["last_seen"] for entry in reloaded.search("budget")] == [300]
+
+
+def test_history_is_replayed_without_blocking_searches(tmp_path, monkeypatch):
+    save_states(str(tmp_path), "Alpha", [(number, {"w": {"title": f"Window {number}"}}) for number in range(10)])
+    search = HistorySearch(str(tmp_path), path=str(tmp_path / "cache.json"))
+    held = []
+    states = StateHistory.states
+
+    def watched_states(history, after_id=0):
+        for item in states(history, after_id):
+            held.append(search.lock.locked())
+            yield item
+
+    monkeypatch.setattr(StateHistory, "states", watched_states)
+    search.refresh(["Alpha"])
+
+    assert held and not any(held)
+    assert len(search) == 10
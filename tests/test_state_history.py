@@ -0,0 +1,94 @@
+import json
+
+from state_history import LEGACY_DIR, StateHistory
+
+
+def make_states(count, windows=5):
+    # Each snapshot retitles one window and opens or closes another
+    states = []
+    for number in range(count):
+        state = {f"w{index}": {"title": f"Window {index}"} for index in range(windows)}
+        state[f"w{number % windows}"] = {"title": f"Window {number % windows} rev {number}"}
+        if number % 2:
+            state[f"extra{number}"] = {"title": "Popup"}
+        states.append(state)
+    return states
+
+
+def log_records(history):
+    with open(history.log_path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_snapshots_store_deltas_between_keyframes(tmp_path):
+    history = StateHistory(str(tmp_path), keyframe_interval=4)
+    states = make_states(10)
+
+    ids = [history.snapshot(state, timestamp=number) for number, state in enumerate(states)]
+
+    records = log_records(history)
+    assert [("removed" not in record) for record in records] == [True, False, False, False] * 2 + [True, False]
+    assert records[1]["set"] == {"w1": states[1]["w1"], "w0": states[1]["w0"], "extra1": states[1]["extra1"]}
+    assert records[2]["removed"] == ["extra1"]
+    assert [history.restore(state_id) for state_id in ids] == states
+    assert history.restore_latest() == states[-1]
+
+
+def test_history_reopens_from_its_index(tmp_path):
+    states = make_states(6)
+    history = StateHistory(str(tmp_path), keyframe_interval=4)
+    for number, state in enumerate(states):
+        history.snapshot(state, timestamp=number)
+
+    reopened = StateHistory(str(tmp_path), keyframe_interval=4)
+
+    assert reopened.list() == [(number + 1, number) for number in range(6)]
+    assert reopened.restore(5) == states[4]
+
+
+def test_states_replays_full_snapshots_after_an_id(tmp_path):
+    history = StateHistory(str(tmp_path), keyframe_interval=3)
+    states = make_states(8)
+    for number, state in enumerate(states):
+        history.snapshot(state, timestamp=number)
+
+    replayed = [(state_id, timestamp, dict(state)) for state_id, timestamp, state in history.states(4)]
+
+    assert replayed == [(number + 1, number, states[number]) for number in range(4, 8)]
+
+
+def test_prune_keeps_the_newest_snapshots(tmp_path):
+    history = StateHistory(str(tmp_path), keyframe_interval=4, max_states=10)
+    states = make_states(12)
+    for number, state in enumerate(states):
+        history.snapshot(state, timestamp=number)
+    old_log = history.log_name()
+
+    history.prune(5)
+
+    assert [state_id for state_id, _ in history.list()] == [8, 9, 10, 11, 12]
+    assert history.restore(8) == states[7]
+    assert history.log_name() != old_log
+    assert not (tmp_path / old_log).exists()
+    assert history.snapshot(states[0]) == 13
+
+
+def test_snapshots_past_the_limit_compact_the_history(tmp_path):
+    history = StateHistory(str(tmp_path), keyframe_interval=4, max_states=10)
+
+    for state in make_states(12):
+        history.snapshot(state)
+
+    assert len(history) == 10
+    assert history.restore_latest() == make_states(12)[-1]
+
+
+def test_legacy_state_files_are_imported_and_kept(tmp_path):
+    for number in (1, 2, 10):
+        (tmp_path / f"state{number}.json").write_text(json.dumps({"w": {"title": f"Window {number}"}}))
+
+    history = StateHistory(str(tmp_path))
+
+    assert [history.restore(state_id)["w"]["title"] for state_id, _ in history.list()] == ["Window 1", "Window 2", "Window 10"]
+    assert sorted(path.name for path in (tmp_path / LEGACY_DIR).iterdir()) == ["state1.json", "state10.json", "state2.json"]
+    assert not list(tmp_path.glob("state*.json"))
@@ -0,0 +1,49 @@
+import datetime
+
+from time_tracking import ActivityLog, ActivitySampler
+
+NOON = datetime.datetime(2026, 3, 2, 12, 0).timestamp()
+
+
+def test_totals_group_by_project_app_and_day(tmp_path):
+    log = ActivityLog(str(tmp_path))
+    log.append(NOON, 60, "Organizer", "Code.exe")
+    log.append(NOON + 60, 30, "Organizer", "chrome.exe")
+    log.append(NOON + 86400, 45, "", "chrome.exe")
+
+    assert log.totals() == {"Organizer": 90, "": 45}
+    assert log.totals("app") == {"Code.exe": 60, "chrome.exe": 75}
+    day = datetime.date.fromtimestamp(NOON)
+    assert log.totals(("project", "day"), start=day, end=day) == {("Organizer", day): 90}
+
+
+def test_a_second_reader_learns_names_interned_after_it_opened(tmp_path):
+    service = ActivityLog(str(tmp_path))
+    client = ActivityLog(str(tmp_path))
+
+    service.append(NOON, 30, "NewProject", "Code.exe")
+
+    assert client.totals() == {"NewProject": 30}
+    assert client.name_id("Code.exe") == service.name_id("Code.exe")
+    assert client.name_id("Another") == service.name_id("Another") == 3
+
+
+class ForegroundBackend:
+    def __init__(self):
+        self.foreground = None
+
+    def get_foreground_window(self):
+        return self.foreground
+
+
+def test_sampler_writes_one_record_per_run(tmp_path):
+    log = ActivityLog(str(tmp_path))
+    backend = ForegroundBackend()
+    sampler = ActivitySampler(log, backend, lambda handle: {1: ("Organizer", "Code.exe"), 2: ("", "chrome.exe")}[handle])
+
+    for second, handle in enumerate([1, 1, 1, 2, 2, None, 1]):
+        backend.foreground = handle
+        sampler.sample(NOON + second)
+    sampler.flush()
+
+    assert log.totals(("project", "app")) == {("Organizer", "Code.exe"): 4, ("", "chrome.exe"): 2}
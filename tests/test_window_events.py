@@ -0,0 +1,91 @@
+from window_events import (
+    CREATED,
+    DESTROYED,
+    FOCUS_CHANGED,
+    REFRESHED,
+    RETITLED,
+    FakeEventSource,
+    WindowEvent,
+    WindowTracker,
+    coalesce_events,
+)
+
+
+def test_created_then_retitled_is_one_create_with_the_last_title():
+    events = [WindowEvent(CREATED, 1, "Loading"), WindowEvent(RETITLED, 1, "Report.xlsx - Excel")]
+
+    assert coalesce_events(events) == [WindowEvent(CREATED, 1, "Report.xlsx - Excel")]
+
+
+def test_created_then_destroyed_cancels_out():
+    events = [WindowEvent(CREATED, 1, "Popup"), WindowEvent(RETITLED, 1, "Popup 2"), WindowEvent(DESTROYED, 1, "Popup 2")]
+
+    assert coalesce_events(events) == []
+
+
+def test_destroyed_then_created_reuses_the_handle_as_a_new_window():
+    events = [WindowEvent(DESTROYED, 1, "Old"), WindowEvent(CREATED, 1, "New")]
+
+    assert coalesce_events(events) == [WindowEvent(CREATED, 1, "New")]
+
+
+def test_retitles_keep_the_last_title():
+    events = [WindowEvent(RETITLED, 1, "a"), WindowEvent(RETITLED, 1, "b"), WindowEvent(RETITLED, 1, "c")]
+
+    assert coalesce_events(events) == [WindowEvent(RETITLED, 1, "c")]
+
+
+def test_refresh_folds_into_other_events():
+    assert coalesce_events([WindowEvent(REFRESHED, 1, "a"), WindowEvent(RETITLED, 1, "b")]) == [WindowEvent(RETITLED, 1, "b")]
+    assert coalesce_events([WindowEvent(CREATED, 1, "a"), WindowEvent(REFRESHED, 1, "a")]) == [WindowEvent(CREATED, 1, "a")]
+
+
+def test_only_the_latest_focus_change_is_kept_and_comes_last():
+    events = [WindowEvent(FOCUS_CHANGED, 1, "a"), WindowEvent(CREATED, 2, "b"), WindowEvent(FOCUS_CHANGED, 2, "b")]
+
+    assert coalesce_events(events) == [WindowEvent(CREATED, 2, "b"), WindowEvent(FOCUS_CHANGED, 2, "b")]
+
+
+def test_tracker_turns_source_events_into_deltas():
+    source = FakeEventSource({1: "Editor", 2: ""})
+    tracker = WindowTracker(source)
+    tracker.start()
+
+    source.create_window(3, "Terminal")
+    source.retitle_window(1, "Editor - notes.txt")
+    source.retitle_window(1, "Editor - notes.txt")
+    source.destroy_window(2)
+    deltas = tracker.wait_for_deltas(timeout=1)
+
+    # The untitled window was never tracked, and the repeated title is not a change
+    assert deltas == [WindowEvent(CREATED, 3, "Terminal"), WindowEvent(RETITLED, 1, "Editor - notes.txt")]
+    assert tracker.windows() == {1: "Editor - notes.txt", 3: "Terminal"}
+
+
+def test_tracker_drops_a_window_that_loses_its_title():
+    source = FakeEventSource({1: "Editor"})
+    tracker = WindowTracker(source)
+    tracker.start()
+
+    source.retitle_window(1, " ")
+
+    assert tracker.wait_for_deltas(timeout=1) == [WindowEvent(DESTROYED, 1, None)]
+    assert tracker.windows() == {}
+
+
+def test_tracker_coalesces_a_scripted_burst():
+    source = FakeEventSource()
+    tracker = WindowTracker(source)
+    tracker.start()
+
+    source.play([
+        (0, CREATED, 1, "Loading"),
+        (0, RETITLED, 1, "Inbox - Mail"),
+        (0, CREATED, 2, "Splash"),
+        (0, DESTROYED, 2, None),
+        (0, FOCUS_CHANGED, 1, None),
+    ])
+    deltas = tracker.wait_for_deltas(timeout=1)
+
+    assert deltas == [WindowEvent(CREATED, 1, "Inbox - Mail"), WindowEvent(FOCUS_CHANGED, 1, "Inbox - Mail")]
+    assert tracker.wait_for_deltas(timeout=0.1) == []
@@ -0,0 +1,48 @@
+from window_backends import SyntheticBackend
+from workspace_restore import WorkspaceRestore
+
+NOTEPAD = r"C:\Windows\System32\notepad.exe"
+EXCEL = r"C:\Program Files\Microsoft Office\root\Office16\EXCEL.EXE"
+
+
+def saved(title, exe_path, rect, process_name):
+    return {"title": title, "exe_path": exe_path, "process_name": process_name, "rect": rect}
+
+
+def test_closed_programs_are_launched_and_every_window_is_placed():
+    backend = SyntheticBackend(count=3, launch_delay=0.02)
+    already_open = backend.list_windows()[0]
+    programs = {
+        "open": saved(already_open[1], None, (5, 5, 400, 300), None),
+        "notes": saved("todo - Notepad", NOTEPAD, (10, 20, 300, 200), "notepad.exe"),
+        "sheet": saved("Budget - Excel", EXCEL, (30, 40, 500, 400), "EXCEL.EXE"),
+    }
+
+    summary = WorkspaceRestore(backend, timeout=5, poll_interval=0.01, settle_time=0.1).restore(programs)
+
+    assert sorted(summary["launched"]) == sorted([NOTEPAD, EXCEL])
+    assert summary["missing"] == []
+    assert summary["placed"]["open"] == already_open[0]
+    for key, metadata in programs.items():
+        assert backend.get_rect(summary["placed"][key]) == metadata["rect"]
+
+
+def test_a_window_whose_title_changed_is_matched_by_executable():
+    backend = SyntheticBackend(count=0, launch_delay=0.02)
+    programs = {"notes": saved("Unsaved draft - Notepad", NOTEPAD, (10, 20, 300, 200), "notepad.exe")}
+
+    summary = WorkspaceRestore(backend, timeout=5, poll_interval=0.01, settle_time=0.1).restore(programs)
+
+    handle = summary["placed"]["notes"]
+    assert backend.get_title(handle) == "Untitled - Notepad"
+    assert backend.get_rect(handle) == (10, 20, 300, 200)
+
+
+def test_windows_that_never_appear_are_reported_missing():
+    backend = SyntheticBackend(count=0, launch_delay=10)
+    programs = {"notes": saved("todo - Notepad", NOTEPAD, (10, 20, 300, 200), "notepad.exe")}
+
+    summary = WorkspaceRestore(backend, timeout=0.2, poll_interval=0.01, settle_time=0.1).restore(programs)
+
+    assert summary["launched"] == [NOTEPAD]
+    assert summary["missing"] == ["notes"]
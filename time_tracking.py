@@ -0,0 +1,261 @@
+import argparse
+import datetime
+import mmap
+import operator
+import os
+import struct
+import threading
+import time
+
+# Activity logs are per machine, so they live outside the synced projects folder
+ACTIVITY_PATH = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache"), "ProjectOrganizer", "activity")
+
+# Interned project and app names, one per line; a record's ids are line numbers
+NAMES_FILE = "names.txt"
+
+# One record: start (epoch seconds), seconds active, project id, app id.
+# Id 0 means none (no project assigned, or app unknown).
+RECORD = struct.Struct("<IHHH")
+
+# Fields totals() can group by
+FIELDS = ("project", "app", "day")
+
+# How often the foreground window is sampled, in seconds
+SAMPLE_INTERVAL = 1.0
+
+# A run of samples on the same project and app is written as one record when
+# it ends, or after this many seconds so a crash loses little
+FLUSH_INTERVAL = 60
+
+
+def day_file(path, day):
+    return os.path.join(path, f"{day.isoformat()}.bin")
+
+
+# Append-only activity log: one file of fixed-width records per day, read
+# back through mmap. Per-day totals are cached, so only today's file is
+# re-read as it grows and queries over months stay in milliseconds.
+class ActivityLog:
+    def __init__(self, path=ACTIVITY_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.names = [""]
+        self.ids = {"": 0}
+        self.names_read = 0
+        self.day_cache = {}
+        os.makedirs(path, exist_ok=True)
+        with self.lock:
+            self._load_names()
+
+    # Read names added to the file since it was last read, by this log or by
+    # another process sharing the folder (the service, when the GUI is its
+    # client). Called with the lock held.
+    def _load_names(self):
+        try:
+            with open(os.path.join(self.path, NAMES_FILE), "rb") as f:
+                f.seek(self.names_read)
+                data = f.read()
+        except OSError:
+            return
+        # Leave a line that's still being written for the next read
+        data = data[:data.rfind(b"\n") + 1]
+        self.names_read += len(data)
+        for line in data.decode("utf-8").split("\n")[:-1]:
+            # Files written in text mode on Windows end lines with \r\n
+            name = line.rstrip("\r")
+            self.ids.setdefault(name, len(self.names))
+            self.names.append(name)
+
+    # Id for a name, adding it to the names file the first time it's seen
+    def name_id(self, name):
+        name = (name or "").replace("\n", " ")
+        with self.lock:
+            if name not in self.ids:
+                self._load_names()
+            if name not in self.ids:
+                with open(os.path.join(self.path, NAMES_FILE), "ab") as f:
+                    f.write((name + "\n").encode("utf-8"))
+                self._load_names()
+            return self.ids[name]
+
+    def name(self, name_id):
+        if name_id >= len(self.names):
+            with self.lock:
+                self._load_names()
+        return self.names[name_id] if name_id < len(self.names) else ""
+
+    def append(self, start, seconds, project, app):
+        record = RECORD.pack(int(start), min(int(seconds), 0xFFFF), self.name_id(project), self.name_id(app))
+        path = day_file(self.path, datetime.date.fromtimestamp(start))
+        with self.lock:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0))
+            try:
+                # Drop a torn record left by a crash so later records stay aligned
+                size = os.fstat(fd).st_size
+                if size % RECORD.size:
+                    os.ftruncate(fd, size - size % RECORD.size)
+                os.write(fd, record)
+            finally:
+                os.close(fd)
+
+    def days(self):
+        days = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".bin"):
+                try:
+                    days.append(datetime.date.fromisoformat(entry.name[:-4]))
+                except ValueError:
+                    pass
+        return sorted(days)
+
+    # {(project id, app id): seconds} for one day
+    def _day_totals(self, day):
+        # Days before yesterday are complete (a run is written to the day it
+        # started, at most a flush interval late), so only recent files can grow
+        cached = self.day_cache.get(day)
+        if cached is not None and day < datetime.date.today() - datetime.timedelta(days=1):
+            return cached[1]
+        path = day_file(self.path, day)
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            return {}
+        if cached is not None and cached[0] == size:
+            return cached[1]
+
+        totals = {}
+        usable = size - size % RECORD.size
+        if usable:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for _, seconds, project, app in RECORD.iter_unpack(memoryview(mapped)[:usable]):
+                    key = (project, app)
+                    totals[key] = totals.get(key, 0) + seconds
+        self.day_cache[day] = (size, totals)
+        return totals
+
+    # Seconds of activity grouped by any of "project", "app" and "day", for
+    # days from start to end inclusive (dates; None for no bound). Keys are
+    # single values when grouping by one field, tuples otherwise.
+    def totals(self, by=("project",), start=None, end=None):
+        if isinstance(by, str):
+            by = (by,)
+        # Sum by ids first; names are looked up once per result key
+        select = operator.itemgetter(*(FIELDS.index(field) for field in by))
+        by_ids = {}
+        for day in self.days():
+            if (start is not None and day < start) or (end is not None and day > end):
+                continue
+            for (project, app), seconds in self._day_totals(day).items():
+                key = select((project, app, day))
+                by_ids[key] = by_ids.get(key, 0) + seconds
+
+        def named(field, value):
+            return value if field == "day" else self.name(value)
+
+        if len(by) == 1:
+            return {named(by[0], key): seconds for key, seconds in by_ids.items()}
+        return {tuple(named(field, value) for field, value in zip(by, key)): seconds for key, seconds in by_ids.items()}
+
+    def disk_usage(self):
+        return sum(entry.stat().st_size for entry in os.scandir(self.path) if entry.is_file())
+
+
+# Samples the foreground window every interval and attributes the time to
+# the (project, app) that resolve(handle) returns. Consecutive samples on the
+# same pair are written as one record.
+class ActivitySampler:
+    def __init__(self, log, backend, resolve, interval=SAMPLE_INTERVAL, flush_interval=FLUSH_INTERVAL, initializer=None):
+        self.log = log
+        self.backend = backend
+        self.resolve = resolve
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.initializer = initializer
+        self.run = None
+        self.thread = None
+        self.stopped = threading.Event()
+
+    # Take one sample at time now
+    def sample(self, now=None):
+        now = time.time() if now is None else now
+        key = None
+        try:
+            handle = self.backend.get_foreground_window()
+            if handle:
+                key = self.resolve(handle)
+        except Exception:
+            pass
+
+        run = self.run
+        if run is not None and (
+            key != run["key"]
+            or run["seconds"] >= self.flush_interval
+            or datetime.date.fromtimestamp(now) != run["day"]
+        ):
+            self.flush()
+            run = None
+        if key is not None:
+            if run is None:
+                run = self.run = {"key": key, "start": now, "day": datetime.date.fromtimestamp(now), "seconds": 0.0}
+            run["seconds"] += self.interval
+
+    # Write the current run, if any
+    def flush(self):
+        run, self.run = self.run, None
+        if run is not None and run["seconds"] >= 1:
+            project, app = run["key"]
+            try:
+                self.log.append(run["start"], run["seconds"], project, app)
+            except OSError as e:
+                print(f"Error writing activity log: {e}")
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._run, name="activity-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        if self.initializer is not None:
+            self.initializer()
+        next_sample = time.monotonic()
+        while not self.stopped.is_set():
+            self.sample()
+            next_sample += self.interval
+            self.stopped.wait(max(0.0, next_sample - time.monotonic()))
+        self.flush()
+
+
+def format_duration(seconds):
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report time spent per project and app")
+    parser.add_argument("--by", default="project", help="comma-separated fields to group by: project, app, day")
+    parser.add_argument("--days", type=int, default=7, help="how many days back to include, today included")
+    parser.add_argument("--path", default=ACTIVITY_PATH, help="activity log folder")
+    args = parser.parse_args()
+
+    by = tuple(field.strip() for field in args.by.split(",") if field.strip())
+    if not by or any(field not in FIELDS for field in by):
+        parser.error("--by takes project, app and/or day")
+
+    log = ActivityLog(args.path)
+    start = datetime.date.today() - datetime.timedelta(days=args.days - 1)
+    totals = log.totals(by, start=start)
+    for key, seconds in sorted(totals.items(), key=lambda item: -item[1]):
+        label = " / ".join(str(part) or "(none)" for part in (key if isinstance(key, tuple) else (key,)))
+        print(f"{format_duration(seconds):>9}  {label}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,313 +1,75 @@
-import os
-import json
+import datetime
+import atexit
 import tkinter as tk
 from tkinter import ttk, simpledialog
-from threading import Thread
-import time
-import subprocess
-import pygetwindow as gw
-import shutil
-import psutil
-import win32gui
-import win32process
-from pywinauto import Application
-import ctypes
-from pychrome import Browser
-
-# Path to the projects directory
-PROJECTS_PATH = r"C:\Users\ScottMason(Qrometric\OneDrive - Qrometric\Projects"
-
-# File for top-level assignments
-TOP_ASSIGNMENTS_FILE = os.path.join(PROJECTS_PATH, "top_assignments.json")
-
-
-# Function to get a list of projects (folders in the directory)
-def get_project_list():
-    try:
-        return [f.name for f in os.scandir(PROJECTS_PATH) if f.is_dir()]
-    except Exception as e:
-        print(f"Error reading project directory: {e}")
-        return []
-
-
-# Function to save all assignments to the top-level JSON
-def save_top_assignments(assignments):
-    try:
-        with open(TOP_ASSIGNMENTS_FILE, "w") as f:
-            json.dump(assignments, f, indent=4)
-    except Exception as e:
-        print(f"Error saving top assignments: {e}")
-
-
-# Function to save programs assigned to a specific project to its folder
-def save_project_programs(project_name, programs_metadata):
-    project_path = os.path.join(PROJECTS_PATH, project_name)
-    project_file = os.path.join(project_path, "current_programs.json")
-
-    # Ensure the project folder exists
-    if not os.path.exists(project_path):
-        os.makedirs(project_path, exist_ok=True)
-
-    # Save the programs metadata to the project-specific JSON
-    try:
-        with open(project_file, "w") as f:
-            json.dump(programs_metadata, f, indent=4)
-    except Exception as e:
-        print(f"Error saving project programs for {project_name}: {e}")
-
-
-# Function to close windows by title
-def close_windows_by_title(window_titles):
-    for title in window_titles:
-        for win in gw.getWindowsWithTitle(title):
-            try:
-                win.close()
-            except Exception as e:
-                print(f"Error closing window {title}: {e}")
-
-
-# Function to upload project to Git
-def upload_project_to_git(project_name):
-    project_path = os.path.join(PROJECTS_PATH, project_name)
-    try:
-        # Add and commit changes
-        subprocess.run(["git", "-C", project_path, "add", "."], check=True)
-        subprocess.run(["git", "-C", project_path, "commit", "-m", "Project closed"], check=True)
-        
-        # Try pushing with upstream for first time push
-        try:
-            subprocess.run(["git", "-C", project_path, "push", "--set-upstream", "origin", "master"], check=True)
-        except subprocess.CalledProcessError:
-            # If upstream is already set, do regular push
-            subprocess.run(["git", "-C", project_path, "push"], check=True)
-            
-        print(f"Uploaded project {project_name} to Git.")
-    except Exception as e:
-        print(f"Error uploading project {project_name} to Git: {e}")
-
-
-
-# Function to prompt for project notes
+from threading import Event, Thread
+import os
+import tempfile
+import organizer
+from organizer import (
+    assign_windows,
+    close_active_project,
+    describe_close_progress,
+    get_project_list,
+    refresh_history_search,
+    restore_project,
+    search_windows,
+    update_assignments,
+    window_activity,
+    MAX_NEW_WINDOW_ROWS,
+)
+from lazy_tree import LazyTree, apply_row_event
+from reconcile import TrackedAssignments
+from service_client import ServiceClient, ServiceError, follow
+from time_tracking import ActivityLog, ActivitySampler, format_duration
+from ui_queue import UIQueue
+
+# How often the "Today" time summary is refreshed, in milliseconds
+ACTIVITY_REFRESH_MS = 60000
+
+# Where "Profile Update Loop" writes its cProfile capture, and for how many ticks
+PROFILE_PATH = os.path.join(tempfile.gettempdir(), "organizer_update.prof")
+PROFILE_TICKS = 20
+
+# How often the performance panel is refreshed, in milliseconds
+METRICS_REFRESH_MS = 1000
+
+
+# Function to prompt for project notes; returns them, or "" if none were given
 def prompt_for_notes(project_name):
-    notes_file_path = os.path.join(PROJECTS_PATH, project_name, "closing_notes.txt")
-    notes = tk.simpledialog.askstring("Project Notes", f"Enter notes for {project_name}:")
-    if notes:
-        with open(notes_file_path, "w") as f:
-            f.write(notes)
-        print(f"Notes saved for project {project_name}.")
-
-
-# Function to close the active project
-def close_active_project(active_project, assignments, tree):
-    if not active_project:
-        print("No active project set.")
-        return
-
-    project_path = os.path.join(PROJECTS_PATH, active_project)
-    savestate_path = os.path.join(project_path, "Savedstates")
-    last_state_path = os.path.join(project_path, "Savedstates\LastState")
-    
-
-    # Get next state number
-    existing_states = [
-        int(f.replace("state", "").split(".")[0])  # Remove 'state' and extract the numeric part
-        for f in os.listdir(savestate_path)
-        if f.startswith("state") and f.endswith(".json")  # Ensure the file matches the expected pattern
-    ]
-    next_state = max(existing_states, default=0) + 1
-
-    # Copy last_state/state.json to savestate/state{n+1}.json if it exists
-    last_state_file = os.path.join(last_state_path, "state.json")
-    if os.path.exists(last_state_file):
-        shutil.copy2(last_state_file, os.path.join(savestate_path, f"state{next_state}.json"))
-
-    # Copy current_programs.json to last_state/state.json
-    current_programs = os.path.join(project_path, "current_programs.json")
-    if os.path.exists(current_programs):
-        shutil.copy2(current_programs, last_state_file)
-
-    # Get all windows associated with the active project
-    project_windows = [window for window, project in assignments.items() if project == active_project]
-
-    # Close all associated windows
-    close_windows_by_title(project_windows)
-
-    # Upload project folder to Git
-    upload_project_to_git(active_project)
-
-    # Prompt for notes
-    prompt_for_notes(active_project)
-
-    # Remove project from the GUI
-    if tree.exists(active_project):
-        tree.delete(active_project)
-
-    # Remove project from assignments
-    for window in project_windows:
-        assignments.pop(window, None)
-
-
-# Function to get a list of open windows
-def get_open_windows():
-    windows_data = []
-
-    # Helper function to get the executable name from a PID
-    def get_process_name(pid):
-        try:
-            process = psutil.Process(pid)
-            return process.name(), process.exe()
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return None, None
-
-    # Get all windows using pygetwindow
-    windows = gw.getAllWindows()
-
-    # Connect to Chrome debugging protocol for Chrome-specific metadata
-    try:
-        browser = Browser(url="http://127.0.0.1:9222")
-        chrome_tabs = browser.list_tab()
-        chrome_data = {tab["id"]: tab for tab in chrome_tabs}
-    except Exception:
-        chrome_data = {}
-
-    # Iterate through each window to collect metadata
-    for window in windows:
-        if not window.title.strip():
-            continue
-
-        hwnd = window._hWnd
-        metadata = {
-            "title": window.title,
-            "pid": None,
-            "process_name": None,
-            "exe_path": None,
-            "class_name": None,
-            "rect": window.box,
-            "is_visible": None,
-            "chrome_url": None,
-            "vscode_workspace": None,
-        }
-
-        # Get process and executable info using win32process and psutil
-        try:
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            metadata["pid"] = pid
-            process_name, exe_path = get_process_name(pid)
-            metadata["process_name"] = process_name
-            metadata["exe_path"] = exe_path
-        except Exception:
-            pass
-
-        # Get window class name and visibility using win32gui
-        try:
-            metadata["class_name"] = win32gui.GetClassName(hwnd)
-            metadata["is_visible"] = win32gui.IsWindowVisible(hwnd)
-        except Exception:
-            pass
-
-        # Check if the window belongs to Chrome and get tab URL
-        if metadata["process_name"] == "chrome.exe":
-            for tab_id, tab_info in chrome_data.items():
-                if tab_info["title"] in metadata["title"]:
-                    metadata["chrome_url"] = tab_info["url"]
-
-        # Check if the window belongs to VSCode and get workspace info
-        if metadata["process_name"] == "Code.exe":
-            try:
-                app = Application(backend="uia").connect(process=metadata["pid"])
-                main_window = app.window(title=metadata["title"])
-                workspace = main_window.child_window(auto_id="workbench.parts.editor").texts()
-                metadata["vscode_workspace"] = workspace
-            except Exception:
-                pass
-
-        # Add metadata to the result
-        windows_data.append(metadata)
-
-    return windows_data
-
-
-# Real-time update function for the GUI
-def update_assignments(tree, new_windows_tree, assignments, last_assignments, new_assignments):
-    while True:
-        # Fetch the current open windows (list of dictionaries)
-        windows = get_open_windows()  # Replace this with the actual function to retrieve window metadata
-        
-        # Extract window titles as unique identifiers
-        current_window_titles = {window["title"] for window in windows}
-
-        # Handle new windows: Add to assignments as "Unassigned" and track in new_assignments
-        new_window_titles = current_window_titles - set(last_assignments.keys())
-        for new_window_title in new_window_titles:
-            if new_window_title not in assignments:
-                new_assignments[new_window_title] = "Unassigned"
-
-                # Add to the "Newly Detected Windows" Treeview in a thread-safe manner
-                if not new_windows_tree.exists(new_window_title):
-                    new_windows_tree.insert("", tk.END, iid=new_window_title, values=(new_window_title,))
-
-        # Handle closed windows: Remove from assignments and last_assignments
-        closed_window_titles = set(last_assignments.keys()) - current_window_titles
-        for closed_window_title in closed_window_titles:
-            last_assignments.pop(closed_window_title, None)
-
-            # Remove closed windows from the new windows tree
-            if new_windows_tree.exists(closed_window_title):
-                new_windows_tree.delete(closed_window_title)
-
-        # Group and update the left-hand Treeview (group by project)
-        assignment_groups = {}
-        metadata_by_project = {}
-        for window_title, project in assignments.items():
-            if project not in assignment_groups:
-                assignment_groups[project] = []
-                metadata_by_project[project] = {}
-            assignment_groups[project].append(window_title)
-
-            # Collect metadata for each window
-            window_metadata = next((w for w in windows if w["title"] == window_title), {})
-            metadata_by_project[project][window_title] = window_metadata
-
-        # Update the left-hand Treeview
-        for project, group_windows in assignment_groups.items():
-            # Add project group if missing
-            if not tree.exists(project):
-                tree.insert("", tk.END, iid=project, text=project, open=True)
-
-            # Add windows to the project group
-            existing_items = set(tree.get_children(project))
-            for window_title in group_windows:
-                if window_title not in existing_items:
-                    tree.insert(project, tk.END, iid=window_title, text=window_title)
-
-        # Remove items no longer present in the current assignments
-        for project in tree.get_children():
-            for window_title in tree.get_children(project):
-                if window_title not in assignments:
-                    tree.delete(window_title)
-
-        # Save updated assignments and project programs
-        save_top_assignments(assignments)
-        for project, metadata in metadata_by_project.items():
-            if project != "Unassigned":
-                save_project_programs(project, metadata)
-
-        # Update last_assignments to match the current state
-        last_assignments.clear()
-        last_assignments.update(assignments)
-
-        # Reset new_assignments for the next cycle
-        new_assignments.clear()
-
-        time.sleep(2)
-
-
-
+    return tk.simpledialog.askstring("Project Notes", f"Enter notes for {project_name}:") or ""
+
+
+# Function to summarize the metrics for the performance panel: one line per
+# phase, then the counters that explain them
+def describe_metrics(snapshot):
+    lines = [f"{'phase':<22}{'count':>7}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}"]
+    for name, phase in sorted(snapshot["phases"].items()):
+        lines.append(f"{name:<22}{phase['count']:>7}{phase['p50_ms']:>9.1f}{phase['p99_ms']:>9.1f}{phase['max_ms']:>9.1f}")
+    counters = snapshot["counters"]
+    probes = snapshot.get("probes", {})
+    store = snapshot.get("json_store", {})
+    cache = snapshot.get("metadata_cache", {})
+    lines.append(
+        f"windows scanned {counters.get('windows_scanned', 0)}, reprobed {counters.get('windows_reprobed', 0)}; "
+        f"probes skipped {probes.get('skipped', 0)}, timed out {probes.get('timed_out', 0)}"
+    )
+    lines.append(
+        f"bytes written {store.get('bytes_written', 0)} in {store.get('writes', 0)} writes; "
+        f"cache hit rate {cache.get('hit_rate', 0):.0%}"
+    )
+    return "\n".join(lines)
 
 
-# GUI setup
-def setup_gui():
-    projects = get_project_list()  # Replace with your actual function to get project names
+# GUI setup. With a client for a running organizer service, the GUI only
+# shows the service's trees and sends it commands; otherwise it tracks
+# windows itself.
+def setup_gui(client=None):
+    if client is not None:
+        projects = [project["name"] for project in client.projects()]
+    else:
+        organizer.init()
+        projects = get_project_list()  # Replace with your actual function to get project names
 
     root = tk.Tk()
     root.title("Window Project Manager")
@@ -319,6 +81,14 @@ def setup_gui():
     left_frame = tk.Frame(root)
     left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
+    # Filter box: matching open windows, and projects that had a match open
+    search_text = tk.StringVar()
+    search_entry = ttk.Entry(left_frame, textvariable=search_text)
+    search_entry.pack(fill=tk.X, padx=10, pady=5)
+    search_results = tk.Listbox(left_frame, height=8)
+    search_results.pack(fill=tk.X, padx=10)
+    search_ids = []
+
     left_label = tk.Label(left_frame, text="Assigned Windows by Project", font=("Arial", 12, "bold"))
     left_label.pack(anchor="w", padx=10, pady=5)
 
@@ -352,130 +122,263 @@ def setup_gui():
     project_dropdown.pack(pady=10)
 
     # Assignments dictionaries
-    assignments = {}
+    assignments = TrackedAssignments()
     last_assignments = {}
     new_assignments = {}
 
+    # Batched widget updates, applied from the Tk main loop
+    ui = UIQueue()
+    ui.attach(root)
+    if client is None:
+        organizer.metrics.add_gauge("ui_queue", lambda: {"pending": ui.pending(), "dropped": ui.dropped})
+
+    # Lazy views over both trees; metadata rows are created on expand
+    assigned_view = LazyTree(tree, ui)
+    new_windows_view = LazyTree(new_windows_tree, ui, max_rows=MAX_NEW_WINDOW_ROWS)
+
         # Function to assign/reassign selected windows to a project
     def assign_project():
         selected_items = new_windows_tree.selection() + tree.selection()  # Combine selections from both tables
         if selected_items and selected_project.get():
-            project_name = selected_project.get()
-
-            # Collect metadata for all assigned windows
-            project_metadata = {}
-
-            for item in selected_items:
-                metadata = {}
-
-                # Check if the item exists in the new windows tree
-                if new_windows_tree.exists(item):
-                    # Retrieve metadata before removing the item
-                    metadata_json = new_windows_tree.item(item, "values")
-                    if len(metadata_json) < 2:
-                        print(f"Error: Metadata missing for item {item}, values: {metadata_json}")
-                        continue
-                    metadata = json.loads(metadata_json[1])
-
-                    # Remove from the new windows tree
-                    new_windows_tree.delete(item)
-                elif tree.exists(item):
-                    # Retrieve metadata from the assigned windows tree
-                    for child in tree.get_children(item):
-                        text = tree.item(child, "text")
-                        if ": " in text:
-                            key, value = text.split(": ", 1)
-                            metadata[key] = value
-                        else:
-                            print(f"Skipping child node with unexpected text format: {text}")
-
-                    # Remove the window from its current project group
-                    for project in tree.get_children():
-                        if item in tree.get_children(project):
-                            tree.delete(item)
-                            break
-                else:
-                    continue  # Skip if the item doesn't exist in either tree
-
-                # Update assignments dictionary
-                assignments[item] = project_name
-
-                # Add the window metadata to the project metadata
-                project_metadata[item] = metadata
-
-                # Add the window to the new project group
-                if not tree.exists(project_name):
-                    tree.insert("", tk.END, iid=project_name, text=project_name, open=True)
-
-                # Add the window title under the project group
-                tree.insert(project_name, tk.END, iid=item, text=item)
-
-                # Add metadata as child nodes
-                for key, value in metadata.items():
-                    tree.insert(item, tk.END, text=f"{key}: {value}")
-
-            # Save updated assignments
-            save_top_assignments(assignments)
-
-            # Save project-specific programs with metadata
-            save_project_programs(project_name, project_metadata)
+            if client is not None:
+                # The service updates the trees through its events
+                windows = [item for item in selected_items if item in new_windows_view or assigned_view.parent(item)]
+                try:
+                    client.assign(windows, selected_project.get())
+                except ServiceError as e:
+                    status.set(str(e))
+                return
+
+            assign_windows(selected_items, selected_project.get(), assignments, assigned_view, new_windows_view)
+
+            # Apply all of the above in one pass
+            ui.drain()
+
+    def run_search(*_):
+        query = search_text.get()
+        search_results.delete(0, tk.END)
+        search_ids.clear()
+        if not query.strip():
+            return
+        if client is not None:
+            # Asked of the service off the Tk thread; only the latest query
+            # is sent once the previous request returns
+            pending_search["query"] = query
+            search_wanted.set()
+            return
+        show_search_results(query, search_windows(query, assignments))
+
+    def show_search_results(query, found):
+        # Results for a query that has since been edited are dropped
+        if query != search_text.get():
+            return
+        search_results.delete(0, tk.END)
+        search_ids.clear()
+        for window in found["windows"]:
+            search_results.insert(tk.END, f"{window['title']}  [{window.get('project') or 'unassigned'}]")
+            search_ids.append(window["id"])
+        if found["projects"]:
+            seen = ", ".join(
+                f"{project['project']} ({datetime.date.fromtimestamp(project['last_seen']).isoformat()})"
+                for project in found["projects"][:10]
+            )
+            search_results.insert(tk.END, f"Previously open in: {seen}")
+
+    # Double-click a window result to select its row
+    def show_search_result(_):
+        selection = search_results.curselection()
+        if not selection or selection[0] >= len(search_ids):
+            return
+        key = search_ids[selection[0]]
+        for widget in (tree, new_windows_tree):
+            if widget.exists(key):
+                widget.see(key)
+                widget.selection_set(key)
+                return
+
+    pending_search = {"query": None}
+    search_wanted = Event()
+
+    def search_service():
+        while True:
+            search_wanted.wait()
+            search_wanted.clear()
+            query = pending_search["query"]
+            try:
+                found = client.search(query)
+            except ServiceError as e:
+                ui.call(status.set, str(e))
+                continue
+            ui.call(show_search_results, query, found)
 
+    if client is not None:
+        Thread(target=search_service, daemon=True).start()
 
+    search_text.trace_add("write", run_search)
+    search_results.bind("<Double-Button-1>", show_search_result)
 
     # Assign button
     assign_button = ttk.Button(root, text="Assign to Project", command=assign_project)
     assign_button.pack(pady=5)
 
-    # Function to populate new windows with metadata
-    def populate_new_windows():
-        windows = get_open_windows()  # Replace with your actual function to get window metadata
-        for window in windows:
-            metadata_json = json.dumps(window, indent=2)
-
-            # Generate a unique identifier for the Treeview item
-            unique_id = f"{window['title']}_{window.get('pid', '')}"
-
-            # Check if the item already exists in the Treeview
-            if not new_windows_tree.exists(unique_id):
-                # Insert the window title as a parent item
-                new_windows_tree.insert("", tk.END, iid=unique_id, text=window["title"], values=(window["title"], metadata_json))
-
-                # Insert metadata as child items
-                for key, value in window.items():
-                    new_windows_tree.insert(unique_id, tk.END, text=f"{key}: {value}")
-
-    # Function to populate the assigned windows tree
-    def populate_assigned_windows():
-        for project, group_windows in assignments.items():
-            # Create project group if not exists
-            if not tree.exists(project):
-                tree.insert("", tk.END, iid=project, text=project, open=True)
+    # Close Project button
+    def close_project():
+        project = active_project.get()
+        if not project:
+            print("No active project set.")
+            return
+        if client is None and organizer.close_pipeline.running(project):
+            print(f"Project {project} is already closing.")
+            return
+
+        # Asked for up front, so they're in the closing commit
+        notes = prompt_for_notes(project)
+        if client is None:
+            close_active_project(project, assignments, assigned_view, notes=notes)
+            return
+        try:
+            client.close(project, notes)
+        except ServiceError as e:
+            status.set(str(e))
 
-            # Add windows under the project group
-            for window_title, metadata in group_windows.items():
-                if not tree.exists(window_title):
-                    tree.insert(project, tk.END, iid=window_title, text=window_title)
+    close_button = ttk.Button(right_frame, text="Close Active Project", command=close_project)
+    close_button.pack(pady=5)
 
-                # Add metadata as child nodes
-                for key, value in metadata.items():
-                    tree.insert(window_title, tk.END, text=f"{key}: {value}")
+    # Restore Project button; restores run on their own thread
+    def restore_active_project():
+        if not active_project.get():
+            print("No active project set.")
+            return
+        if client is not None:
+            try:
+                client.restore(active_project.get())
+            except ServiceError as e:
+                status.set(str(e))
+            return
+        Thread(
+            target=restore_project,
+            args=(active_project.get(), assignments, lambda message: ui.call(status.set, message)),
+            daemon=True,
+        ).start()
+
+    restore_button = ttk.Button(right_frame, text="Restore Active Project", command=restore_active_project)
+    restore_button.pack(pady=5)
+
+    # Progress of background project closes and restores
+    status = tk.StringVar()
+    status_label = tk.Label(right_frame, textvariable=status, anchor="w")
+    status_label.pack(fill=tk.X, padx=10)
+
+    # Called from the close pipeline's threads, so the label is updated
+    # through the UI queue
+    def report_close_progress(project, stage, state, error):
+        ui.call(status.set, describe_close_progress(project, stage, state, error))
+
+    if client is None:
+        organizer.close_pipeline.on_progress = report_close_progress
+
+    # Time spent today per project, from the activity log (the service's
+    # log is on this machine too, so a client reads it directly)
+    activity_log = organizer.activity_log if client is None else ActivityLog()
+    today_text = tk.StringVar()
+    today_label = tk.Label(right_frame, textvariable=today_text, anchor="w", justify=tk.LEFT, wraplength=500)
+    today_label.pack(fill=tk.X, padx=10)
+
+    def refresh_today():
+        totals = activity_log.totals("project", start=datetime.date.today())
+        parts = [f"{project or 'Unassigned'} {format_duration(seconds)}" for project, seconds in sorted(totals.items(), key=lambda item: -item[1])]
+        today_text.set("Today: " + (", ".join(parts) or "nothing yet"))
+        root.after(ACTIVITY_REFRESH_MS, refresh_today)
+
+    refresh_today()
+
+    # Sample the foreground window for time tracking (the service does its own)
+    if client is None:
+        activity_sampler = ActivitySampler(activity_log, organizer.backend, lambda hwnd: window_activity(assignments, hwnd))
+        activity_sampler.start()
+        atexit.register(activity_sampler.stop)
+
+    # Performance panel: per-phase timings, refreshed from the Tk main loop
+    metrics_frame = tk.LabelFrame(right_frame, text="Performance")
+    metrics_frame.pack(fill=tk.X, padx=10, pady=5)
+    metrics_text = tk.StringVar()
+    metrics_label = tk.Label(metrics_frame, textvariable=metrics_text, font=("Courier", 9), justify=tk.LEFT, anchor="w")
+    metrics_label.pack(fill=tk.X)
+
+    def refresh_metrics():
+        if client is not None:
+            Thread(target=fetch_service_metrics, daemon=True).start()
+            return
+        metrics_text.set(describe_metrics(organizer.metrics.snapshot()))
+        root.after(METRICS_REFRESH_MS, refresh_metrics)
+
+    # Fetched off the Tk thread; the next refresh is scheduled only once this
+    # one returns, so a stalled service doesn't pile up requests
+    def fetch_service_metrics():
+        try:
+            text = describe_metrics(client.metrics())
+        except ServiceError as e:
+            text = str(e)
+        ui.call(metrics_text.set, text)
+        ui.call(root.after, METRICS_REFRESH_MS, refresh_metrics)
+
+    def profile_update_loop():
+        organizer.metrics.request_profile(PROFILE_PATH, PROFILE_TICKS)
+        status.set(f"Profiling the next {PROFILE_TICKS} updates to {PROFILE_PATH}")
+
+    # The service's update loop is profiled in the service
+    if client is None:
+        profile_button = ttk.Button(metrics_frame, text="Profile Update Loop", command=profile_update_loop)
+        profile_button.pack(pady=5)
+
+    if client is not None or organizer.metrics.enabled:
+        refresh_metrics()
+    else:
+        metrics_frame.pack_forget()
+
+    # Keep both project lists current as folders come and go
+    def update_project_lists(names):
+        ui.call(active_project_dropdown.configure, {"values": names})
+        ui.call(project_dropdown.configure, {"values": names})
+
+    if client is not None:
+        # Mirror the service's trees, and show its progress reports
+        views = {"assigned": assigned_view, "new": new_windows_view}
+
+        def on_snapshot(rows):
+            for name, view in views.items():
+                view.clear()
+                for iid, parent, metadata, options in rows[name]:
+                    view.insert(parent, iid, metadata, **options)
+
+        def on_event(event):
+            if event["type"] == "row":
+                apply_row_event(views[event["view"]], event)
+            elif event["type"] == "progress":
+                ui.call(status.set, event["message"])
+            elif event["type"] == "projects":
+                update_project_lists(event["projects"])
+
+        follow_thread = Thread(target=follow, args=(client, on_snapshot, on_event), daemon=True)
+        follow_thread.start()
+        root.mainloop()
+        return
 
-    # Close Project button
-    close_button = ttk.Button(right_frame, text="Close Active Project", command=lambda: close_active_project(active_project.get(), assignments, tree))
-    close_button.pack(pady=5)
+    organizer.project_index.add_listener(update_project_lists)
+    organizer.project_index.add_listener(refresh_history_search)
+    organizer.project_index.start()
+    refresh_history_search()
 
     # Start the real-time update thread
     update_thread = Thread(
         target=update_assignments,
-        args=(tree, new_windows_tree, assignments, last_assignments, new_assignments),
+        args=(assigned_view, new_windows_view, assignments, last_assignments, new_assignments),
         daemon=True  # Ensure the thread stops when the main program exits
     )
     update_thread.start()
 
-    # Populate new windows initially
-    populate_new_windows()
-
     root.mainloop()
 
 if __name__ == "__main__":
-    setup_gui()
\ No newline at end of file
+    # Use the organizer service if it's running
+    setup_gui(ServiceClient.discover())
\ No newline at end of file
@@ -0,0 +1,172 @@
+import itertools
+import threading
+import tkinter as tk
+from collections import OrderedDict
+
+# How often the Tk main loop drains the queue, in milliseconds
+DRAIN_INTERVAL = 50
+
+# Drains a command is kept for while its parent item doesn't exist, before
+# it's dropped
+MAX_DEFERRALS = 20
+
+
+# Batched queue of Treeview updates. Any thread may post; only the Tk thread
+# applies them, all at once, from root.after. Repeated updates to the same
+# item are folded so each item is touched at most once per batch.
+class UIQueue:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.commands = OrderedDict()
+        self.anonymous = itertools.count()
+        self.root = None
+        self.interval = DRAIN_INTERVAL
+        self.dropped = 0
+
+    def _post(self, key, command):
+        with self.lock:
+            previous = self.commands.get(key)
+            if previous is not None:
+                command = merge_commands(previous, command)
+            self.commands[key] = command
+
+    def _key(self, tree, iid):
+        if iid is None:
+            return (id(tree), ("anonymous", next(self.anonymous)))
+        return (id(tree), iid)
+
+    # Insert an item, or move/update it if it already exists
+    def insert(self, tree, parent, iid=None, **options):
+        self._post(self._key(tree, iid), {"op": "insert", "tree": tree, "parent": parent, "iid": iid, "options": options})
+
+    def delete(self, tree, iid):
+        self._post(self._key(tree, iid), {"op": "delete", "tree": tree, "iid": iid})
+
+    def move(self, tree, iid, parent):
+        self._post(self._key(tree, iid), {"op": "move", "tree": tree, "iid": iid, "parent": parent})
+
+    def item(self, tree, iid, **options):
+        self._post(self._key(tree, iid), {"op": "item", "tree": tree, "iid": iid, "options": options})
+
+    # Run an arbitrary callable on the Tk thread, in order with the rest
+    def call(self, function, *args):
+        self._post(("call", next(self.anonymous)), {"op": "call", "function": function, "args": args})
+
+    def pending(self):
+        with self.lock:
+            return len(self.commands)
+
+    # Start draining periodically from the Tk main loop
+    def attach(self, root, interval=DRAIN_INTERVAL):
+        self.root = root
+        self.interval = interval
+        root.after(interval, self._tick)
+
+    def _tick(self):
+        self.drain()
+        self.root.after(self.interval, self._tick)
+
+    # Apply everything queued so far. Must be called on the Tk thread.
+    # Commands whose parent doesn't exist yet are retried after the rest of
+    # the batch, so folding updates never breaks parent-before-child order.
+    # Ones still waiting go back on the queue for the next drain, unless the
+    # batch deleted their parent.
+    def drain(self):
+        with self.lock:
+            commands, self.commands = self.commands, OrderedDict()
+        waiting = list(commands.items())
+        deferred = []
+        deleted = set()
+        while waiting:
+            deferred = []
+            for key, command in waiting:
+                try:
+                    if not apply_command(command):
+                        deferred.append((key, command))
+                    elif command["op"] == "delete":
+                        deleted.add(key)
+                except tk.TclError as e:
+                    print(f"Error applying UI update {command['op']} {command.get('iid')}: {e}")
+            if len(deferred) == len(waiting):
+                break
+            waiting = deferred
+        self._requeue([
+            (key, command) for key, command in deferred
+            if (id(command["tree"]), command["parent"]) not in deleted
+        ])
+        return len(commands)
+
+    # Put commands still waiting for their parent back at the front of the
+    # queue, folding in anything posted for the same items since. A command
+    # whose parent hasn't appeared after MAX_DEFERRALS drains is dropped.
+    def _requeue(self, deferred):
+        kept = OrderedDict()
+        for key, command in deferred:
+            deferrals = command.get("deferrals", 0) + 1
+            if deferrals > MAX_DEFERRALS:
+                self.dropped += 1
+                print(f"Dropping UI update {command['op']} {command['iid']}: parent {command['parent']} never appeared")
+            else:
+                kept[key] = dict(command, deferrals=deferrals)
+        if not kept:
+            return
+        with self.lock:
+            for key, command in self.commands.items():
+                previous = kept.get(key)
+                kept[key] = command if previous is None else merge_commands(previous, command)
+            self.commands = kept
+
+
+# Fold a new command for an item into the one already queued for it
+def merge_commands(previous, command):
+    op, previous_op = command["op"], previous["op"]
+    if op == "delete":
+        return command
+    if previous_op == "delete" and op == "insert":
+        return dict(command, replace=True)
+    if previous_op == "insert" and op == "item":
+        return dict(previous, options={**previous["options"], **command["options"]})
+    if previous_op == "insert" and op == "move":
+        return dict(previous, parent=command["parent"])
+    if previous_op == "item" and op == "item":
+        return dict(command, options={**previous["options"], **command["options"]})
+    if previous_op == "insert" and op == "insert":
+        return dict(command, replace=previous.get("replace", False))
+    return command
+
+
+# Apply one command to its Treeview. Returns False if it has to wait for
+# its parent item to be created.
+def apply_command(command):
+    op = command["op"]
+    if op == "call":
+        command["function"](*command["args"])
+        return True
+    tree, iid = command["tree"], command["iid"]
+    exists = iid is not None and tree.exists(iid)
+    if op == "insert":
+        if exists and command.get("replace"):
+            tree.delete(iid)
+            exists = False
+        parent = command["parent"]
+        if parent != "" and not tree.exists(parent):
+            return False
+        if exists:
+            if tree.parent(iid) != parent:
+                tree.move(iid, parent, tk.END)
+            if command["options"]:
+                tree.item(iid, **command["options"])
+        else:
+            tree.insert(parent, tk.END, iid=iid, **command["options"])
+    elif op == "delete":
+        if exists:
+            tree.delete(iid)
+    elif op == "move":
+        if exists:
+            if command["parent"] != "" and not tree.exists(command["parent"]):
+                return False
+            tree.move(iid, command["parent"], tk.END)
+    elif op == "item":
+        if exists:
+            tree.item(iid, **command["options"])
+    return True
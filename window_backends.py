@@ -0,0 +1,504 @@
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+from window_events import WindowEventSource, FakeEventSource, CREATED, DESTROYED, RETITLED, FOCUS_CHANGED
+
+
+# Platform layer for everything the organizer asks of the window system.
+# Handles are opaque, hashable window ids (HWNDs on Windows, XIDs on X11).
+class WindowBackend:
+    name = None
+
+    # List (handle, title) for every top-level window with a non-empty title
+    def list_windows(self):
+        raise NotImplementedError
+
+    def get_title(self, handle):
+        raise NotImplementedError
+
+    def get_pid(self, handle):
+        raise NotImplementedError
+
+    # Window rectangle as (left, top, width, height)
+    def get_rect(self, handle):
+        raise NotImplementedError
+
+    def get_class_name(self, handle):
+        return None
+
+    def is_visible(self, handle):
+        return None
+
+    # Return (process_name, exe_path) for a pid, or (None, None)
+    def get_process_info(self, pid):
+        try:
+            import psutil
+
+            process = psutil.Process(pid)
+            return process.name(), process.exe()
+        except Exception:
+            return None, None
+
+    # Process start time as a timestamp, or None. Together with the pid it
+    # identifies a process even after the pid is reused.
+    def get_process_start(self, pid):
+        try:
+            import psutil
+
+            return psutil.Process(pid).create_time()
+        except Exception:
+            return None
+
+    # Attach an automation client to a process (slow; callers cache it)
+    def attach_app(self, pid):
+        return None
+
+    # Open editor info for a VS Code window, given the attached app
+    def get_vscode_workspace(self, app, title):
+        return None
+
+    def get_foreground_window(self):
+        return None
+
+    def close_window(self, handle):
+        raise NotImplementedError
+
+    # Start a program and return its pid
+    def launch(self, exe_path, args=()):
+        return subprocess.Popen([exe_path, *args]).pid
+
+    # Move and resize a window to (left, top, width, height)
+    def move_window(self, handle, rect):
+        raise NotImplementedError
+
+    # Event source that reports window changes as they happen
+    def event_source(self):
+        raise NotImplementedError
+
+    # Per-thread setup for probe worker threads
+    def init_worker_thread(self):
+        pass
+
+
+# Win32 backend. pywin32 and pywinauto are imported only when it's created.
+class Win32Backend(WindowBackend):
+    name = "win32"
+
+    def __init__(self):
+        import win32con
+        import win32gui
+        import win32process
+
+        self.win32con = win32con
+        self.win32gui = win32gui
+        self.win32process = win32process
+
+    def list_windows(self):
+        windows = []
+
+        # Only visible windows with a title, as pygetwindow listed them;
+        # hidden tool, IME and shell windows aren't anyone's programs
+        def collect(hwnd, _):
+            if not self.win32gui.IsWindowVisible(hwnd):
+                return True
+            title = self.win32gui.GetWindowText(hwnd)
+            if title.strip():
+                windows.append((hwnd, title))
+            return True
+
+        self.win32gui.EnumWindows(collect, None)
+        return windows
+
+    def get_title(self, handle):
+        return self.win32gui.GetWindowText(handle)
+
+    def get_pid(self, handle):
+        _, pid = self.win32process.GetWindowThreadProcessId(handle)
+        return pid
+
+    def get_rect(self, handle):
+        left, top, right, bottom = self.win32gui.GetWindowRect(handle)
+        return (left, top, right - left, bottom - top)
+
+    def get_class_name(self, handle):
+        return self.win32gui.GetClassName(handle)
+
+    def is_visible(self, handle):
+        return bool(self.win32gui.IsWindowVisible(handle))
+
+    def attach_app(self, pid):
+        from pywinauto import Application
+
+        return Application(backend="uia").connect(process=pid)
+
+    def get_vscode_workspace(self, app, title):
+        main_window = app.window(title=title)
+        return main_window.child_window(auto_id="workbench.parts.editor").texts()
+
+    def get_foreground_window(self):
+        return self.win32gui.GetForegroundWindow() or None
+
+    def close_window(self, handle):
+        self.win32gui.PostMessage(handle, self.win32con.WM_CLOSE, 0, 0)
+
+    def move_window(self, handle, rect):
+        left, top, width, height = rect
+        self.win32gui.MoveWindow(handle, left, top, width, height, True)
+
+    def event_source(self):
+        from window_events import Win32EventSource
+
+        return Win32EventSource()
+
+    # Probe workers talk to UIA, so each one needs COM initialized
+    def init_worker_thread(self):
+        try:
+            import pythoncom
+
+            pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+        except Exception as e:
+            print(f"Error initializing COM for probe thread: {e}")
+
+
+# X11 backend for EWMH window managers, using python-xlib. Windows come from
+# _NET_CLIENT_LIST on the root window and pids from _NET_WM_PID.
+class X11Backend(WindowBackend):
+    name = "x11"
+
+    def __init__(self, display_name=None):
+        from Xlib import X, display
+
+        self.X = X
+        self.display_name = display_name
+        self.display = display.Display(display_name)
+        self.root = self.display.screen().root
+        self.lock = threading.Lock()
+        self.atoms = {}
+
+    def atom(self, name):
+        if name not in self.atoms:
+            self.atoms[name] = self.display.intern_atom(name)
+        return self.atoms[name]
+
+    def _property(self, window, name, property_type=None):
+        prop = window.get_full_property(self.atom(name), property_type if property_type is not None else self.X.AnyPropertyType)
+        return prop.value if prop is not None else None
+
+    def _window(self, handle):
+        return self.display.create_resource_object("window", handle)
+
+    def _title(self, window):
+        value = self._property(window, "_NET_WM_NAME", self.atom("UTF8_STRING"))
+        if value is None:
+            value = window.get_wm_name()
+        if isinstance(value, bytes):
+            value = value.decode("utf-8", "replace")
+        return value or ""
+
+    def client_list(self):
+        with self.lock:
+            return list(self._property(self.root, "_NET_CLIENT_LIST") or [])
+
+    def list_windows(self):
+        windows = []
+        for handle in self.client_list():
+            try:
+                title = self.get_title(handle)
+            except Exception:
+                continue
+            if title.strip():
+                windows.append((handle, title))
+        return windows
+
+    def get_title(self, handle):
+        with self.lock:
+            return self._title(self._window(handle))
+
+    def get_pid(self, handle):
+        with self.lock:
+            value = self._property(self._window(handle), "_NET_WM_PID")
+        return int(value[0]) if value else None
+
+    def get_rect(self, handle):
+        with self.lock:
+            window = self._window(handle)
+            geometry = window.get_geometry()
+            origin = window.translate_coords(self.root, 0, 0)
+        return (-origin.x, -origin.y, geometry.width, geometry.height)
+
+    def get_class_name(self, handle):
+        with self.lock:
+            wm_class = self._window(handle).get_wm_class()
+        return wm_class[1] if wm_class else None
+
+    def is_visible(self, handle):
+        with self.lock:
+            window = self._window(handle)
+            if window.get_attributes().map_state != self.X.IsViewable:
+                return False
+            state = self._property(window, "_NET_WM_STATE") or []
+            return self.atom("_NET_WM_STATE_HIDDEN") not in state
+
+    def get_foreground_window(self):
+        with self.lock:
+            value = self._property(self.root, "_NET_ACTIVE_WINDOW")
+        return int(value[0]) if value and value[0] else None
+
+    def close_window(self, handle):
+        from Xlib import protocol
+
+        with self.lock:
+            event = protocol.event.ClientMessage(
+                window=self._window(handle),
+                client_type=self.atom("_NET_CLOSE_WINDOW"),
+                data=(32, [int(time.time()), 2, 0, 0, 0]),
+            )
+            mask = self.X.SubstructureRedirectMask | self.X.SubstructureNotifyMask
+            self.root.send_event(event, event_mask=mask)
+            self.display.flush()
+
+    def move_window(self, handle, rect):
+        left, top, width, height = rect
+        with self.lock:
+            self._window(handle).configure(x=left, y=top, width=width, height=height)
+            self.display.flush()
+
+    def event_source(self):
+        return X11EventSource(self.display_name)
+
+
+# X11 event source: watches _NET_CLIENT_LIST and _NET_ACTIVE_WINDOW on the
+# root window and _NET_WM_NAME on every client, on its own connection
+class X11EventSource(WindowEventSource):
+    def __init__(self, display_name=None):
+        self.display_name = display_name
+        self.backend = None
+        self.emit = None
+        self.thread = None
+        self.stopped = threading.Event()
+        self.clients = set()
+
+    def snapshot(self):
+        if self.backend is None:
+            self.backend = X11Backend(self.display_name)
+        return dict(self.backend.list_windows())
+
+    def start(self, emit):
+        if self.backend is None:
+            self.backend = X11Backend(self.display_name)
+        self.emit = emit
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(5)
+
+    def _watch(self, handle):
+        try:
+            self.backend._window(handle).change_attributes(event_mask=self.backend.X.PropertyChangeMask)
+        except Exception:
+            pass
+
+    def _run(self):
+        import select
+
+        backend, X = self.backend, self.backend.X
+        backend.root.change_attributes(event_mask=X.PropertyChangeMask)
+        self.clients = set(backend.client_list())
+        for handle in self.clients:
+            self._watch(handle)
+        backend.display.flush()
+
+        client_list, active_window = backend.atom("_NET_CLIENT_LIST"), backend.atom("_NET_ACTIVE_WINDOW")
+        title_atoms = {backend.atom("_NET_WM_NAME"), backend.atom("WM_NAME")}
+        while not self.stopped.is_set():
+            if not backend.display.pending_events():
+                select.select([backend.display.fileno()], [], [], 0.5)
+                if not backend.display.pending_events():
+                    continue
+            event = backend.display.next_event()
+            if event.type != X.PropertyNotify:
+                continue
+            try:
+                if event.window.id == backend.root.id and event.atom == client_list:
+                    current = set(backend.client_list())
+                    for handle in current - self.clients:
+                        self._watch(handle)
+                        self.emit(CREATED, handle, backend.get_title(handle))
+                    for handle in self.clients - current:
+                        self.emit(DESTROYED, handle, None)
+                    self.clients = current
+                    backend.display.flush()
+                elif event.window.id == backend.root.id and event.atom == active_window:
+                    handle = backend.get_foreground_window()
+                    if handle:
+                        self.emit(FOCUS_CHANGED, handle, backend.get_title(handle))
+                elif event.atom in title_atoms and event.window.id in self.clients:
+                    self.emit(RETITLED, event.window.id, backend.get_title(event.window.id))
+            except Exception as e:
+                print(f"Error handling X11 event: {e}")
+
+
+# In-memory backend that makes up as many windows as asked for. Used to run
+# and benchmark the organizer without a real desktop.
+class SyntheticBackend(WindowBackend):
+    name = "synthetic"
+
+    APPS = [
+        ("chrome.exe", r"C:\Program Files\Google\Chrome\Application\chrome.exe", "Chrome_WidgetWin_1", "{} - Google Chrome"),
+        ("Code.exe", r"C:\Users\user\AppData\Local\Programs\Microsoft VS Code\Code.exe", "Chrome_WidgetWin_1", "{} - Visual Studio Code"),
+        ("EXCEL.EXE", r"C:\Program Files\Microsoft Office\root\Office16\EXCEL.EXE", "XLMAIN", "{} - Excel"),
+        ("explorer.exe", r"C:\Windows\explorer.exe", "CabinetWClass", "{}"),
+        ("notepad.exe", r"C:\Windows\System32\notepad.exe", "Notepad", "{} - Notepad"),
+    ]
+
+    def __init__(self, count=100, processes=None, seed=0, probe_delay=0.0, launch_delay=0.05):
+        self.random = random.Random(seed)
+        self.probe_delay = probe_delay
+        self.launch_delay = launch_delay
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.processes = {}
+        self.next_handle = 0x10000
+        self.foreground = None
+        process_count = processes or max(1, count // 5)
+        for index in range(process_count):
+            self.processes[1000 + index] = self.APPS[index % len(self.APPS)]
+        self.source = FakeEventSource()
+        for index in range(count):
+            self.create_window(pid=1000 + index % process_count, notify=False)
+
+    def _make_title(self, pid, number):
+        return self.processes[pid][3].format(f"Document {number}")
+
+    # Add a window and report it through the event source
+    def create_window(self, title=None, pid=None, notify=True):
+        with self.lock:
+            handle = self.next_handle
+            self.next_handle += 4
+            if pid is None:
+                pid = self.random.choice(list(self.processes))
+            if title is None:
+                title = self._make_title(pid, handle)
+            self.windows[handle] = {
+                "title": title,
+                "pid": pid,
+                "rect": (self.random.randrange(0, 1600), self.random.randrange(0, 900), 800, 600),
+                "visible": True,
+            }
+        if notify:
+            self.source.create_window(handle, title)
+        else:
+            self.source.windows[handle] = title
+        return handle
+
+    def destroy_window(self, handle):
+        with self.lock:
+            self.windows.pop(handle, None)
+        self.source.destroy_window(handle)
+
+    def retitle_window(self, handle, title):
+        with self.lock:
+            self.windows[handle]["title"] = title
+        self.source.retitle_window(handle, title)
+
+    def focus_window(self, handle):
+        self.foreground = handle
+        self.source.focus_window(handle)
+
+    def _get(self, handle):
+        with self.lock:
+            return self.windows[handle]
+
+    def list_windows(self):
+        with self.lock:
+            return [(handle, window["title"]) for handle, window in self.windows.items()]
+
+    def get_title(self, handle):
+        return self._get(handle)["title"]
+
+    def get_pid(self, handle):
+        return self._get(handle)["pid"]
+
+    def get_rect(self, handle):
+        return self._get(handle)["rect"]
+
+    def get_class_name(self, handle):
+        return self.processes[self._get(handle)["pid"]][2]
+
+    def is_visible(self, handle):
+        return self._get(handle)["visible"]
+
+    def get_process_info(self, pid):
+        if self.probe_delay:
+            time.sleep(self.probe_delay)
+        if pid not in self.processes:
+            return None, None
+        return self.processes[pid][0], self.processes[pid][1]
+
+    def get_process_start(self, pid):
+        return 1700000000.0 + pid if pid in self.processes else None
+
+    def attach_app(self, pid):
+        if self.probe_delay:
+            time.sleep(self.probe_delay)
+        return pid
+
+    def get_vscode_workspace(self, app, title):
+        return [title.rsplit(" - ", 1)[0]]
+
+    def get_foreground_window(self):
+        return self.foreground
+
+    def close_window(self, handle):
+        self.destroy_window(handle)
+
+    # Start a fake process whose window appears after launch_delay, titled
+    # after its first argument
+    def launch(self, exe_path, args=()):
+        app = next((app for app in self.APPS if app[1] == exe_path), None)
+        if app is None:
+            app = (os.path.basename(exe_path), exe_path, "Window", "{}")
+        with self.lock:
+            pid = max(self.processes, default=999) + 1
+            self.processes[pid] = app
+        title = app[3].format(args[0] if args else "Untitled")
+        timer = threading.Timer(self.launch_delay, self.create_window, kwargs={"title": title, "pid": pid})
+        timer.daemon = True
+        timer.start()
+        return pid
+
+    def move_window(self, handle, rect):
+        with self.lock:
+            self.windows[handle]["rect"] = tuple(rect)
+
+    def event_source(self):
+        return self.source
+
+
+BACKENDS = {
+    "win32": Win32Backend,
+    "x11": X11Backend,
+    "synthetic": SyntheticBackend,
+}
+
+
+# Pick a backend by name, from ORGANIZER_BACKEND, or from the platform
+def get_backend(name=None):
+    name = name or os.environ.get("ORGANIZER_BACKEND")
+    if not name:
+        if sys.platform == "win32":
+            name = "win32"
+        elif os.environ.get("DISPLAY"):
+            name = "x11"
+        else:
+            name = "synthetic"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown window backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name]()
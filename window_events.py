@@ -0,0 +1,355 @@
+import queue
+import threading
+import time
+
+# Delta kinds emitted by the window tracker
+CREATED = "created"
+DESTROYED = "destroyed"
+RETITLED = "retitled"
+FOCUS_CHANGED = "focus_changed"
+REFRESHED = "refreshed"
+
+# How long to keep collecting events after the first one arrives, so a burst
+# (e.g. a window being created, shown and titled) comes out as one batch
+COALESCE_WINDOW = 0.05
+
+
+# A single change to the set of top-level windows
+class WindowEvent:
+    __slots__ = ("kind", "hwnd", "title")
+
+    def __init__(self, kind, hwnd, title=None):
+        self.kind = kind
+        self.hwnd = hwnd
+        self.title = title
+
+    def __repr__(self):
+        return f"WindowEvent({self.kind!r}, {self.hwnd!r}, {self.title!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, WindowEvent) and (self.kind, self.hwnd, self.title) == (other.kind, other.hwnd, other.title)
+
+
+# Base class for window event sources. A source reports raw observations
+# through the emit callback as emit(kind, hwnd, title); the tracker turns
+# them into created/destroyed/retitled/focus_changed deltas.
+class WindowEventSource:
+    # Return {hwnd: title} for the top-level windows that exist right now
+    def snapshot(self):
+        raise NotImplementedError
+
+    # Start delivering events to emit(kind, hwnd, title)
+    def start(self, emit):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+
+# Scripted, in-memory event source so the tracker runs without Win32
+class FakeEventSource(WindowEventSource):
+    def __init__(self, windows=None):
+        self.windows = dict(windows or {})
+        self.emit = None
+        self.lock = threading.Lock()
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.windows)
+
+    def start(self, emit):
+        self.emit = emit
+
+    def stop(self):
+        self.emit = None
+
+    def _send(self, kind, hwnd, title):
+        if self.emit is not None:
+            self.emit(kind, hwnd, title)
+
+    def create_window(self, hwnd, title):
+        with self.lock:
+            self.windows[hwnd] = title
+        self._send(CREATED, hwnd, title)
+
+    def destroy_window(self, hwnd):
+        with self.lock:
+            title = self.windows.pop(hwnd, None)
+        self._send(DESTROYED, hwnd, title)
+
+    def retitle_window(self, hwnd, title):
+        with self.lock:
+            self.windows[hwnd] = title
+        self._send(RETITLED, hwnd, title)
+
+    def focus_window(self, hwnd):
+        self._send(FOCUS_CHANGED, hwnd, self.windows.get(hwnd))
+
+    # Replay a list of (delay_seconds, kind, hwnd, title) steps
+    def play(self, script):
+        actions = {
+            CREATED: lambda hwnd, title: self.create_window(hwnd, title),
+            DESTROYED: lambda hwnd, title: self.destroy_window(hwnd),
+            RETITLED: lambda hwnd, title: self.retitle_window(hwnd, title),
+            FOCUS_CHANGED: lambda hwnd, title: self.focus_window(hwnd),
+        }
+        for delay, kind, hwnd, title in script:
+            if delay:
+                time.sleep(delay)
+            actions[kind](hwnd, title)
+
+
+# Win32 event source built on SetWinEventHook. Hooks run out of context on a
+# dedicated thread with its own message loop, so events arrive as they happen
+# instead of being discovered by a periodic re-scan.
+class Win32EventSource(WindowEventSource):
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    EVENT_OBJECT_CREATE = 0x8000
+    EVENT_OBJECT_DESTROY = 0x8001
+    EVENT_OBJECT_SHOW = 0x8002
+    EVENT_OBJECT_HIDE = 0x8003
+    EVENT_OBJECT_NAMECHANGE = 0x800C
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WINEVENT_SKIPOWNPROCESS = 0x0002
+    OBJID_WINDOW = 0
+    CHILDID_SELF = 0
+    GA_ROOT = 2
+    WM_QUIT = 0x0012
+
+    def __init__(self):
+        self.emit = None
+        self.thread = None
+        self.thread_id = None
+        self.ready = threading.Event()
+
+    def _user32(self):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [
+            wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, ctypes.c_void_p,
+            wintypes.DWORD, wintypes.DWORD, wintypes.DWORD,
+        ]
+        user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+        user32.GetAncestor.restype = wintypes.HWND
+        user32.GetAncestor.argtypes = [wintypes.HWND, wintypes.UINT]
+        user32.IsWindowVisible.argtypes = [wintypes.HWND]
+        user32.GetWindowTextLengthW.argtypes = [wintypes.HWND]
+        user32.GetWindowTextW.argtypes = [wintypes.HWND, wintypes.LPWSTR, ctypes.c_int]
+        return user32
+
+    def _title(self, user32, hwnd):
+        import ctypes
+
+        length = user32.GetWindowTextLengthW(hwnd)
+        if length <= 0:
+            return ""
+        buffer = ctypes.create_unicode_buffer(length + 1)
+        user32.GetWindowTextW(hwnd, buffer, length + 1)
+        return buffer.value
+
+    def snapshot(self):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = self._user32()
+        windows = {}
+        enum_proc_type = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+
+        # Visible windows only, the same set the backend lists
+        def collect(hwnd, _):
+            if not user32.IsWindowVisible(hwnd):
+                return True
+            title = self._title(user32, hwnd)
+            if title.strip():
+                windows[hwnd] = title
+            return True
+
+        user32.EnumWindows(enum_proc_type(collect), 0)
+        return windows
+
+    def start(self, emit):
+        self.emit = emit
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.ready.wait(5)
+
+    def stop(self):
+        if self.thread_id is not None:
+            import ctypes
+
+            ctypes.windll.user32.PostThreadMessageW(self.thread_id, self.WM_QUIT, 0, 0)
+            self.thread.join(5)
+            self.thread_id = None
+
+    def _run(self):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = self._user32()
+        self.thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+
+        hook_proc_type = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD,
+        )
+
+        def callback(hook, event, hwnd, id_object, id_child, thread, event_time):
+            if not hwnd or id_object != self.OBJID_WINDOW or id_child != self.CHILDID_SELF:
+                return
+            try:
+                # A hidden window leaves the tracked set like a destroyed one,
+                # and comes back as a new one when it's shown again
+                if event in (self.EVENT_OBJECT_DESTROY, self.EVENT_OBJECT_HIDE):
+                    self.emit(DESTROYED, hwnd, None)
+                    return
+                if user32.GetAncestor(hwnd, self.GA_ROOT) != hwnd:
+                    return
+                if not user32.IsWindowVisible(hwnd):
+                    return
+                title = self._title(user32, hwnd)
+                if event == self.EVENT_SYSTEM_FOREGROUND:
+                    self.emit(FOCUS_CHANGED, hwnd, title)
+                elif event in (self.EVENT_OBJECT_CREATE, self.EVENT_OBJECT_SHOW):
+                    self.emit(CREATED, hwnd, title)
+                elif event == self.EVENT_OBJECT_NAMECHANGE:
+                    self.emit(RETITLED, hwnd, title)
+            except Exception as e:
+                print(f"Error handling window event {event:#x}: {e}")
+
+        # Keep a reference so the callback isn't garbage collected
+        self.hook_proc = hook_proc_type(callback)
+        flags = self.WINEVENT_OUTOFCONTEXT | self.WINEVENT_SKIPOWNPROCESS
+        hooks = [
+            user32.SetWinEventHook(self.EVENT_SYSTEM_FOREGROUND, self.EVENT_SYSTEM_FOREGROUND, None, self.hook_proc, 0, 0, flags),
+            user32.SetWinEventHook(self.EVENT_OBJECT_CREATE, self.EVENT_OBJECT_HIDE, None, self.hook_proc, 0, 0, flags),
+            user32.SetWinEventHook(self.EVENT_OBJECT_NAMECHANGE, self.EVENT_OBJECT_NAMECHANGE, None, self.hook_proc, 0, 0, flags),
+        ]
+        self.ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+        for hook in hooks:
+            if hook:
+                user32.UnhookWinEvent(hook)
+
+
+# Turns raw source events into deltas against the set of known windows and
+# hands them out in coalesced batches
+class WindowTracker:
+    def __init__(self, source):
+        self.source = source
+        self.events = queue.Queue()
+        self.lock = threading.Lock()
+        self.titles = {}
+        self.focused = None
+
+    def start(self):
+        with self.lock:
+            self.titles = {hwnd: title for hwnd, title in self.source.snapshot().items() if title and title.strip()}
+        self.source.start(self._on_event)
+
+    def stop(self):
+        self.source.stop()
+
+    # Current {hwnd: title} view of the tracked windows
+    def windows(self):
+        with self.lock:
+            return dict(self.titles)
+
+    # Ask for a window to be re-probed (e.g. when a slow probe finishes late)
+    def refresh(self, hwnd):
+        with self.lock:
+            title = self.titles.get(hwnd)
+        if title is not None:
+            self.events.put(WindowEvent(REFRESHED, hwnd, title))
+
+    # Called by the source (possibly from its own thread)
+    def _on_event(self, kind, hwnd, title):
+        with self.lock:
+            known = hwnd in self.titles
+            if kind == DESTROYED:
+                if not known:
+                    return
+                title = self.titles.pop(hwnd)
+                if self.focused == hwnd:
+                    self.focused = None
+            elif kind == FOCUS_CHANGED:
+                if self.focused == hwnd:
+                    return
+                self.focused = hwnd
+            elif kind in (CREATED, RETITLED):
+                if not title or not title.strip():
+                    # A window losing its title drops out of the tracked set,
+                    # the same way get_open_windows() skips untitled windows
+                    if not known:
+                        return
+                    self.titles.pop(hwnd)
+                    kind, title = DESTROYED, None
+                elif not known:
+                    self.titles[hwnd] = title
+                    kind = CREATED
+                elif self.titles[hwnd] == title:
+                    return
+                else:
+                    self.titles[hwnd] = title
+                    kind = RETITLED
+            else:
+                return
+        self.events.put(WindowEvent(kind, hwnd, title))
+
+    # Block until at least one delta is available (or timeout), then return
+    # everything that arrived within the coalescing window, folded per hwnd
+    def wait_for_deltas(self, timeout=None):
+        try:
+            first = self.events.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + COALESCE_WINDOW
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.events.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return coalesce_events(batch)
+
+
+# Fold a batch of events so each hwnd appears at most once per kind group:
+# created+retitled -> created, created+destroyed -> nothing,
+# retitled+retitled -> last title, refreshed folds into anything else.
+# Focus changes keep only the latest.
+def coalesce_events(events):
+    merged = {}
+    focus = None
+    for event in events:
+        if event.kind == FOCUS_CHANGED:
+            focus = event
+            continue
+        if event.hwnd not in merged:
+            merged[event.hwnd] = event
+            continue
+        previous = merged[event.hwnd]
+        if event.kind == REFRESHED:
+            continue
+        if previous is not None and previous.kind == REFRESHED:
+            merged[event.hwnd] = event
+        elif event.kind == DESTROYED:
+            merged[event.hwnd] = None if previous is not None and previous.kind == CREATED else event
+        elif previous is None or previous.kind in (CREATED, DESTROYED):
+            # Cancelled, re-used or freshly created handles all need a full probe
+            merged[event.hwnd] = WindowEvent(CREATED, event.hwnd, event.title)
+        else:
+            merged[event.hwnd] = WindowEvent(RETITLED, event.hwnd, event.title)
+    result = [event for event in merged.values() if event is not None]
+    if focus is not None:
+        result.append(focus)
+    return result
@@ -0,0 +1,159 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Programs launched at once
+MAX_LAUNCHES = 8
+
+# How long to wait for launched programs' windows before giving up on them
+RESTORE_TIMEOUT = 15.0
+
+# How often to look for new windows while waiting
+POLL_INTERVAL = 0.1
+
+# Once every launched program has shown a window, stop waiting after this
+# long without another new window. Each executable is launched once, so
+# saved windows beyond an app's first may never come back on their own.
+SETTLE_TIME = 1.0
+
+# Executable name that gets its windows back through DevTools tabs
+CHROME_PROCESS = "chrome.exe"
+
+
+def saved_title(key, metadata):
+    return metadata.get("title") or key
+
+
+# Reopens a project's saved windows: launches each distinct executable once,
+# all concurrently, opens Chrome URLs over the shared DevTools session (or
+# on one Chrome command line if DevTools isn't reachable), then moves each
+# window to its saved rect as it appears.
+class WorkspaceRestore:
+    def __init__(self, backend, chrome_session=None, max_launches=MAX_LAUNCHES,
+                 timeout=RESTORE_TIMEOUT, poll_interval=POLL_INTERVAL, settle_time=SETTLE_TIME):
+        self.backend = backend
+        self.chrome_session = chrome_session
+        self.max_launches = max_launches
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.process_info = {}
+
+    def _exe_for(self, handle):
+        try:
+            pid = self.backend.get_pid(handle)
+        except Exception:
+            return None
+        if pid not in self.process_info:
+            self.process_info[pid] = self.backend.get_process_info(pid)
+        return self.process_info[pid][1]
+
+    # Restore windows saved as {key: metadata}; keys are window ids (titles
+    # in older saves) and the title comes from the metadata. Returns a
+    # summary with the live handle each saved window ended up on ("placed")
+    # and the keys of those that never appeared ("missing").
+    def restore(self, programs, on_progress=None):
+        started = time.monotonic()
+        report = on_progress or (lambda message: None)
+        existing = dict(self.backend.list_windows())
+        open_titles = set(existing.values())
+
+        # Windows that are already open only need moving
+        wanted = {key: metadata for key, metadata in programs.items() if metadata.get("rect")}
+        to_launch = [metadata for key, metadata in programs.items() if saved_title(key, metadata) not in open_titles]
+
+        chrome_urls = []
+        chrome_exe = None
+        exes = {}
+        for metadata in to_launch:
+            exe_path = metadata.get("exe_path")
+            if not exe_path:
+                continue
+            if metadata.get("process_name") == CHROME_PROCESS and metadata.get("chrome_url"):
+                chrome_exe = exe_path
+                chrome_urls.append(metadata["chrome_url"])
+            else:
+                exes.setdefault(exe_path, None)
+
+        report(f"Launching {len(exes)} programs and {len(chrome_urls)} Chrome tabs")
+        launched, failed = [], []
+        with ThreadPoolExecutor(max_workers=self.max_launches, thread_name_prefix="restore") as executor:
+            futures = {exe_path: executor.submit(self.backend.launch, exe_path) for exe_path in exes}
+            if chrome_urls:
+                futures[chrome_exe] = executor.submit(self._open_chrome, chrome_exe, chrome_urls)
+            for exe_path, future in futures.items():
+                try:
+                    future.result()
+                    launched.append(exe_path)
+                except Exception as e:
+                    print(f"Error launching {exe_path}: {e}")
+                    failed.append(exe_path)
+
+        placed = self._place_windows(wanted, existing, set(launched), report)
+        elapsed = time.monotonic() - started
+        report(f"Restored {len(placed)} of {len(wanted)} windows in {elapsed:.1f}s")
+        return {
+            "launched": launched,
+            "failed": failed,
+            "chrome_tabs": len(chrome_urls),
+            "placed": placed,
+            "missing": [key for key in wanted if key not in placed],
+            "elapsed": elapsed,
+        }
+
+    def _open_chrome(self, chrome_exe, urls):
+        if self.chrome_session is not None and self.chrome_session.open_urls(urls) is not None:
+            return
+        self.backend.launch(chrome_exe, urls)
+
+    # Match saved windows to live ones and move them, until every saved
+    # window is placed, the launched programs have settled, or the timeout
+    # runs out. A window matches by exact
+    # title first; otherwise the oldest unclaimed new window of the same
+    # executable is used, since titles often change once a document loads.
+    def _place_windows(self, wanted, existing, launched, report):
+        placed = {}
+        claimed = set()
+        seen = set()
+        seen_exes = set()
+        last_new_window = time.monotonic()
+        deadline = last_new_window + self.timeout
+        while True:
+            windows = self.backend.list_windows()
+            by_title = {}
+            new_by_exe = {}
+            for handle, title in windows:
+                if handle in claimed:
+                    continue
+                by_title.setdefault(title, handle)
+                if handle not in existing:
+                    new_by_exe.setdefault(self._exe_for(handle), []).append(handle)
+            new_handles = {handle for handles in new_by_exe.values() for handle in handles} | claimed
+            if not new_handles <= seen:
+                seen |= new_handles
+                seen_exes.update(new_by_exe)
+                last_new_window = time.monotonic()
+
+            for key, metadata in wanted.items():
+                if key in placed:
+                    continue
+                title = saved_title(key, metadata)
+                handle = by_title.get(title)
+                if handle is None:
+                    candidates = new_by_exe.get(metadata.get("exe_path")) or []
+                    candidates = [candidate for candidate in candidates if candidate not in claimed]
+                    handle = candidates[0] if candidates else None
+                if handle is None:
+                    continue
+                try:
+                    self.backend.move_window(handle, metadata["rect"])
+                except Exception as e:
+                    print(f"Error moving window {title}: {e}")
+                placed[key] = handle
+                claimed.add(handle)
+
+            now = time.monotonic()
+            settled = launched <= seen_exes and now - last_new_window >= self.settle_time
+            if len(placed) == len(wanted) or settled or now >= deadline:
+                return placed
+            report(f"Waiting for {len(wanted) - len(placed)} windows")
+            time.sleep(self.poll_interval)